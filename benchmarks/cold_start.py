@@ -0,0 +1,128 @@
+"""
+Measures launcher cold start time of every startup mode
+
+Each run starts launcher with `--profile_imports` and waits for `Cold start (<mode>)` record in the log, which is
+written once launcher is ready to show its first frame (or to start the game in nogui mode). Launcher process is
+killed as soon as the record shows up. Log is written asynchronously, so nogui run may still get to start the game
+and update run may get to download updates, use configured launcher without pending updates.
+
+Usage (from repo root, launcher must be installed and configured, as it uses its regular Resources folder):
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --runs 10 --modes gui nogui
+    python benchmarks/cold_start.py --exe "C:/XXMI Launcher/Resources/Bin/XXMI Launcher.exe"
+"""
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+from pathlib import Path
+
+import psutil
+
+repo_path = Path(__file__).resolve().parent.parent
+
+modes = {
+    'gui': [],
+    'nogui': ['--nogui'],
+    'update': ['--update'],
+    'export_mirror': ['--export_mirror', str(Path(tempfile.gettempdir()) / 'XXMI Mirror Benchmark')],
+}
+
+cold_start_pattern = re.compile(r'Cold start \((\w+)\): ([\d.]+)s, (\d+) modules loaded')
+imports_pattern = re.compile(r'Imported (\d+) modules in ([\d.]+)s')
+
+
+def get_launcher(exe_path: str = ''):
+    """
+    Returns launcher command and path to its log file
+    """
+    if exe_path:
+        # Build: `XXMI Launcher\Resources\Bin\XXMI Launcher.exe`
+        exe_path = Path(exe_path).resolve()
+        return [str(exe_path)], exe_path.parent.parent.parent / 'XXMI Launcher Log.txt'
+    # Python: `XXMI Launcher\src\xxmi_launcher\app.py`
+    return [sys.executable, str(repo_path / 'src' / 'xxmi_launcher' / 'app.py')], repo_path / 'XXMI Launcher Log.txt'
+
+
+def read_new_lines(log_path: Path, offset: int):
+    """
+    Returns complete lines written to log since given offset and offset of the first incomplete one
+    """
+    if not log_path.is_file():
+        return [], 0
+    if log_path.stat().st_size < offset:
+        # Log was archived by the started launcher
+        offset = 0
+    with open(log_path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    data = data[:data.rfind(b'\n') + 1]
+    return data.decode('utf-8', errors='replace').splitlines(), offset + len(data)
+
+
+def kill_tree(pid: int):
+    try:
+        process = psutil.Process(pid)
+        for child in process.children(recursive=True):
+            child.kill()
+        process.kill()
+    except psutil.NoSuchProcess:
+        pass
+
+
+def measure(cmd, log_path: Path, mode: str, timeout: float):
+    """
+    Returns (cold start time, modules loaded, import time) of single launcher start
+    """
+    offset = log_path.stat().st_size if log_path.is_file() else 0
+    process = subprocess.Popen(cmd + modes[mode] + ['--profile_imports'])
+    cold_start, import_time = None, None
+    try:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            lines, offset = read_new_lines(log_path, offset)
+            for line in lines:
+                if (result := cold_start_pattern.search(line)) is not None and result.group(1) == mode:
+                    cold_start = float(result.group(2)), int(result.group(3))
+                elif (result := imports_pattern.search(line)) is not None:
+                    import_time = float(result.group(2))
+            # Import report is written right after cold start record
+            if cold_start is not None and import_time is not None:
+                return *cold_start, import_time
+            if process.poll() is not None and cold_start is not None:
+                return *cold_start, 0.0
+            time.sleep(0.05)
+        raise TimeoutError(f'Launcher did not log cold start of {mode} mode in {timeout:.0f}s!')
+    finally:
+        kill_tree(process.pid)
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure launcher cold start time of every startup mode.')
+    parser.add_argument('--exe', type=str, default='', help='Path to launcher build, source is used by default.')
+    parser.add_argument('--runs', type=int, default=5, help='Number of measured starts per mode.')
+    parser.add_argument('--modes', nargs='+', choices=list(modes.keys()), default=list(modes.keys()))
+    parser.add_argument('--timeout', type=float, default=60, help='Max wait for launcher start in seconds.')
+    args = parser.parse_args()
+
+    cmd, log_path = get_launcher(args.exe)
+
+    print(f'{"mode":<14}{"p50":>9}{"min":>9}{"max":>9}{"imports":>10}{"modules":>9}')
+    for mode in args.modes:
+        # First start warms up OS file cache, it isn't representative
+        measure(cmd, log_path, mode, args.timeout)
+        results = [measure(cmd, log_path, mode, args.timeout) for _ in range(args.runs)]
+        cold_starts = [result[0] for result in results]
+        print(f'{mode:<14}'
+              f'{statistics.median(cold_starts):>8.3f}s{min(cold_starts):>8.3f}s{max(cold_starts):>8.3f}s'
+              f'{statistics.median(result[2] for result in results):>9.3f}s'
+              f'{results[-1][1]:>9}')
+
+
+if __name__ == '__main__':
+    main()
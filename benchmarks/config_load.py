@@ -0,0 +1,135 @@
+"""
+Compares schema-compiled config_loader.load against as_dict + dacite.from_dict round trip used by AppConfig.from_json before
+
+Config is loaded the same way as on launcher startup: defaults are updated with parsed JSON of populated config with
+all six importers configured and every package state filled in.
+
+Usage (from repo root, on Windows with launcher requirements installed):
+    python benchmarks/config_load.py
+    python benchmarks/config_load.py --repeat 200
+"""
+import sys
+import json
+import atexit
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+from pathlib import Path
+from dataclasses import fields
+
+repo_path = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(repo_path / 'src' / 'xxmi_launcher'))
+
+from dacite import from_dict
+
+import core.locale_manager as Locale
+
+# Launcher modules translate their strings on import, locale is initialized in temporary root to keep its cache away
+root_path = Path(tempfile.mkdtemp(prefix='XXMI Config Benchmark '))
+shutil.copytree(repo_path / 'Locale', root_path / 'Locale')
+atexit.register(shutil.rmtree, root_path, ignore_errors=True)
+Locale.initialize(root_path)
+
+import core.config_manager as Config
+
+from core.package_manager import PackageConfig
+from core.utils.dataclass_loader import DataclassLoader
+
+packages = ['Launcher', 'XXMI', 'GIMI', 'SRMI', 'WWMI', 'ZZMI', 'HIMI', 'EFMI']
+
+release_notes = '\n'.join([
+    '## Changelog',
+    *[f'* Fixed issue #{i} with mods loading on some game versions and systems' for i in range(20)],
+    '## Signature',
+    '- MGQCMGnPUOcBYkk8qgDYwBcjDVk6uRj4EcYTBqtxBuJ3BeAtCi4t7GB2R6bCWrwD9tL1Xq2SsT9iF6gBg8kM+hA2aAmwsvJRQe6I=',
+])
+
+
+def get_config_data() -> dict:
+    """
+    Returns JSON data of config as it's written by launcher after a while of use
+    """
+    config = Config.AppConfig()
+    config.Launcher.active_importer = 'WWMI'
+    config.Launcher.config_version = '2.2.0'
+    for package_name in packages:
+        config.Packages.packages[package_name] = PackageConfig(
+            latest_version='1.2.3',
+            deployed_version='1.2.2',
+            update_check_time=1700000000,
+            latest_release_notes=release_notes,
+            deployed_release_notes=release_notes,
+        )
+    for importer_name, importer in config.Importers.__dict__.items():
+        importer.Importer.importer_folder = f'{importer_name}/'
+        importer.Importer.game_folder = f'D:/Games/{importer_name} Game'
+        importer.Importer.launch_count = 42
+        importer.Importer.run_pre_launch = 'start "" "D:/Tools/Overlay.exe" --minimized'
+        importer.Importer.deployed_migoto_signatures = {
+            f'{dll_name}.dll': 'MGQCMGnPUOcBYkk8qgDYwBcjDVk6uRj4EcYTBqtxBuJ3BeAtCi4t7GB2R6bCWrwD9tL1Xq2SsT9iF6gBg'
+            for dll_name in ['d3d11', 'd3dcompiler_47', 'nvapi64']
+        }
+    # Config file is written by `save` as JSON, so data types are the same as on real load
+    return json.loads(config.as_json())
+
+
+def load_dacite(data: dict):
+    config = Config.AppConfig()
+    cfg = config.as_dict(config)
+    cfg.update(data)
+    return from_dict(data_class=Config.AppConfig, data=cfg)
+
+
+def load_compiled(config_loader: DataclassLoader, data: dict):
+    config = Config.AppConfig()
+    cfg = {config_field.name: getattr(config, config_field.name) for config_field in fields(Config.AppConfig) if config_field.init}
+    cfg.update(data)
+    return config_loader.load(Config.AppConfig, cfg)
+
+
+def measure(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark config load implementations.')
+    parser.add_argument('--repeat', type=int, default=50, help='Number of runs, the median one is reported.')
+    args = parser.parse_args()
+
+    data = get_config_data()
+
+    # Fresh loader compiles schema on the first load, same as on launcher startup
+    config_loader = DataclassLoader()
+    start_time = time.perf_counter()
+    compiled_config = load_compiled(config_loader, data)
+    first_load_time = time.perf_counter() - start_time
+
+    dacite_config = load_dacite(data)
+    # State fields with 'init=False' aren't loaded from file
+    for config_field in fields(Config.AppConfig):
+        if config_field.init and getattr(compiled_config, config_field.name) != getattr(dacite_config, config_field.name):
+            raise ValueError(f'Compiled loader output differs from dacite one in {config_field.name} section!')
+
+    # Default config construction is shared by both ways, it's measured separately to show pure load time
+    defaults_time = measure(Config.AppConfig, args.repeat)
+    dacite_time = measure(lambda: load_dacite(data), args.repeat)
+    compiled_time = measure(lambda: load_compiled(config_loader, data), args.repeat)
+
+    print(f'Config: {len(json.dumps(data, indent=4))} bytes of JSON, {len(data["Importers"])} importers')
+    print(f'defaults:          {defaults_time * 1000:8.2f}ms')
+    print(f'dacite round trip: {dacite_time * 1000:8.2f}ms')
+    print(f'compiled loader:   {compiled_time * 1000:8.2f}ms ({dacite_time / compiled_time:.1f}x), '
+          f'{first_load_time * 1000:.2f}ms on first load including schema compile')
+
+
+if __name__ == '__main__':
+    main()
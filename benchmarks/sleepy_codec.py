@@ -0,0 +1,83 @@
+"""
+Compares bulk SleepyCodec against byte by byte Sleepy.internal_write/internal_decode on settings sized payloads
+
+Usage (from repo root):
+    python benchmarks/sleepy_codec.py
+    python benchmarks/sleepy_codec.py --items 50000 --repeat 10
+"""
+import io
+import sys
+import time
+import argparse
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src' / 'xxmi_launcher'))
+
+from core.utils.sleepy import Sleepy, SleepyCodec, JsonSerializer
+
+# Magic of ZZZ GENERAL_DATA.bin
+magic = bytes([85, 110, 209, 150, 116, 209, 131, 206, 149, 110, 103, 105, 110, 208, 181, 46, 71, 208, 176, 109, 101, 206,
+               159, 98, 106, 101, 209, 129, 116])
+
+
+def reference_encode(content: str) -> bytes:
+    content_len = len(content)
+    content_bytes, encoded_bytes = bytearray(content_len * 2), bytearray(content_len * 2)
+    content_bytes[:content_len] = content.encode('utf-8')[:content_len]
+    evil, _ = Sleepy.create_evil(magic)
+    length = Sleepy.internal_write(magic, content_len, content_bytes, encoded_bytes, evil)
+    return bytes(encoded_bytes[:length])
+
+
+def reference_decode(data: bytes) -> str:
+    evil, _ = Sleepy.create_evil(magic)
+    buffer_chars = [''] * (len(data) + 1)
+    Sleepy.internal_decode(magic, evil, io.BytesIO(data), len(data), len(magic), buffer_chars)
+    return ''.join(buffer_chars)
+
+
+def measure(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Sleepy codec implementations.')
+    parser.add_argument('--items', type=int, default=5000, help='Number of settings entries in payload.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of runs, the fastest one is reported.')
+    args = parser.parse_args()
+
+    content = JsonSerializer().dumps({
+        '$Type': 'MoleMole.GeneralLocalDataItem',
+        'userLocalDataVersionId': '0.0.1',
+        'SystemSettingDataMap': {
+            str(i): {'$Type': 'MoleMole.SystemSettingLocalData', 'Version': 0, 'Data': i * 3} for i in range(args.items)
+        },
+    })
+    content_bytes = content.encode('utf-8')[:len(content)]
+
+    codec = SleepyCodec(magic)
+    encoded = codec.encode(content_bytes)
+    if encoded != reference_encode(content) or codec.decode(encoded) != reference_decode(encoded):
+        raise ValueError('Bulk codec output differs from reference one!')
+
+    results = {
+        'encode': (measure(lambda: reference_encode(content), args.repeat),
+                   measure(lambda: codec.encode(content_bytes), args.repeat)),
+        'decode': (measure(lambda: reference_decode(encoded), args.repeat),
+                   measure(lambda: codec.decode(encoded), args.repeat)),
+    }
+
+    print(f'Payload: {len(content)} chars, {len(encoded)} bytes encoded')
+    for name, (reference_time, bulk_time) in results.items():
+        print(f'{name}: byte by byte {reference_time * 1000:8.1f}ms, bulk {bulk_time * 1000:8.1f}ms '
+              f'({reference_time / bulk_time:.0f}x)')
+
+
+if __name__ == '__main__':
+    main()
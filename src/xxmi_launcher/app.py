@@ -95,20 +95,25 @@ if __name__ == '__main__':
 
     instance_id = int(time.time() * 1000) % 1000000
 
-    logging.basicConfig(filename=root_path / 'XXMI Launcher Log.txt',
-                        encoding='utf-8',
-                        filemode='a',
-                        format=f'%(asctime)s {instance_id:06} %(name)s %(levelname)s %(message)s',
-                        level=logging.DEBUG)
+    import core.utils.log_rotation as LogRotation
+    LogRotation.initialize(log_path=root_path / 'XXMI Launcher Log.txt',
+                           archive_path=root_path / 'Resources' / 'Logs',
+                           log_format=f'%(asctime)s {instance_id:06} %(name)s %(levelname)s %(message)s',
+                           level=logging.DEBUG)
 
     logging.debug(f'App Start')
 
+    if '-pi' in sys.argv or '--profile_imports' in sys.argv:
+        import core.utils.startup_profiler as StartupProfiler
+        StartupProfiler.enable_import_profiler()
+
     msvc_error = None
     gui = None
 
     try:
         import core.locale_manager as Locale
-        Locale.initialize(root_path)
+        # Quick launch requires only few status strings, so there's no need to load whole locale
+        Locale.initialize(root_path, lazy='-n' in sys.argv or '--nogui' in sys.argv)
 
         try:
             verify_msvc_integrity()
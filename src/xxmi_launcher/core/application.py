@@ -6,11 +6,13 @@ import shutil
 import subprocess
 import time
 import traceback
+import json
+import hashlib
 
 from pathlib import Path
 from typing import Union, Callable, List, Optional
-from dataclasses import dataclass, field
-from threading import Thread, current_thread, main_thread
+from dataclasses import dataclass, field, asdict
+from threading import Thread, Timer, current_thread, main_thread
 from queue import Queue, Empty
 
 import core.error_manager as Errors
@@ -20,9 +22,14 @@ import core.event_manager as Events
 import core.config_manager as Config
 
 import core.utils.system_info as system_info
+import core.utils.log_rotation as LogRotation
+import core.utils.tracer as Tracer
+import core.utils.startup_profiler as StartupProfiler
 
 from core.locale_manager import L
 from core.package_manager import PackageManager
+from core.mod_manager import ModManager, OptimizationPolicy, IssueType
+from core.utils.log_analyzer import LogAnalyzer, LaunchCounterStat
 
 from core.packages.launcher_package import LauncherPackage
 from core.packages.migoto_package import MigotoPackage
@@ -190,6 +197,9 @@ class ApplicationEvents:
 
 
 class Application:
+    # Time given to background update staging on exit, interrupted staging starts over on the next launcher start
+    staging_exit_timeout = 30
+
     def __init__(self, gui):
         # At this point GUI is minimally initialized (just enough to show messages)
         self.gui = gui
@@ -201,6 +211,10 @@ class Application:
         self.error_queue = Queue()
         # App state flag for watchdog thread
         self.is_alive = True
+        # Game launch state flag, allows background update staging to outlive launcher window
+        self.game_launched = False
+        # Process exit code, set by headless commands
+        self.exit_code = os.EX_OK
 
         # Parse console args
         parser = argparse.ArgumentParser(add_help=False)
@@ -217,6 +231,28 @@ class Application:
                             help='Create desktop shortcut for launcher .exe.')
         parser.add_argument('-un', '--uninstall', action='store_true',
                             help='Remove downloaded packages from the Resources folder.')
+        parser.add_argument('-em', '--export_mirror', type=str,
+                            help='Export cached package releases to given mirror folder.')
+        parser.add_argument('-pi', '--profile_imports', action='store_true',
+                            help='Log time spent on import of every module during startup.')
+        parser.add_argument('-om', '--optimize_mods', type=str, nargs='?', const='',
+                            help='Optimize given Mods folder (or one of active model importer) without GUI and print JSON report.')
+        parser.add_argument('--dry_run', action='store_true',
+                            help='Report mod optimizations without applying them.')
+        parser.add_argument('--no_cache', action='store_true',
+                            help='Validate all ini files, including unchanged ones processed by previous runs.')
+        parser.add_argument('--reset_cache', action='store_true',
+                            help='Discard cache of processed ini files.')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of threads used for ini files validation.')
+        parser.add_argument('--rogue_ini', type=str, choices=['disable', 'abort'], default='abort',
+                            help='Action for mods shipped with d3dx.ini.')
+        parser.add_argument('--global_triggers', type=str, choices=['disable', 'ignore', 'skip'], default='skip',
+                            help='Action for mods with global triggers (skip reports them again next time).')
+        parser.add_argument('--duplicate_libraries', type=str, choices=['disable', 'ignore'], default='ignore',
+                            help='Action for libraries already included into model importer.')
+        parser.add_argument('--report', type=str,
+                            help='Write JSON report to given file instead of stdout.')
         try:
             args = [arg for arg in sys.argv[1:] if arg != '&&']  # Filter out shell operator '&&'
             self.args = parser.parse_args(args)
@@ -270,10 +306,17 @@ class Application:
         self.package_manager = PackageManager(self.packages)
 
         if self.args.uninstall:
+            StartupProfiler.log_startup('uninstall')
             self.package_manager.uninstall_packages()
             self.exit()
             return
 
+        if self.args.export_mirror:
+            StartupProfiler.log_startup('export_mirror')
+            self.package_manager.export_mirror(Path(self.args.export_mirror).resolve())
+            self.exit()
+            return
+
         if self.args.create_shortcut:
             Events.Fire(Events.LauncherManager.CreateShortcut())
 
@@ -283,6 +326,12 @@ class Application:
         # Load packages of active importer and skip update for fast start
         self.load_importer(active_importer, update=False)
 
+        if self.args.optimize_mods is not None:
+            StartupProfiler.log_startup('optimize_mods')
+            self.optimize_mods()
+            self.exit()
+            return
+
         if self.args.update:
             Config.Config.save()
 
@@ -298,8 +347,15 @@ class Application:
                 # Async run update_packages in check-for-updates mode to save available updates versions to config
                 # It allows to go straight to game launch at the cost of update notification being delayed by 1 restart
                 self.run_as_thread(self.package_manager.update_packages, no_install=True, silent=True)
+                StartupProfiler.log_startup('nogui')
                 # Launch game and close launcher
                 self.launch()
+                # Download found updates while the game is running, so next launcher start only has to install them
+                for thread in self.threads:
+                    thread.join()
+                # Keep found updates versions even if staging gets interrupted
+                Config.Config.save()
+                self.stage_updates(timeout=self.staging_exit_timeout)
                 self.exit()
                 return
 
@@ -342,6 +398,9 @@ class Application:
 
         logging.debug('Core ready!')
 
+        # Forced update (--update) goes through GUI startup too, but is tracked as separate mode
+        StartupProfiler.log_startup('update' if self.args.update else 'gui')
+
         self.gui.open()
 
     def handle_open_settings(self, event: ApplicationEvents.OpenSettings):
@@ -452,6 +511,83 @@ class Application:
 
         return active_importer
 
+    def optimize_mods(self):
+        """
+        Runs validator and optimizer on Mods folder with user prompts answered by policy args
+        """
+        policy = OptimizationPolicy(
+            rogue_ini=self.args.rogue_ini,
+            global_triggers=self.args.global_triggers,
+            duplicate_libraries=self.args.duplicate_libraries,
+        )
+        report = {
+            'importer': Config.Launcher.active_importer,
+            'mods_path': None,
+            'dry_run': self.args.dry_run,
+            'use_cache': not self.args.no_cache,
+            'workers': self.args.workers,
+            'policy': asdict(policy),
+            'status': 'ok',
+            'error': None,
+            'mods': None,
+            'shaderfixes': None,
+        }
+        mod_manager = ModManager(policy=policy, workers=max(1, self.args.workers))
+        try:
+            package = self.package_manager.get_package(Config.Launcher.active_importer)
+            if not isinstance(package, ModelImporterPackage):
+                raise ValueError(L('error_optimize_mods_importer_not_selected',
+                                   'Model importer must be selected with `--xxmi` arg to optimize mods!'))
+
+            importer_mods_path = Config.Active.Importer.importer_path / 'Mods'
+            mods_path = Path(self.args.optimize_mods).resolve() if self.args.optimize_mods else importer_mods_path
+            report['mods_path'] = str(mods_path)
+            if not mods_path.is_dir():
+                raise ValueError(L('error_optimize_mods_folder_not_found', 'Mods folder `{path}` not found!').format(path=mods_path))
+
+            if mods_path == importer_mods_path:
+                # Share cache with optimization done by game launch
+                cache_path = package.get_mods_optimizer_cache_path()
+                exclude_patterns = package.get_mods_exclude_patterns()
+            else:
+                path_hash = hashlib.sha1(str(mods_path).lower().encode()).hexdigest()[:12]
+                cache_path = Paths.App.Resources / 'Cache' / 'Ini Optimizer' / f'Custom {path_hash}.json'
+                exclude_patterns = ['DISABLED*']
+
+            mod_result = mod_manager.optimize_mods_folder(
+                mods_path=mods_path,
+                cache_path=cache_path,
+                dry_run=self.args.dry_run,
+                use_cache=not self.args.no_cache,
+                reset_cache=self.args.reset_cache,
+                exclude_patterns=exclude_patterns,
+            )
+            report['mods'] = asdict(mod_result)
+
+            shaderfixes_path = mods_path.parent / 'ShaderFixes'
+            if shaderfixes_path.is_dir():
+                shader_result = mod_manager.optimize_shaderfixes_folder(
+                    shaderfixes_path=shaderfixes_path,
+                    exclude_patterns=exclude_patterns,
+                    dry_run=self.args.dry_run,
+                )
+                report['shaderfixes'] = asdict(shader_result)
+
+        except Exception as e:
+            logging.exception(e)
+            # Optimization is aborted by policy if there's rogue d3dx.ini in Mods folder
+            rogue_ini_found = any(issue['type'] == IssueType.RogueIni.value for issue in mod_manager.issues)
+            report['status'] = 'aborted' if rogue_ini_found else 'failed'
+            report['error'] = str(e)
+            report['mods'] = {'issues': mod_manager.issues, 'actions': mod_manager.actions}
+            self.exit_code = 1
+
+        report = json.dumps(report, indent=2)
+        if self.args.report:
+            Paths.App.write_file(Path(self.args.report).resolve(), report)
+        elif sys.stdout is not None:
+            print(report)
+
     def auto_update(self):
         # Exit early if current active model importer is not installed
         importer_package = self.package_manager.packages.get(Config.Launcher.active_importer, None)
@@ -478,9 +614,11 @@ class Application:
             return
         # Exit early if automatic update installation is not expected
         if not (Config.Launcher.auto_update or self.args.update):
+            self.stage_updates()
             return
         # If user is in rush and managed to start the game, lets rather not bother them with update
-        if self.is_locked:
+        if self.is_locked or self.game_launched:
+            self.stage_updates()
             return
         # Install any updates we've managed to find during previous update_packages call
         self.package_manager.update_packages(no_check=True, force=self.args.update, silent=False)
@@ -553,6 +691,19 @@ class Application:
 
         return bool(user_requested_update)
 
+    def stage_updates(self, timeout: Optional[float] = None):
+        if not Config.Launcher.stage_updates:
+            return
+        cancel_timer = None
+        if timeout is not None:
+            cancel_timer = Timer(timeout, self.package_manager.cancel_staging)
+            cancel_timer.start()
+        try:
+            self.package_manager.stage_updates(bandwidth_limit=max(0, Config.Launcher.stage_bandwidth_limit) * 1024)
+        finally:
+            if cancel_timer is not None:
+                cancel_timer.cancel()
+
     def check_for_updates(self, force: bool = True):
         try:
             self.package_manager.update_packages(no_install=True, force=force)
@@ -576,54 +727,13 @@ class Application:
             ))
 
     def get_launch_counters_from_log(self, exclude_failed = True):
-        with (open(Paths.App.Root / 'XXMI Launcher Log.txt', 'r', encoding='utf-8', errors='ignore') as f):
-            launch_counters = { 'GIMI': 0, 'SRMI': 0,  'WWMI': 0, 'ZZMI': 0, 'HIMI': 0, 'EFMI': 0 }
-
-            def parse_active_package(line):
-                if 'Loaded package:' in line:
-                    for package in launch_counters.keys():
-                        if package in line:
-                            return package
-                return ''
-            def parse_launch(line):
-                return line.endswith('ApplicationEvents.Launch()')
-            def parse_warning(line):
-                return 'ApplicationEvents.ShowWarning' in line
-            def parse_error(line):
-                return 'ApplicationEvents.ShowError' in line
-            def parse_state_ready(line):
-                return line.endswith('ApplicationEvents.Ready()')
-
-            active_package = ''
-            launch_in_progress = False
-
-            for line_id, line in enumerate(map(str.strip, f.readlines())):
-                # Detect which model importer is used for launch event
-                package = parse_active_package(line)
-                if package:
-                    active_package = package
-                    launch_in_progress = False  # Reset launch event state to handle possible malformed logs
-                    continue
-                # Skip all lines 'till model importer package load
-                if not active_package:
-                    continue
-                # Detect launch event
-                if parse_launch(line):
-                    launch_in_progress = True
-                    continue
-                # Detect result of launch event
-                if launch_in_progress:
-                    # Abort launch event parsing on warning or error
-                    if exclude_failed and (parse_warning(line) or parse_error(line)):
-                        launch_in_progress = False
-                        continue
-                    # Detect launch event finish
-                    if parse_state_ready(line):
-                        launch_counters[active_package] += 1
-                        launch_in_progress = False
-                        continue
-
-            return launch_counters
+        log_analyzer = LogAnalyzer(
+            log_path=Paths.App.Root / 'XXMI Launcher Log.txt',
+            checkpoint_path=Paths.App.Resources / 'Cache' / 'Log Analyzer' / 'XXMI Launcher Log.json',
+        )
+        launch_counter = log_analyzer.add_stat(LaunchCounterStat(exclude_failed=exclude_failed))
+        log_analyzer.update()
+        return launch_counter.launch_counters
 
     def get_launch_counters(self):
         launch_counters = {}
@@ -680,26 +790,33 @@ class Application:
             return
         self.is_locked = True
 
+        Tracer.start_trace('Launch')
+        trace_status = 'failed'
+
         Events.Fire(Events.Application.Busy())
 
         try:
             # Execute specified shell command before game start
             if Config.Active.Importer.run_pre_launch_enabled and Config.Active.Importer.run_pre_launch != '':
-                Events.Fire(Events.Application.RunPreLaunch(cmd=Config.Active.Importer.run_pre_launch))
-                process = subprocess.Popen(Config.Active.Importer.run_pre_launch, shell=True)
-                if Config.Active.Importer.run_pre_launch_wait:
-                    process.wait()
+                with Tracer.span('run_pre_launch'):
+                    Events.Fire(Events.Application.RunPreLaunch(cmd=Config.Active.Importer.run_pre_launch))
+                    process = subprocess.Popen(Config.Active.Importer.run_pre_launch, shell=True)
+                    if Config.Active.Importer.run_pre_launch_wait:
+                        process.wait()
 
             # Signal active model importer package to start game and inject 3dmigoto
             Events.Fire(Events.ModelImporter.StartGame())
 
             # Execute specified shell command after successful injection
             if Config.Active.Importer.run_post_load_enabled and Config.Active.Importer.run_post_load != '':
-                Events.Fire(Events.Application.RunPostLoad(cmd=Config.Active.Importer.run_post_load))
-                process = subprocess.Popen(Config.Active.Importer.run_post_load, shell=True)
-                if Config.Active.Importer.run_post_load_wait:
-                    process.wait()
+                with Tracer.span('run_post_load'):
+                    Events.Fire(Events.Application.RunPostLoad(cmd=Config.Active.Importer.run_post_load))
+                    process = subprocess.Popen(Config.Active.Importer.run_post_load, shell=True)
+                    if Config.Active.Importer.run_post_load_wait:
+                        process.wait()
+            trace_status = 'ok'
         except UserWarning:
+            trace_status = 'cancelled'
             self.is_locked = False
             self.gui.after(100, Events.Fire, Events.Application.Ready())
             return
@@ -708,12 +825,15 @@ class Application:
                 importer=Config.Launcher.active_importer,
             ))
         finally:
+            Tracer.finish_trace(Paths.App.Resources / 'Logs' / 'Traces', Paths.App.Resources / 'Logs' / 'Launch Stats.json',
+                                status=trace_status, importer=Config.Launcher.active_importer)
             self.is_locked = False
             if not Config.Launcher.auto_close:
                 self.gui.after(100, Events.Fire, Events.Application.Ready())
 
         # Track launch stats
         Config.Active.Importer.launch_count += 1
+        self.game_launched = True
 
         # Close the launcher or reset its UI state
         if Config.Launcher.auto_close or self.args.nogui:
@@ -781,6 +901,21 @@ class Application:
             assert current_thread() is main_thread()
         except Exception as e:
             self.error_queue.put_nowait((e, traceback.format_exc()))
+        # Write config to ini file before waiting for anything, as watchdog may have to shut down stuck process
+        logging.debug(f'Saving config...')
+        try:
+            Config.Config.save()
+        except Exception as e:
+            self.error_queue.put_nowait((e, traceback.format_exc()))
+        # Let background update staging finish while the game is running, otherwise there's no reason to wait
+        if hasattr(self, 'package_manager'):
+            if self.game_launched:
+                logging.debug(f'Waiting for update staging...')
+                if not self.package_manager.wait_staging(timeout=self.staging_exit_timeout):
+                    logging.debug(f'Update staging timed out, it will be restarted on the next launcher start')
+                    self.package_manager.cancel_staging()
+            else:
+                self.package_manager.cancel_staging()
         # Start watchdog to forcefully shutdown process in 5 seconds
         watchdog_thread = Thread(target=self.watchdog, kwargs={'timeout': 5})
         watchdog_thread.start()
@@ -792,7 +927,7 @@ class Application:
         logging.debug(f'Joining watchdog thread...')
         self.is_alive = False
         watchdog_thread.join()
-        # Write config to ini file
+        # Write config changes made by joined threads
         logging.debug(f'Saving config...')
         Config.Config.save()
         # Report any errors left in queue
@@ -802,7 +937,9 @@ class Application:
             except Empty:
                 break
         logging.debug(f'App Exit')
-        os._exit(os.EX_OK)
+        # Flush queued log records, as os._exit skips atexit handlers
+        LogRotation.shutdown()
+        os._exit(self.exit_code)
 
     def restart(self, delay: int = 0):
         if '__compiled__' in globals() or getattr(sys, 'frozen', False):
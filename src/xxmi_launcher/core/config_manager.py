@@ -1,18 +1,19 @@
 import os
 import logging
 import json
+import time
+import threading
 
 from pathlib import Path
 from dataclasses import dataclass, field, fields
-from typing import Union, Dict, Any, Optional, List
-
-from dacite import from_dict
+from typing import Union, Dict, Any, Optional, List, Tuple
 
 import core.path_manager as Paths
 import core.event_manager as Events
 
 from core.locale_manager import L
 from core.utils.security import Security
+from core.utils.dataclass_loader import DataclassLoader
 from core import package_manager
 from core.packages import launcher_package
 from core.packages.model_importers import gimi_package
@@ -62,6 +63,14 @@ class AppConfig:
 
     def __post_init__(self):
         self.active_theme = 'Default'
+        # Persistence state (not a dataclass field, so it's never serialized or overwritten on load)
+        # Snapshot of config as it was last read from or written to the file, used to skip unchanged saves
+        self.saved_state: Optional[Dict[str, Any]] = None
+        self.save_lock = threading.Lock()
+        # Tk widget running debounced saves in its event loop, config objects are mutated by GUI thread without locks
+        self.save_scheduler: Optional[Any] = None
+        # Incremented by every save request, scheduled save runs only if it wasn't superseded by a later one
+        self.save_generation: int = 0
 
     @property
     def theme_path(self) -> Path:
@@ -119,14 +128,20 @@ class AppConfig:
         return json.dumps(cfg, indent=4)
 
     def from_json(self, config_path: Path):
-        cfg = self.as_dict(self)
+        start_time = time.perf_counter()
+        # Sections missing from the file keep their current state
+        cfg = {config_field.name: getattr(self, config_field.name) for config_field in fields(AppConfig) if config_field.init}
+        saved_state = None
         if config_path.is_file():
-            cfg.update(json.loads(Paths.App.read_text(config_path)))
-        for key, value in from_dict(data_class=AppConfig, data=cfg).__dict__.items():
-            if hasattr(self, key):
-                setattr(self, key, value)
+            saved_state = json.loads(Paths.App.read_text(config_path))
+            cfg.update(saved_state)
+        new_config = config_loader.load(AppConfig, cfg)
+        for config_field in fields(AppConfig):
+            setattr(self, config_field.name, getattr(new_config, config_field.name))
         if self.Launcher.gui_theme:
             self.active_theme = self.Launcher.gui_theme
+        self.saved_state = saved_state
+        log.debug(f'Loaded config from {config_path} in {time.perf_counter() - start_time:.4f}s')
 
     def load(self, cfg_path=None):
         try:
@@ -142,8 +157,39 @@ class AppConfig:
             global Importers
             Importers = self.Importers
 
-    def save(self):
-        Paths.App.write_file(self.config_path, Config.as_json())
+    def save(self, force: bool = False):
+        """
+        Writes config to the file if it differs from the last loaded or saved state
+        Cancels pending scheduled save, as it's superseded by this one
+        """
+        with self.save_lock:
+            self.save_generation += 1
+            cfg = self.as_dict(self)
+            if not force and cfg == self.saved_state:
+                log.debug(f'Skipped saving of unchanged config')
+                return
+            Paths.App.write_file(self.config_path, json.dumps(cfg, indent=4))
+            self.saved_state = cfg
+
+    def schedule_save(self, delay: float = 1.0):
+        """
+        Debounced save, coalesces bursts of save requests into single write after `delay` seconds of quiet
+        Must be called from GUI thread, save is run by its event loop, so config isn't read while GUI modifies it
+        """
+        if self.save_scheduler is None:
+            # There's no event loop to run delayed save (i.e. GUI is closed)
+            self.save()
+            return
+        with self.save_lock:
+            self.save_generation += 1
+            generation = self.save_generation
+        self.save_scheduler.after(int(delay * 1000), self.run_scheduled_save, generation)
+
+    def run_scheduled_save(self, generation: int):
+        with self.save_lock:
+            if generation != self.save_generation:
+                return
+        self.save()
 
     def run_patch_195(self):
         importer = self.Importers.__dict__['WWMI']
@@ -214,11 +260,14 @@ class AppConfig:
 class AppConfigSecurity:
     def __init__(self):
         self.security = None
+        # Verified or signed settings: (importer, signature field) -> (signed data, signature)
+        self.signed_settings: Dict[Tuple[str, str], Tuple[bytes, str]] = {}
 
     def load(self, save_config: bool = True):
         global Config
 
         self.security = Security()
+        self.signed_settings = {}
 
         keys_path = Paths.App.Resources / 'Security'
         Paths.verify_path(keys_path)
@@ -255,23 +304,23 @@ class AppConfigSecurity:
         wrong_signatures = {}
 
         if Config.Active.Migoto.unsafe_mode:
-            if not self.security.verify(Config.Active.Migoto.unsafe_mode_signature, os.getlogin().encode()):
+            if not self.verify_setting(Config.Active.Migoto, 'unsafe_mode_signature', os.getlogin().encode()):
                 wrong_signatures['Unsafe Mode'] = 'Enabled'
 
         if Config.Active.Importer.run_pre_launch:
-            if not self.security.verify(Config.Active.Importer.run_pre_launch_signature, Config.Active.Importer.run_pre_launch.encode()):
+            if not self.verify_setting(Config.Active.Importer, 'run_pre_launch_signature', Config.Active.Importer.run_pre_launch.encode()):
                 wrong_signatures['Run Pre Launch'] = Config.Active.Importer.run_pre_launch
 
         if Config.Active.Importer.custom_launch:
-            if not self.security.verify(Config.Active.Importer.custom_launch_signature, Config.Active.Importer.custom_launch.encode()):
+            if not self.verify_setting(Config.Active.Importer, 'custom_launch_signature', Config.Active.Importer.custom_launch.encode()):
                 wrong_signatures['Custom Launch'] = Config.Active.Importer.custom_launch
 
         if Config.Active.Importer.run_post_load:
-            if not self.security.verify(Config.Active.Importer.run_post_load_signature, Config.Active.Importer.run_post_load.encode()):
+            if not self.verify_setting(Config.Active.Importer, 'run_post_load_signature', Config.Active.Importer.run_post_load.encode()):
                 wrong_signatures['Run Post Load'] = Config.Active.Importer.run_post_load
 
         if Config.Active.Importer.extra_libraries:
-            if not self.security.verify(Config.Active.Importer.extra_libraries_signature, Config.Active.Importer.extra_libraries.encode()):
+            if not self.verify_setting(Config.Active.Importer, 'extra_libraries_signature', Config.Active.Importer.extra_libraries.encode()):
                 wrong_signatures['Extra Libraries'] = Config.Active.Importer.extra_libraries
 
         if len(wrong_signatures) > 0:
@@ -303,22 +352,45 @@ class AppConfigSecurity:
     def sign_settings(self, save_config: bool = True):
         global Active
         global Config
-        if self.security is None:
-            self.load(save_config=False)
         if Active.Migoto.unsafe_mode:
-            Active.Migoto.unsafe_mode_signature = self.security.sign(os.getlogin().encode())
+            self.sign_setting(Active.Migoto, 'unsafe_mode_signature', os.getlogin().encode())
         if Active.Importer.run_pre_launch:
-            Active.Importer.run_pre_launch_signature = self.security.sign(Active.Importer.run_pre_launch.encode())
+            self.sign_setting(Active.Importer, 'run_pre_launch_signature', Active.Importer.run_pre_launch.encode())
         if Active.Importer.custom_launch:
-            Active.Importer.custom_launch_signature = self.security.sign(Active.Importer.custom_launch.encode())
+            self.sign_setting(Active.Importer, 'custom_launch_signature', Active.Importer.custom_launch.encode())
         if Active.Importer.run_post_load:
-            Active.Importer.run_post_load_signature = self.security.sign(Active.Importer.run_post_load.encode())
+            self.sign_setting(Active.Importer, 'run_post_load_signature', Active.Importer.run_post_load.encode())
         if Active.Importer.extra_libraries:
-            Active.Importer.extra_libraries_signature = self.security.sign(Active.Importer.extra_libraries.encode())
+            self.sign_setting(Active.Importer, 'extra_libraries_signature', Active.Importer.extra_libraries.encode())
         if save_config:
             Config.save()
 
-
+    def sign_setting(self, settings, signature_field: str, data: bytes):
+        """
+        Signs setting data, signing is skipped if neither data nor its signature changed since last sign or verify
+        """
+        key = (Config.Launcher.active_importer, signature_field)
+        signature = getattr(settings, signature_field)
+        if self.signed_settings.get(key, None) == (data, signature):
+            return
+        if self.security is None:
+            self.load(save_config=False)
+        signature = self.security.sign(data)
+        setattr(settings, signature_field, signature)
+        self.signed_settings[key] = (data, signature)
+
+    def verify_setting(self, settings, signature_field: str, data: bytes) -> bool:
+        key = (Config.Launcher.active_importer, signature_field)
+        signature = getattr(settings, signature_field)
+        if self.signed_settings.get(key, None) == (data, signature):
+            return True
+        if not self.security.verify(signature, data):
+            return False
+        self.signed_settings[key] = (data, signature)
+        return True
+
+
+config_loader: DataclassLoader = DataclassLoader()
 Config: AppConfig = AppConfig()
 ConfigSecurity: AppConfigSecurity = AppConfigSecurity()
 
@@ -3,10 +3,15 @@ import tomllib
 import random
 import locale
 import re
+import os
+import json
+import time
+import threading
 
 from pathlib import Path
 from textwrap import dedent
-from typing import Optional, Union, List, Dict, BinaryIO
+from typing import Optional, Union, List, Dict, Tuple, BinaryIO
+from collections import Counter
 from dataclasses import dataclass
 
 log = logging.getLogger(__name__)
@@ -105,13 +110,33 @@ class LocaleString(str):
 
 
 class LocaleEngine:
-    def __init__(self, locales_path: Path):
+    # Compiled locale bundle format version, bump on any change of bundle layout or string validation rules
+    cache_version = 2
+
+    def __init__(self, locales_path: Path, cache_path: Optional[Path] = None, lazy: bool = False):
         self.locales_path: Path = locales_path
+        self.cache_path: Optional[Path] = cache_path
+        # Lazy mode reads only key index of compiled bundle and materializes strings on first request
+        self.lazy: bool = lazy
 
         self.strings: Optional[Dict[str, Union[str, List[str]]]] = None
         self.src_strings: Optional[Dict[str, str]] = None
         self.locale_errors: list[str] = []
 
+        # Lazy mode state: key -> [offset, length] of not yet materialized bundle records
+        self.bundle_index: Dict[str, List[int]] = {}
+        self.bundle_path: Optional[Path] = None
+        self.bundle_data_offset: int = 0
+        self.bundle_mtime: int = 0
+        self.bundle_lock = threading.Lock()
+        self.locale_sources: Dict[Path, List[int]] = {}
+        self.locale_tag: str = 'loc'
+
+        # Resolution cache: key -> (default string as passed by caller, resolved string or list of alt variants)
+        self.resolved_strings: Dict[str, Tuple[str, Union[str, List[str]]]] = {}
+        # Profiling counters: key -> number of get_string calls
+        self.resolve_counters: Counter = Counter()
+
         self.var_pattern = re.compile(r"(?<!\{)\{([^{}]+)\}(?!\})")
         self.md_link_pattern = re.compile(r'\]\(([^)]+)\)')
         self.html_link_pattern = re.compile(r'\b(?:href|src)\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
@@ -122,6 +147,8 @@ class LocaleEngine:
         self.strings = {}
         self.src_strings = {}
         self.locale_errors = []
+        self.resolved_strings = {}
+        self.bundle_index = {}
 
         # if locale_name == 'EN':
         #     self.enable_locale = False
@@ -129,40 +156,179 @@ class LocaleEngine:
 
         locale_path = self.locales_path / locale_name
 
+        start_time = time.perf_counter()
+
         try:
-            for path in sorted(locale_path.iterdir()):
-                if not path.is_file() or not path.suffix == '.toml':
-                    continue
-                self.load_file_strings(path, tag)
+            sources = self.get_locale_sources(locale_path)
+            self.locale_sources, self.locale_tag = sources, tag
+            cache_hit = self.load_locale_cache(locale_name, tag, sources)
+            if not cache_hit:
+                self.load_source_strings(sources, tag)
+                self.write_locale_cache(locale_name, tag, sources)
         except Exception as e:
             self.enable_locale = False
             raise Exception(f'Failed to load locale: {e}')
 
+        if self.bundle_index:
+            log.debug(f'Indexed {len(self.bundle_index)} strings of {locale_name} locale in {time.perf_counter() - start_time:.4f}s')
+        else:
+            log.debug(f'Loaded {locale_name} locale {"from cache " if cache_hit else ""}in {time.perf_counter() - start_time:.4f}s')
+
         self.enable_locale = True
 
+    def load_source_strings(self, sources: Dict[Path, List[int]], tag: str):
+        for path in sources.keys():
+            self.load_file_strings(path, tag)
+
+    @staticmethod
+    def get_locale_sources(locale_path: Path) -> Dict[Path, List[int]]:
+        sources = {}
+        for path in sorted(locale_path.iterdir()):
+            if not path.is_file() or not path.suffix == '.toml':
+                continue
+            stat = path.stat()
+            sources[path] = [stat.st_mtime_ns, stat.st_size]
+        return sources
+
+    def get_locale_cache_path(self, locale_name: str, tag: str) -> Optional[Path]:
+        if self.cache_path is None:
+            return None
+        return self.cache_path / f'{locale_name}.{tag}.bundle'
+
+    def load_locale_cache(self, locale_name: str, tag: str, sources: Dict[Path, List[int]]) -> bool:
+        """
+        Loads compiled locale bundle, bundle is valid only if all source files are unchanged
+        Bundle layout: JSON header line with key index, followed by JSON array of [loc, src] records
+        """
+        cache_path = self.get_locale_cache_path(locale_name, tag)
+        if cache_path is None or not cache_path.is_file():
+            return False
+        try:
+            with open(cache_path, 'rb') as f:
+                header = json.loads(f.readline())
+                if header.get('version', None) != self.cache_version:
+                    return False
+                if header.get('sources', None) != {path.name: stat for path, stat in sources.items()}:
+                    return False
+                self.locale_errors = header['locale_errors']
+                index = header['index']
+                if self.lazy:
+                    self.bundle_index = index
+                    self.bundle_path = cache_path
+                    self.bundle_data_offset = f.tell()
+                    self.bundle_mtime = os.fstat(f.fileno()).st_mtime_ns
+                else:
+                    records = json.loads(f.read())
+                    for key, (loc_string, src_string) in zip(index.keys(), records):
+                        self.add_string(key, loc_string, src_string)
+        except Exception as e:
+            log.debug(f'Failed to load compiled {locale_name} locale from {cache_path}: {e}')
+            self.strings, self.src_strings, self.locale_errors, self.bundle_index = {}, {}, [], {}
+            return False
+        for locale_error in self.locale_errors:
+            log.error(f'Malformed locale string: {locale_error}')
+        return True
+
+    def write_locale_cache(self, locale_name: str, tag: str, sources: Dict[Path, List[int]]):
+        cache_path = self.get_locale_cache_path(locale_name, tag)
+        if cache_path is None:
+            return
+        index, records, offset = {}, [], 1
+        for key, loc_string in self.strings.items():
+            record = json.dumps([loc_string, self.src_strings.get(key, None)],
+                                ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            index[key] = [offset, len(record)]
+            records.append(record)
+            offset += len(record) + 1
+        header = {
+            'version': self.cache_version,
+            'sources': {path.name: stat for path, stat in sources.items()},
+            'locale_errors': self.locale_errors,
+            'index': index,
+        }
+        tmp_path = cache_path.with_suffix('.tmp')
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                f.write(b'\n[' + b','.join(records) + b']')
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            log.debug(f'Failed to write compiled {locale_name} locale to {cache_path}: {e}')
+
+    def add_string(self, key: str, loc_string: Union[str, List[str]], src_string: Optional[str]):
+        self.strings[key] = loc_string
+        if src_string is not None:
+            self.src_strings[key] = src_string
+
+    def materialize_string(self, key: str):
+        """
+        Reads single string record from compiled bundle indexed in lazy mode
+        Falls back to full load from source files if bundle was modified or became unreadable
+        """
+        with self.bundle_lock:
+            record = self.bundle_index.pop(key, None)
+            if record is None:
+                return
+            offset, length = record
+            try:
+                with open(self.bundle_path, 'rb') as f:
+                    if os.fstat(f.fileno()).st_mtime_ns != self.bundle_mtime:
+                        raise ValueError('bundle was modified')
+                    f.seek(self.bundle_data_offset + offset)
+                    loc_string, src_string = json.loads(f.read(length))
+                self.add_string(key, loc_string, src_string)
+            except Exception as e:
+                log.debug(f'Failed to read `{key}` string from compiled locale {self.bundle_path}: {e}')
+                self.bundle_index = {}
+                self.strings, self.src_strings, self.locale_errors = {}, {}, []
+                self.load_source_strings(self.locale_sources, self.locale_tag)
+
     def extract_vars(self, s: str) -> list[str]:
         return self.var_pattern.findall(s)
 
     def get_string(self, key: str, string: str) -> str:
+        self.resolve_counters[key] += 1
+        cached_string = self.resolved_strings.get(key, None)
+        if cached_string is not None and cached_string[0] == string:
+            resolved_string = cached_string[1]
+        else:
+            resolved_string = self.resolve_string(key, string)
+            self.resolved_strings[key] = (string, resolved_string)
+        # Alt variants are cached as list, so each call still gets its own random pick
+        if isinstance(resolved_string, list):
+            return random.choice(resolved_string)
+        return resolved_string
+
+    def resolve_string(self, key: str, string: str) -> Union[str, List[str]]:
         string = dedent(string)
         if string.startswith('\n'):
             string = string[1:]
         if string.endswith('\n'):
             string = string[:-1]
         if self.enable_locale:
-            string = self.translate(key, string)
+            return self.resolve_translation(key, string)
         return string
 
     def translate(self, key: str, string: str) -> str:
+        locale_string = self.resolve_translation(key, string)
+        if isinstance(locale_string, list):
+            locale_string = random.choice(locale_string)
+        return locale_string
+
+    def resolve_translation(self, key: str, string: str) -> Union[str, List[str]]:
+        if key in self.bundle_index:
+            self.materialize_string(key)
         locale_string = self.strings.get(key, None)
         if locale_string is None:
             locale_string = string
         elif string.strip() != self.src_strings.get(key, ''):
             locale_string = string
-        elif isinstance(locale_string, list):
-            locale_string = random.choice(locale_string)
         return locale_string
 
+    def get_resolve_stats(self, top: Optional[int] = None) -> List[Tuple[str, int]]:
+        return self.resolve_counters.most_common(top)
+
     def load_file_strings(self, path: Path, tag: str = 'loc'):
         with open(path, 'rb') as f:
             data = tomllib.load(f)
@@ -217,10 +383,9 @@ class LocaleEngine:
                     loc_string = [loc_string] + alt_strings
 
                 if tag == 'loc':
-                    self.strings[key] = loc_string
-                    self.src_strings[key] = src_string.strip()
+                    self.add_string(key, loc_string, src_string.strip())
                 else:
-                    self.strings[key] = src_string
+                    self.add_string(key, src_string, None)
 
 
 @dataclass
@@ -293,8 +458,8 @@ class LocaleManager:
     def get_indexed_locales(self) -> List[LocaleData]:
         return self.locale_index.get_locales()
 
-    def initialize(self, root_path: Path):
-        self.set_root_path(root_path)
+    def initialize(self, root_path: Path, lazy: bool = False):
+        self.set_root_path(root_path, lazy=lazy)
         self.load_locale_index()
         self.active_locale = self.locale_index.get_locale('EN')
         detected_locale = self.auto_detect_locale()
@@ -312,9 +477,11 @@ class LocaleManager:
         # Fallback to default EN locale
         return self.locale_index.get_default_locale()
 
-    def set_root_path(self, root_path: Path):
+    def set_root_path(self, root_path: Path, lazy: bool = False):
         self.package_path = root_path / 'Locale'
-        self.locale_engine = LocaleEngine(self.package_path / 'Strings')
+        # Path manager isn't initialized yet, so cache path is resolved from root directly
+        self.locale_engine = LocaleEngine(self.package_path / 'Strings', root_path / 'Resources' / 'Cache' / 'Locale',
+                                          lazy=lazy)
 
     def load_locale_index(self):
         config_path = self.package_path / 'locale_index.toml'
@@ -377,5 +544,5 @@ Locale = LocaleManager()
 L = Locale.get_string
 
 
-def initialize(root_path: Path):
-    Locale.initialize(root_path)
+def initialize(root_path: Path, lazy: bool = False):
+    Locale.initialize(root_path, lazy=lazy)
@@ -4,11 +4,13 @@ import json
 import fnmatch
 import re
 import os
+import time
 
 from pathlib import Path
 from dataclasses import dataclass, field
 from enum import Enum, auto
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 import core.path_manager as Paths
 import core.event_manager as Events
@@ -31,6 +33,7 @@ class IssueType(Enum):
     UnwantedFile = 'UnwantedFile'
     UnwantedTrigger = 'UnwantedTrigger'
     GlobalTrigger = 'GlobalTrigger'
+    DuplicateLibrary = 'DuplicateLibrary'
 
 
 @dataclass(frozen=True)
@@ -117,6 +120,8 @@ class IniValidator:
     new_cache: bool = False,
     # Cache path (default it is folder_path/ini_validator_cache.json)
     cache_path: Path | None = None
+    # Number of threads reading and validating ini files
+    workers: int = 1
 
     cache: IniValidatorCache | None = field(init=False, default=None)
 
@@ -135,6 +140,7 @@ class IniValidator:
         self.load_cache()
 
         validation_results = {}
+        pending_paths = []
 
         unwanted_files = self.unwanted_files.get('*', [])
 
@@ -160,20 +166,32 @@ class IniValidator:
                 self.add_path_to_cache(path)
                 continue
 
-            # Read ini and analyze its behavior
-            try:
-                ini_lines = Paths.App.read_text(path).splitlines()
-                validation_result, parsed_ini = self.validate_ini(ini_lines)
-                if validation_result.file_issue or validation_result.line_issues:
-                    validation_results[path] = (validation_result, parsed_ini)
-            except Exception:
-                log.exception(f'Failed to validate {path}')
-            finally:
-                # Update cache with current modification time
-                self.add_path_to_cache(path)
+            pending_paths.append(path)
+
+        # Read ini files and analyze their behavior
+        if self.workers > 1 and len(pending_paths) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(self.validate_path, pending_paths))
+        else:
+            results = map(self.validate_path, pending_paths)
+
+        for path, (validation_result, parsed_ini) in zip(pending_paths, results):
+            if validation_result is not None and (validation_result.file_issue or validation_result.line_issues):
+                validation_results[path] = (validation_result, parsed_ini)
 
         return validation_results
 
+    def validate_path(self, path: Path) -> tuple[ValidationResult | None, ParsedIni | None]:
+        try:
+            ini_lines = Paths.App.read_text(path).splitlines()
+            return self.validate_ini(ini_lines)
+        except Exception:
+            log.exception(f'Failed to validate {path}')
+            return None, None
+        finally:
+            # Update cache with current modification time
+            self.add_path_to_cache(path)
+
     def validate_ini(self, ini_lines: list[str]) -> tuple[ValidationResult, ParsedIni | None]:
 
         # Run basic validation pass (which doesn't involve section references handling)
@@ -359,11 +377,51 @@ class OptimizationResults:
     disabled_files_count: int = 0
     edited_files_count: int = 0
     edited_lines_count: int = 0
+    # Detected issues and taken (or planned for dry run) actions, used for machine-readable reports
+    issues: list[dict] = field(default_factory=list)
+    actions: list[dict] = field(default_factory=list)
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class OptimizationPolicy:
+    """
+    Predefined answers to optimization prompts, allows to run optimization without GUI
+    """
+    # `disable` or `abort`
+    rogue_ini: str = 'abort'
+    # `disable`, `ignore` or `skip` (keep files out of the cache, so they're reported again next time)
+    global_triggers: str = 'skip'
+    # `disable` or `ignore`
+    duplicate_libraries: str = 'ignore'
 
 
 class ModManager:
     ini_validator: IniValidator | None
 
+    def __init__(self, policy: OptimizationPolicy | None = None, workers: int = 1):
+        # User is asked via modal messages unless policy is set
+        self.policy = policy
+        self.workers = workers
+        self.issues: list[dict] = []
+        self.actions: list[dict] = []
+
+    def add_issues(self, root_path: Path, ini_path: Path, validation_result: ValidationResult):
+        path = str(ini_path.relative_to(root_path.parent))
+        if validation_result.file_issue:
+            self.issues.append({'path': path, 'type': validation_result.file_issue.type.value,
+                                'reason': validation_result.file_issue.reason})
+        for issue in validation_result.line_issues.values():
+            self.issues.append({'path': path, 'line': issue.line_id + 1, 'type': issue.type.value, 'reason': issue.reason})
+
+    def add_action(self, action: str, root_path: Path, path: Path, **kwargs):
+        self.actions.append({'action': action, 'path': str(path.relative_to(root_path.parent)), **kwargs})
+
+    def get_results(self, start_time: float, **kwargs) -> OptimizationResults:
+        results = OptimizationResults(**kwargs, issues=self.issues, actions=self.actions)
+        results.timings['total'] = time.perf_counter() - start_time
+        return results
+
     def optimize_shaderfixes_folder(
             self,
             shaderfixes_path: Path,
@@ -371,16 +429,20 @@ class ModManager:
             dry_run: bool = True,
     ) -> OptimizationResults:
         dry_prefix = '[DRY]: ' if dry_run else ''
+        start_time = time.perf_counter()
+        self.issues, self.actions = [], []
 
         Paths.verify_path(shaderfixes_path)
 
-        self.ini_validator = IniValidator(folder_path=shaderfixes_path, exclude_patterns=exclude_patterns)
+        self.ini_validator = IniValidator(folder_path=shaderfixes_path, exclude_patterns=exclude_patterns, workers=self.workers)
         self.ini_validator.unwanted_files = {'*': {'3dvision2sbs.ini', 'help.ini', 'mouse.ini', 'upscale.ini'}}
 
         validation_results = self.ini_validator.validate_folder()
+        validation_time = time.perf_counter() - start_time
 
         disabled_files_count = 0
         for ini_path, (validation_result, parsed_ini) in validation_results.items():
+            self.add_issues(shaderfixes_path, ini_path, validation_result)
             # Handle global ini issue
             if validation_result.file_issue:
                 if validation_result.file_issue.type == IssueType.UnwantedFile:
@@ -388,10 +450,13 @@ class ModManager:
                     if not dry_run:
                         self.disable_ini(ini_path)
                     disabled_files_count += 1
+                    self.add_action('disable_ini', shaderfixes_path, ini_path, reason='unwanted file')
                     log.info(f'{dry_prefix}Disabled {ini_path.relative_to(shaderfixes_path.parent)} (reason: unwanted file)')
                 continue
 
-        return OptimizationResults(disabled_files_count=disabled_files_count)
+        results = self.get_results(start_time, disabled_files_count=disabled_files_count)
+        results.timings['validation'] = validation_time
+        return results
 
     def optimize_mods_folder(
             self,
@@ -412,6 +477,8 @@ class ModManager:
         4. Comment out all ShaderRegex sections running global CheckTextureOverride (FPS killers).
         """
         dry_prefix = '[DRY]: ' if dry_run else ''
+        start_time = time.perf_counter()
+        self.issues, self.actions = [], []
 
         Paths.verify_path(mods_path)
 
@@ -422,9 +489,10 @@ class ModManager:
         self.ini_validator = IniValidator(
             folder_path=mods_path,
             exclude_patterns=exclude_patterns,
-            use_cache=True,
+            use_cache=use_cache,
             new_cache=reset_cache,
-            cache_path=cache_path
+            cache_path=cache_path,
+            workers=self.workers,
         )
 
         self.ini_validator.d3dx_ini_keywords = {'[loader', '[system', '[stereo', '[commandlistunbindallrendertargets'}
@@ -440,7 +508,9 @@ class ModManager:
         if Config.Launcher.active_importer == 'EFMI':
             self.ini_validator.unwanted_files['*'] = {'vscheck.ini'}
 
+        validation_start_time = time.perf_counter()
         validation_results = self.ini_validator.validate_folder()
+        validation_time = time.perf_counter() - validation_start_time
 
         rogue_ini_issues = {}
         global_trigger_results = {}
@@ -450,6 +520,7 @@ class ModManager:
         edited_ini_count = 0
         edited_lines_count = 0
         for ini_path, (validation_result, parsed_ini) in validation_results.items():
+            self.add_issues(mods_path, ini_path, validation_result)
 
             # Handle global ini issue
             if validation_result.file_issue:
@@ -503,6 +574,7 @@ class ModManager:
         for ini_path, file_issue in pending_ini_disables.items():
             if not dry_run:
                 self.disable_ini(ini_path)
+            self.add_action('disable_ini', mods_path, ini_path, reason=file_issue.reason)
             log.info(f'{dry_prefix}Disabled {ini_path.relative_to(mods_path.parent)} (reason: {file_issue.reason})')
             continue
 
@@ -520,23 +592,30 @@ class ModManager:
                 # Disable mods from the list
                 for mod in pending_mod_disables:
                     mod.disable(reason='user choice', dry_run=dry_run)
+                    self.add_action('disable_mod', mods_path, mod.path, reason='global triggers')
                 disabled_mods_count = len(pending_mod_disables)
             # User selected "Ignore"
             else:
                 # No further action required, paths are cached and won't be processed again unless files change
                 pass
 
-        if use_cache:
+        if use_cache and not dry_run:
             self.ini_validator.save_cache()
 
-        return OptimizationResults(
+        results = self.get_results(
+            start_time,
             disabled_files_count=len(pending_ini_disables),
             disabled_mods_count=disabled_mods_count,
             edited_files_count=edited_ini_count,
             edited_lines_count=edited_lines_count,
         )
+        results.timings['validation'] = validation_time
+        return results
 
     def show_rogue_ini_notification(self, rogue_ini_issues: dict[Path, Issue], mods_path: Path) -> bool:
+        if self.policy is not None:
+            return self.policy.rogue_ini == 'disable'
+
         ini_paths = {ini_path: ini_path.relative_to(mods_path.parent) for ini_path in rogue_ini_issues.keys()}
         mod_list = self.build_mod_list(list(ini_paths.values()), mods_path)
 
@@ -615,6 +694,10 @@ class ModManager:
 
         trigger_counts = dict(sorted(trigger_counts.items(), key=lambda x: x[1], reverse=True))
 
+        if self.policy is not None:
+            user_response = {'disable': True, 'ignore': False}.get(self.policy.global_triggers, None)
+            return user_response, list(trigger_counts.keys()) if user_response else []
+
         checkbox_options = []
         for mod, triggers_count in trigger_counts.items():
             txt = f'{mod.name}: {get_impact_text(triggers_count)} <span class="gray">({mod.path.relative_to(mods_path.parent)})</span>'
@@ -666,6 +749,7 @@ class ModManager:
                 fixed_line = ';' + line.strip()
             log.info(f'    - Line #{issue.line_id+1} `{line.strip()}` with `{fixed_line}` (reason: {issue.reason})')
             parsed_ini.ini_lines[issue.line_id] = indent + fixed_line
+        self.add_action('edit_ini', mods_path, ini_path, lines=[issue.line_id + 1 for issue in line_issues])
         # Write ini with commented ini lines with issues
         if not dry_run:
             self.make_backup(ini_path)
@@ -696,6 +780,10 @@ class ModManager:
         if len(duplicate_ini_paths) == 0:
             return
 
+        for ini_path in duplicate_ini_paths:
+            self.issues.append({'path': str(ini_path.relative_to(mods_path.parent)), 'type': IssueType.DuplicateLibrary.value,
+                                'reason': 'namespace is already included into importer libraries'})
+
         user_requested_disable = self.show_duplicate_libraries_notification(duplicate_ini_paths, mods_path)
 
         if not user_requested_disable:
@@ -704,12 +792,15 @@ class ModManager:
         for ini_path in duplicate_ini_paths:
             if not dry_run:
                 self.disable_ini(ini_path)
+            self.add_action('disable_ini', mods_path, ini_path, reason='duplicate library')
 
     def show_duplicate_libraries_notification(
         self,
         duplicate_ini_paths: list[Path],
         mods_path: Path,
     ) -> bool | None:
+        if self.policy is not None:
+            return self.policy.duplicate_libraries == 'disable'
 
         user_response = Events.Call(Events.Application.ShowError(
             modal=True,
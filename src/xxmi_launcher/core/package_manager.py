@@ -5,10 +5,13 @@ import re
 import zipfile
 import os
 import json
+import struct
+import hashlib
 
 from dataclasses import dataclass, field, asdict
 from typing import Union, List, Dict, Optional, Tuple
 from pathlib import Path
+from threading import Lock, Event
 from dacite import from_dict
 from win32api import GetFileVersionInfo, HIWORD, LOWORD
 
@@ -19,7 +22,7 @@ import core.config_manager as Config
 
 from core.locale_manager import L
 from core.utils.security import Security
-from core.utils.github_client import GitHubClient
+from core.utils.github_client import GitHubClient, ResponseRelease, ResponseReleaseAsset
 
 log = logging.getLogger(__name__)
 
@@ -50,22 +53,69 @@ class PackageConfig:
     deployed_release_notes: str = ''
 
 
+@dataclass
+class ManifestFile:
+    sha256: str = ''
+    size: int = 0
+
+
 @dataclass
 class Manifest:
     version: str = ''
     signatures: Dict[str, str] = field(default_factory=lambda: {})
+    # Per-file digests of package contents (paths are relative to the root of release zip)
+    files: Dict[str, ManifestFile] = field(default_factory=lambda: {})
+    # Signature of `files_as_json` output, protects digests from tampering
+    files_signature: str = ''
 
     def as_json(self):
         return json.dumps(asdict(self), indent=4)
 
+    def files_as_json(self):
+        files = {path: asdict(manifest_file) for path, manifest_file in self.files.items()}
+        return json.dumps(files, sort_keys=True, separators=(',', ':'))
+
+    def add_files_from_zip(self, zip_path: Path):
+        """
+        Records digests of all files stored in release zip
+        """
+        with zipfile.ZipFile(zip_path, 'r') as zip:
+            for zip_info in zip.infolist():
+                if zip_info.is_dir():
+                    continue
+                sha256 = hashlib.sha256()
+                with zip.open(zip_info) as f:
+                    while chunk := f.read(Paths.App.CHUNK_SIZE):
+                        sha256.update(chunk)
+                self.files[zip_info.filename] = ManifestFile(sha256=sha256.hexdigest(), size=zip_info.file_size)
+
+    def sign_files(self, security: Security):
+        """
+        Signs file digests with private key of release publisher, delta updates are only allowed for signed digests
+        """
+        self.files_signature = security.sign(self.files_as_json())
+
     def from_json(self, file_path: Path):
-        file_data = Paths.App.read_text(file_path)
-        for key, value in from_dict(data_class=Manifest, data=json.loads(file_data)).__dict__.items():
+        self.from_string(Paths.App.read_text(file_path))
+
+    def from_string(self, data: str):
+        for key, value in from_dict(data_class=Manifest, data=json.loads(data)).__dict__.items():
             if hasattr(self, key):
                 setattr(self, key, value)
 
 
+@dataclass
+class StagedRelease:
+    version: str = ''
+    signature: str = ''
+    asset_file_name: str = ''
+    has_manifest: bool = False
+
+
 class Package:
+    # Delta update is pointless when most of the package has changed, full zip download is faster then
+    delta_update_max_ratio = 0.5
+
     def __init__(self, metadata: PackageMetadata):
         self.metadata = metadata
         self.cfg: Union[PackageConfig, None] = None
@@ -82,6 +132,7 @@ class Package:
         self.signature: Union[str, None] = None
         self.manifest = None
         self.manifest_url: Optional[str] = None
+        self.release: Optional[ResponseRelease] = None
         self.download_in_progress = False
 
         self.package_path = Paths.App.Resources / 'Packages' / self.metadata.package_name
@@ -103,13 +154,19 @@ class Package:
             """).format(package_name=self.metadata.package_name, error_text=e)) from e
 
     def get_latest_version(self) -> Tuple[str, str, Union[str, None], str, str]:
-        version, url, signature, release_notes, manifest_url = self.manager.github_client.fetch_latest_release(
-            repo_owner=self.metadata.github_repo_owner,
-            repo_name=self.metadata.github_repo_name,
+        # Use release metadata prefetched by batched query if there's one
+        release = self.manager.prefetched_releases.pop(self.metadata.package_name, None)
+        if release is None:
+            release = self.manager.github_client.fetch_release(
+                repo_owner=self.metadata.github_repo_owner,
+                repo_name=self.metadata.github_repo_name,
+                pre_release=Config.Launcher.pre_release)
+        version, url, signature, release_notes, manifest_url = self.manager.github_client.parse_release(
+            release,
             asset_version_pattern=self.asset_version_pattern,
             asset_name_format=self.metadata.asset_name_format,
-            signature_pattern=self.signature_pattern,
-            pre_release=Config.Launcher.pre_release)
+            signature_pattern=self.signature_pattern)
+        self.release = release
         return version, url, signature, release_notes, manifest_url
 
     def detect_latest_version(self):
@@ -129,6 +186,12 @@ class Package:
         return self.cfg.latest_version != '' and self.cfg.latest_version != self.get_installed_version()
 
     def download_latest_version_data(self):
+        # Use data downloaded by background prefetch
+        staged_data = self.get_staged_data()
+        if staged_data is not None:
+            log.debug(f'Using staged {self.metadata.package_name} {self.cfg.latest_version} data')
+            return staged_data
+
         Events.Fire(Events.PackageManager.InitializeDownload())
 
         asset_file_name = self.metadata.asset_name_format % self.cfg.latest_version
@@ -152,6 +215,101 @@ class Package:
 
         return asset_file_name, data, manifest_data
 
+    def get_staging_path(self) -> Path:
+        return Paths.App.Resources / 'Cache' / 'Staging' / self.metadata.package_name
+
+    def load_staged_release(self) -> Optional[StagedRelease]:
+        staged_release_path = self.get_staging_path() / 'Staging.json'
+        if not staged_release_path.is_file():
+            return None
+        try:
+            staged_release = from_dict(data_class=StagedRelease, data=json.loads(Paths.App.read_text(staged_release_path)))
+        except Exception as e:
+            log.debug(f'Failed to load staged {self.metadata.package_name} release: {e}')
+            return None
+        if staged_release.version != self.cfg.latest_version or staged_release.signature != self.signature:
+            return None
+        return staged_release
+
+    def get_staged_data(self) -> Optional[Tuple[str, bytearray, Optional[bytearray]]]:
+        staged_release = self.load_staged_release()
+        if staged_release is None:
+            return None
+        staging_path = self.get_staging_path()
+        try:
+            data = bytearray(Paths.App.read_bytes(staging_path / staged_release.asset_file_name))
+            if not self.security.verify(self.signature, data):
+                raise ValueError(f'{staged_release.asset_file_name} signature is invalid!')
+            manifest_data = None
+            if staged_release.has_manifest:
+                manifest_data = bytearray(Paths.App.read_bytes(staging_path / 'Manifest.json'))
+        except Exception as e:
+            log.debug(f'Failed to load staged {self.metadata.package_name} data: {e}')
+            return None
+        return staged_release.asset_file_name, data, manifest_data
+
+    def stage_latest_version(self, bandwidth_limit: int = 0, cancel_event: Optional[Event] = None) -> bool:
+        """
+        Downloads and verifies the latest version into staging area, so the following update only has to install it
+        """
+        if self.load_staged_release() is not None:
+            return False
+
+        def check_cancel(downloaded_bytes, total_bytes):
+            if cancel_event is not None and cancel_event.is_set():
+                raise InterruptedError(f'{self.metadata.package_name} download canceled!')
+
+        asset_file_name = self.metadata.asset_name_format % self.cfg.latest_version
+
+        log.debug(f'Staging {self.metadata.package_name} {self.cfg.latest_version} (bandwidth limit: {bandwidth_limit} B/s)...')
+
+        data = self.manager.github_client.download_data(
+            self.download_url,
+            block_size=128*1024,
+            update_progress_callback=check_cancel,
+            bandwidth_limit=bandwidth_limit,
+        )
+
+        if not self.security.verify(self.signature, data):
+            raise ValueError(L('error_downloaded_data_verification_failed', """
+                Downloaded data integrity verification failed!
+                Please restart the launcher and try again!
+            """))
+
+        if self.manifest_url is None:
+            manifest_data = None
+        else:
+            manifest_data = self.manager.github_client.download_data(
+                self.manifest_url,
+                block_size=128,
+                update_progress_callback=check_cancel,
+                bandwidth_limit=bandwidth_limit,
+            )
+
+        staging_path = self.get_staging_path()
+        Paths.App.remove_path(staging_path, silent=True)
+        Paths.verify_path(staging_path)
+
+        Paths.App.write_file(staging_path / asset_file_name, data, silent=True)
+        if manifest_data is not None:
+            Paths.App.write_file(staging_path / 'Manifest.json', manifest_data, silent=True)
+
+        # Staging record goes last to mark staged data as complete
+        staged_release = StagedRelease(
+            version=self.cfg.latest_version,
+            signature=self.signature,
+            asset_file_name=asset_file_name,
+            has_manifest=manifest_data is not None,
+        )
+        Paths.App.write_file(staging_path / 'Staging.json', json.dumps(asdict(staged_release), indent=4), silent=True)
+
+        log.debug(f'Staged {self.metadata.package_name} {self.cfg.latest_version}')
+
+        return True
+
+    def clear_staged_data(self):
+        Paths.App.remove_path(self.get_staging_path(), silent=True)
+
     def notify_download_progress(self, downloaded_bytes, total_bytes):
         if not self.download_in_progress:
             Events.Fire(Events.PackageManager.StartDownload(
@@ -207,6 +365,9 @@ class Package:
 
         self.save_downloaded_data(asset_path, data)
 
+        if Config.Launcher.cache_packages:
+            self.cache_release(asset_file_name, data, manifest_data)
+
         if asset_path.suffix == '.zip':
             self.unpack(asset_path, tmp_path / self.metadata.deploy_name)
             self.downloaded_asset_path = tmp_path
@@ -225,6 +386,214 @@ class Package:
             # Make new manifest
             self.write_manifest(asset_path, self.cfg.latest_version, self.signature)
 
+    def get_deployment_path(self) -> Path:
+        return self.package_path
+
+    def get_file_digest(self, file_path: Path) -> str:
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            while chunk := f.read(Paths.App.CHUNK_SIZE):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def get_changed_files(self, manifest: Manifest) -> Dict[str, ManifestFile]:
+        deployment_path = self.get_deployment_path() / self.metadata.deploy_name
+        changed_files = {}
+        for file_name, manifest_file in manifest.files.items():
+            file_name_parts = Path(file_name).parts
+            if Path(file_name).is_absolute() or '..' in file_name_parts:
+                raise ValueError(f'Manifest contains forbidden path {file_name}!')
+            file_path = deployment_path.joinpath(*file_name_parts)
+            if file_path.is_file() and file_path.stat().st_size == manifest_file.size:
+                if self.get_file_digest(file_path) == manifest_file.sha256:
+                    continue
+            changed_files[file_name] = manifest_file
+        return changed_files
+
+    def download_latest_version_delta(self, clean=False) -> bool:
+        asset_file_name = self.metadata.asset_name_format % self.cfg.latest_version
+
+        # Delta update requires release zip and remote manifest with per-file digests
+        if clean or self.manifest_url is None or not asset_file_name.endswith('.zip'):
+            return False
+
+        # Package cache (mirror source) requires full release zip
+        if Config.Launcher.cache_packages:
+            return False
+
+        # Full release zip is already downloaded by background prefetch
+        if self.load_staged_release() is not None:
+            return False
+
+        try:
+            return self.download_changed_files()
+        except Exception as e:
+            self.download_in_progress = False
+            log.debug(f'Delta update of {self.metadata.package_name} failed, falling back to full download: {e}')
+            return False
+
+    def download_changed_files(self) -> bool:
+        self.downloaded_asset_path = None
+
+        manifest_data = self.manager.github_client.download_data(self.manifest_url, block_size=128)
+
+        manifest = Manifest()
+        manifest.from_string(manifest_data.decode('utf-8'))
+
+        if not manifest.files or not manifest.files_signature:
+            log.debug(f'Skipped delta update of {self.metadata.package_name}: manifest has no file digests')
+            return False
+
+        if not self.security.verify(manifest.files_signature, manifest.files_as_json()):
+            raise ValueError(f'Manifest file digests signature is invalid!')
+
+        changed_files = self.get_changed_files(manifest)
+
+        changed_size = sum(manifest_file.size for manifest_file in changed_files.values())
+        total_size = sum(manifest_file.size for manifest_file in manifest.files.values())
+        if changed_size > total_size * self.delta_update_max_ratio:
+            log.debug(f'Skipped delta update of {self.metadata.package_name}: {changed_size} of {total_size} bytes changed')
+            return False
+
+        if not self.is_delta_update_supported(manifest, changed_files):
+            log.debug(f'Skipped delta update of {self.metadata.package_name}: release requires full install')
+            return False
+
+        Events.Fire(Events.PackageManager.InitializeDownload())
+
+        tmp_path = self.package_path / 'TMP'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        Paths.verify_path(tmp_path)
+
+        deploy_path = tmp_path / self.metadata.deploy_name
+
+        downloaded_bytes = 0
+
+        if changed_files:
+            remote_file = self.manager.github_client.open_range_file(self.download_url)
+
+            with zipfile.ZipFile(remote_file, 'r') as zip:
+                zip_infos = {zip_info.filename: zip_info for zip_info in zip.infolist()}
+
+                for file_name in changed_files.keys():
+                    if file_name not in zip_infos:
+                        raise ValueError(f'Release zip is missing {file_name} listed in manifest!')
+
+                total_bytes = sum(zip_infos[file_name].compress_size for file_name in changed_files.keys())
+                self.notify_download_progress(downloaded_bytes, total_bytes)
+
+                for file_name, manifest_file in changed_files.items():
+                    zip_info = zip_infos[file_name]
+                    # Fetch local header and compressed data of zip member with a single range request
+                    # Local extra field usually matches the central one, so the estimate is exact most of the time
+                    data_end = (zip_info.header_offset + zipfile.sizeFileHeader + len(zip_info.orig_filename.encode('utf-8')) +
+                                len(zip_info.extra) + zip_info.compress_size)
+                    remote_file.prefetch(zip_info.header_offset, data_end - 1)
+                    # Fetch the rest of member data if local header turned out to be larger
+                    data_end = self.get_zip_member_end(remote_file, zip_info)
+                    remote_file.prefetch(zip_info.header_offset, data_end - 1)
+
+                    data = zip.read(zip_info)
+                    if len(data) != manifest_file.size or hashlib.sha256(data).hexdigest() != manifest_file.sha256:
+                        raise ValueError(f'Digest of {file_name} does not match manifest!')
+
+                    file_path = deploy_path.joinpath(*Path(file_name).parts)
+                    file_path.parent.mkdir(parents=True, exist_ok=True)
+                    Paths.App.write_file(file_path, data)
+
+                    # Restore modification date
+                    timestamp = time.mktime(zip_info.date_time + (0, 0, -1))
+                    os.utime(file_path, (timestamp, timestamp))
+
+                    downloaded_bytes += zip_info.compress_size
+                    self.notify_download_progress(downloaded_bytes, total_bytes)
+
+            downloaded_bytes = remote_file.downloaded_bytes
+
+        self.download_in_progress = False
+
+        log.debug(f'Delta update of {self.metadata.package_name}: {len(changed_files)} of {len(manifest.files)} files '
+                  f'changed, {downloaded_bytes} bytes downloaded')
+
+        Events.Fire(Events.Application.Busy())
+
+        Paths.App.write_file(self.package_path / f'Manifest.json', manifest_data)
+
+        self.downloaded_asset_path = tmp_path
+
+        return True
+
+    def is_delta_update_supported(self, manifest: Manifest, changed_files: Dict[str, ManifestFile]) -> bool:
+        """
+        Returns False if installation of given release needs all of its files, so only full zip download works
+        """
+        return True
+
+    @staticmethod
+    def get_zip_member_end(file, zip_info: zipfile.ZipInfo) -> int:
+        """
+        Returns end offset of zip member data, based on name and extra field lengths from its local file header
+        """
+        file.seek(zip_info.header_offset)
+        header = file.read(zipfile.sizeFileHeader)
+        if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+            raise ValueError(f'Bad local file header of zip member {zip_info.filename}!')
+        name_length, extra_length = struct.unpack('<HH', header[26:30])
+        return zip_info.header_offset + zipfile.sizeFileHeader + name_length + extra_length + zip_info.compress_size
+
+    def get_cache_path(self) -> Path:
+        return Paths.App.Resources / 'Cache' / 'Packages' / self.metadata.package_name
+
+    def cache_release(self, asset_file_name: str, data, manifest_data):
+        if self.release is None:
+            return
+
+        cache_path = self.get_cache_path()
+        # Keep only the latest release in cache
+        Paths.App.remove_path(cache_path)
+        Paths.verify_path(cache_path)
+
+        cached_files = {asset_file_name: data}
+        if manifest_data is not None:
+            cached_files['Manifest.json'] = manifest_data
+
+        for file_name, file_data in cached_files.items():
+            Paths.App.write_file(cache_path / file_name, file_data)
+
+        release = ResponseRelease(
+            tag_name=self.release.tag_name,
+            body=self.release.body,
+            assets=[ResponseReleaseAsset(name=file_name, browser_download_url=file_name) for file_name in cached_files.keys()],
+        )
+        Paths.App.write_file(cache_path / 'release.json', json.dumps(asdict(release), indent=4))
+
+    def export_to_mirror(self, mirror_path: Path) -> bool:
+        cache_path = self.get_cache_path()
+        release_path = cache_path / 'release.json'
+
+        if not release_path.is_file():
+            return False
+
+        release = from_dict(data_class=ResponseRelease, data=json.loads(Paths.App.read_text(release_path)))
+        version, url, signature, release_notes, manifest_url = self.manager.github_client.parse_release(
+            release,
+            asset_version_pattern=self.asset_version_pattern,
+            asset_name_format=self.metadata.asset_name_format,
+            signature_pattern=self.signature_pattern)
+
+        # Ensure that mirror never gets tampered or damaged release
+        if not self.security.verify(signature, Paths.App.read_bytes(cache_path / url)):
+            raise ValueError(L('package_manager_file_verification_failed', """
+                {asset_name} data integrity verification failed!
+                Please restart the launcher and try again!
+            """).format(asset_name=url))
+
+        export_path = mirror_path / self.metadata.github_repo_owner / self.metadata.github_repo_name
+        Paths.verify_path(export_path.parent)
+        Paths.App.copy_dir(cache_path, export_path, keep_existing_files=False)
+
+        return True
+
     def install_latest_version(self, clean):
         raise NotImplementedError(f'Method "install_latest_version" is not implemented for package {self.metadata.package_name}!')
 
@@ -233,6 +602,10 @@ class Package:
             version=str(version),
             signatures={asset_path.name: signature},
         )
+        # Local manifest gets digests for reference only: without private key launcher cannot sign them,
+        # so remote manifest with `files_signature` (see `Manifest.sign_files`) is required for delta updates
+        if asset_path.suffix == '.zip':
+            manifest.add_files_from_zip(asset_path)
         Paths.App.write_file(self.package_path / f'Manifest.json', manifest.as_json())
 
     def load_manifest(self):
@@ -314,7 +687,9 @@ class Package:
             self.detect_latest_version()
 
         try:
-            self.download_latest_version()
+            # Try to fetch only changed files first, fallback to full release zip download
+            if not self.download_latest_version_delta(clean=clean):
+                self.download_latest_version()
         except Exception as e:
             raise Errors.with_title(e, L('error_title_package_download_failed', '{package} Package Download Failed').format(
                 package=self.metadata.package_name
@@ -330,6 +705,8 @@ class Package:
                 package=self.metadata.package_name
             ))
 
+        self.clear_staged_data()
+
         self.load_manifest()
         self.detect_installed_version()
         self.cfg.deployed_version = self.installed_version
@@ -429,6 +806,9 @@ class PackageManager:
         self.update_running = False
         self.api_connection_refused = False
         self.api_connection_refused_notified = False
+        self.prefetched_releases: Dict[str, ResponseRelease] = {}
+        self.staging_lock = Lock()
+        self.staging_cancel = Event()
         Events.Subscribe(Events.PackageManager.GetPackage, lambda event: self.get_package(event.package_name))
         Events.Subscribe(Events.Application.ConfigUpdate, self.handle_config_update)
         Events.Subscribe(Events.PackageManager.NotifyPackageVersions, lambda event: self.notify_package_versions(detect_installed=event.detect_installed))
@@ -437,7 +817,9 @@ class PackageManager:
         self.github_client.configure(
             access_token=Config.Launcher.github_token,
             verify_ssl=Config.Launcher.verify_ssl,
-            proxy_config=Config.Launcher.proxy
+            proxy_config=Config.Launcher.proxy,
+            mirror_source=Config.Launcher.mirror_source,
+            http_config=Config.Launcher.http_session,
         )
 
     def register_package(self, package: Package):
@@ -527,6 +909,13 @@ class PackageManager:
                 requirements += package.metadata.requirements
 
         try:
+            # Query latest releases of all packages pending update check with single request
+            self.prefetch_latest_releases([
+                package for package_name, package in self.packages.items()
+                if package.active and ((packages is None) or (package_name in packages) or (package_name in requirements))
+                and self.update_check_required(package, no_install=no_install, no_check=no_check, force=force, reinstall=reinstall)
+            ])
+
             for package_name, package in self.packages.items():
 
                 # Skip package processing if it's not active, intended for multiple model importers support
@@ -566,24 +955,48 @@ class PackageManager:
 
         finally:
             self.update_running = False
+            self.prefetched_releases = {}
             self.notify_package_versions()
             if not silent:
                 Events.Fire(Events.Application.Ready())
 
-    def update_package(self, package: Package, no_install=False, no_check=False, force=False, reinstall=False):
+    def prefetch_latest_releases(self, packages: List[Package]):
+        # Batched GraphQL query is available only for authorized requests
+        if not self.github_client.access_token or len(packages) < 2 or self.api_connection_refused:
+            return
+        # Mirror serves releases itself
+        if self.github_client.mirror_source:
+            return
+        repos = {
+            package.metadata.package_name: (package.metadata.github_repo_owner, package.metadata.github_repo_name)
+            for package in packages
+        }
+        try:
+            self.prefetched_releases = self.github_client.fetch_latest_releases(repos, pre_release=Config.Launcher.pre_release)
+            log.debug(f'Prefetched latest releases of {len(self.prefetched_releases)} of {len(repos)} packages')
+        except Exception as e:
+            # Fallback to per-package REST requests
+            log.debug(f'Failed to prefetch latest releases: {e}')
+            self.prefetched_releases = {}
+
+    def update_check_required(self, package: Package, no_install=False, no_check=False, force=False, reinstall=False):
         # Check if installation is pending, as we'll need download url from update check
         install = not no_install and (package.update_available() or reinstall) and (Config.Launcher.auto_update or force)
+        current_time = int(time.time())
+        # Force update check if installation is pending or the last check time is somewhere in the future
+        force_check = not no_check and (force or install or package.cfg.update_check_time > current_time)
+        # We're going to throttle query to 1 per hour by default, else user can be temporary banned by GitHub
+        return force_check or package.cfg.update_check_time + 3600 < current_time
+
+    def update_package(self, package: Package, no_install=False, no_check=False, force=False, reinstall=False):
+        check_required = self.update_check_required(package, no_install=no_install, no_check=no_check, force=force, reinstall=reinstall)
 
         # Check local files for the installed package version
         package.detect_installed_version()
 
         # Query GitHub for the latest available package version
-        current_time = int(time.time())
-        # Force update check if installation is pending or the last check time is somewhere in the future
-        force_check = not no_check and (force or install or package.cfg.update_check_time > current_time)
-        # We're going to throttle query to 1 per hour by default, else user can be temporary banned by GitHub
-        if force_check or package.cfg.update_check_time + 3600 < current_time:
-            package.cfg.update_check_time = current_time
+        if check_required:
+            package.cfg.update_check_time = int(time.time())
             if self.api_connection_refused:
                 self.api_connection_refused_notified = False
                 return False
@@ -605,10 +1018,60 @@ class PackageManager:
 
         return False
 
+    def stage_updates(self, bandwidth_limit: int = 0):
+        """
+        Downloads pending updates of active packages into staging area without installing them
+        """
+        if self.update_running or not self.staging_lock.acquire(blocking=False):
+            return
+        self.staging_cancel.clear()
+        try:
+            for package_name, package in list(self.packages.items()):
+                if not package.active or self.staging_cancel.is_set():
+                    continue
+                if not package.update_available() or package.cfg.latest_version == package.cfg.skipped_version:
+                    continue
+                try:
+                    if not package.download_url:
+                        if self.api_connection_refused:
+                            continue
+                        package.detect_latest_version()
+                    package.stage_latest_version(bandwidth_limit=bandwidth_limit, cancel_event=self.staging_cancel)
+                except ConnectionRefusedError as e:
+                    self.api_connection_refused = True
+                    log.exception(e)
+                except Exception as e:
+                    log.debug(f'Failed to stage {package_name} update: {e}')
+        finally:
+            self.staging_lock.release()
+
+    def cancel_staging(self):
+        self.staging_cancel.set()
+
+    def wait_staging(self, timeout: float = -1) -> bool:
+        """
+        Waits for update staging to finish, returns False if it's still running after `timeout` seconds
+        """
+        if not self.staging_lock.acquire(timeout=timeout):
+            return False
+        self.staging_lock.release()
+        return True
+
     def skip_latest_updates(self):
         for package in self.packages.values():
             package.cfg.skipped_version = package.cfg.latest_version
 
+    def export_mirror(self, mirror_path: Path):
+        log.debug(f'Exporting cached packages to mirror {mirror_path}...')
+        for package_name, package in self.packages.items():
+            try:
+                if package.export_to_mirror(mirror_path):
+                    log.debug(f'Exported {package_name} {package.metadata.github_repo_owner}/{package.metadata.github_repo_name} to mirror')
+                else:
+                    log.debug(f'Skipped {package_name} export to mirror: package cache is empty')
+            except Exception as e:
+                log.exception(e)
+
     def uninstall_packages(self):
         for package_name, package in self.packages.items():
             package.uninstall()
\ No newline at end of file
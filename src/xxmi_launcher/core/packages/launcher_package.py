@@ -3,8 +3,6 @@ import logging
 import subprocess
 import time
 
-import winshell
-import pythoncom
 import winreg
 
 from dataclasses import dataclass, field
@@ -18,7 +16,13 @@ from core.locale_manager import L
 from core.package_manager import Package, PackageMetadata
 
 from core.utils.proxy import ProxyConfig
+from core.utils.http_session import HttpSessionConfig
 from core.utils.process_tracker import wait_for_process, WaitResult
+from core.utils.lazy_import import lazy_import
+
+# Shell COM bindings are only needed for shortcut management
+winshell = lazy_import('winshell')
+pythoncom = lazy_import('pythoncom')
 
 log = logging.getLogger(__name__)
 
@@ -40,6 +44,11 @@ class LauncherManagerConfig:
     github_token: str = ''
     verify_ssl: bool = True
     proxy: ProxyConfig = field(default_factory=lambda: ProxyConfig())
+    http_session: HttpSessionConfig = field(default_factory=lambda: HttpSessionConfig())
+    mirror_source: str = ''
+    cache_packages: bool = False
+    stage_updates: bool = True
+    stage_bandwidth_limit: int = 4096
     credits_shown: bool = False
     locale: str = ''
 
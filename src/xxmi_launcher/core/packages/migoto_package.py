@@ -11,6 +11,7 @@ import core.error_manager as Errors
 import core.path_manager as Paths
 import core.event_manager as Events
 import core.config_manager as Config
+import core.utils.tracer as Tracer
 
 from core.locale_manager import L
 from core.package_manager import Package, PackageMetadata
@@ -208,6 +209,7 @@ class MigotoPackage(Package):
 
         return False, ''
 
+    @Tracer.traced()
     def deploy_package_files(self, process_name: str, force: bool = False):
         Events.Fire(Events.Application.Busy())
 
@@ -273,6 +275,7 @@ class MigotoPackage(Package):
             else:
                 raise FileNotFoundError(L('error_xxmi_missing_critical_file', 'XXMI package is missing critical file: {file_name}!').format(file_name=file_path.name))
 
+    @Tracer.traced()
     def validate_deployed_files(self):
         Events.Fire(Events.Application.Busy())
 
@@ -317,6 +320,7 @@ class MigotoInjector:
         context = cls.get_launch_context(event)
         return cls(context, injector_path)
 
+    @Tracer.traced()
     def run(self):
         context = self.context
 
@@ -5,12 +5,13 @@ import shutil
 import winreg
 import ctypes
 
-import winshell
-import pythoncom
 import re
+import json
 import time
+import hashlib
 
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Union, Dict, List, Tuple
 from dataclasses import dataclass, field
@@ -19,12 +20,20 @@ from enum import Enum
 import core.path_manager as Paths
 import core.event_manager as Events
 import core.config_manager as Config
+import core.utils.tracer as Tracer
 
 from core.locale_manager import L
-from core.package_manager import Package, PackageMetadata
+from core.package_manager import Package, PackageMetadata, Manifest, ManifestFile
 
 from core.mod_manager import ModManager
 from core.utils.ini_handler import IniHandler, IniHandlerSettings
+from core.utils.applied_state import AppliedStateLedger
+from core.utils.discovery_cache import DiscoveryCache
+from core.utils.lazy_import import lazy_import
+
+# Shell COM bindings are only needed for shortcut management
+winshell = lazy_import('winshell')
+pythoncom = lazy_import('pythoncom')
 
 log = logging.getLogger(__name__)
 
@@ -167,6 +176,12 @@ class ModelImporterCommandFileHandler:
         with open(self.ini_path, 'r', encoding='utf-8') as f:
             self.ini = IniHandler(IniHandlerSettings(option_value_spacing=True, ignore_comments=False), f)
 
+    def has_commands(self, cmd_section: ModelImporterCommandFileSection) -> bool:
+        if self.ini is None:
+            return False
+        section = self.ini.get_section(cmd_section.value)
+        return section is not None and len(section.options) > 0
+
     def execute_command_section(self, cmd_section: ModelImporterCommandFileSection):
         if self.ini is None:
             return
@@ -232,6 +247,8 @@ class ModelImporterPackage(Package):
         self.backups_path = None
         self.use_hook: bool = True
         self.ini = None
+        self.applied_state = AppliedStateLedger()
+        self.discovery_cache = DiscoveryCache()
         self.autodetect_patterns: Dict[str, re.Pattern] = {}
         self.autodetect_files: Dict[str, List[str]] = {}
         self.autodetect_known_paths: List[str] = []
@@ -438,6 +455,21 @@ class ModelImporterPackage(Package):
 
         return game_path, game_exe_path
 
+    def get_deployment_path(self) -> Path:
+        return Config.Active.Importer.importer_path
+
+    def is_delta_update_supported(self, manifest: Manifest, changed_files: Dict[str, ManifestFile]) -> bool:
+        # PreInstall commands may delete folders with unchanged files, which delta update doesn't download
+        xcmd_file_name = 'Core/auto_update.xcmd'
+        if xcmd_file_name not in manifest.files:
+            return True
+        # Changed command file cannot be inspected without download, full install is the safe way for it
+        if xcmd_file_name in changed_files:
+            return False
+        # Unchanged command file is identical to the deployed one
+        xxmi_cmd_handler = ModelImporterCommandFileHandler(self.get_deployment_path() / 'Core' / 'auto_update.xcmd')
+        return not xxmi_cmd_handler.has_commands(ModelImporterCommandFileSection.PreInstall)
+
     def install_latest_version(self, clean):
         Events.Fire(Events.PackageManager.InitializeInstallation())
 
@@ -479,15 +511,35 @@ class ModelImporterPackage(Package):
         raise NotImplementedError
 
     def update_d3dx_ini(self, game_exe_path: Path):
-        Events.Fire(Events.Application.StatusUpdate(status=L('status_updating_ini', 'Updating d3dx.ini...')))
-
         ini_path = Config.Active.Importer.importer_path / 'd3dx.ini'
 
+        screen_width, screen_height = ctypes.windll.user32.GetSystemMetrics(0), ctypes.windll.user32.GetSystemMetrics(1)
+
+        applied_settings = {
+            'target': game_exe_path.name,
+            'dll_initialization_delay': Config.Active.Importer.xxmi_dll_init_delay,
+            'screen_size': [screen_width, screen_height],
+            'd3dx_ini': Config.Active.Importer.d3dx_ini,
+            'enforce_rendering': Config.Active.Migoto.enforce_rendering,
+            'calls_logging': Config.Active.Migoto.calls_logging,
+            'debug_logging': Config.Active.Migoto.debug_logging,
+            'mute_warnings': Config.Active.Migoto.mute_warnings,
+            'enable_hunting': Config.Active.Migoto.enable_hunting,
+            'dump_shaders': Config.Active.Migoto.dump_shaders,
+        }
+        if self.applied_state.is_applied('d3dx.ini', [ini_path], applied_settings):
+            return
+
+        Events.Fire(Events.Application.StatusUpdate(status=L('status_updating_ini', 'Updating d3dx.ini...')))
+
         Events.Fire(Events.PathManager.VerifyFileAccess(path=ini_path, write=True))
 
         log.debug(f'Reading d3dx.ini...')
 
-        ini = IniHandler(IniHandlerSettings(ignore_comments=False), Paths.App.read_text(ini_path))
+        # Lossless mode keeps user edits and formatting intact and rewrites only changed lines
+        # File is handled as bytes, as text mode IO would translate line breaks of the whole file
+        ini = IniHandler(IniHandlerSettings(ignore_comments=False, lossless=True),
+                         Paths.App.read_bytes(ini_path).decode('utf-8'))
 
         # Set default game exe as target, can be overridden via XXMI Launcher Config.json:
         # 1. Locate "Importers" > "GIMI" > "Importer" > "d3dx_ini"> "core" > "Loader"
@@ -496,7 +548,6 @@ class ModelImporterPackage(Package):
 
         ini.set_option('System', 'dll_initialization_delay', Config.Active.Importer.xxmi_dll_init_delay)
 
-        screen_width, screen_height = ctypes.windll.user32.GetSystemMetrics(0), ctypes.windll.user32.GetSystemMetrics(1)
         ini.set_option('System', 'screen_width', screen_width)
         ini.set_option('System', 'screen_height', screen_height)
 
@@ -510,11 +561,13 @@ class ModelImporterPackage(Package):
         self.set_default_ini_values(ini, 'dump_shaders', SettingType.Bool, Config.Active.Migoto.dump_shaders)
 
         if ini.is_modified():
-            log.debug(f'Writing d3dx.ini...')
-            Paths.App.write_file(ini_path, ini.to_string())
+            log.debug(f'Writing d3dx.ini changes:\n' + '\n'.join(ini.get_diff()))
+            Paths.App.write_file(ini_path, ini.to_string().encode('utf-8'))
 
         self.ini = ini
 
+        self.applied_state.set_applied('d3dx.ini', [ini_path], applied_settings)
+
     def set_default_ini_values(self, ini: IniHandler, setting_name: str, setting_type: SettingType, setting_value=None):
         settings = Config.Active.Importer.d3dx_ini.get(setting_name, None)
         if settings is None:
@@ -557,19 +610,16 @@ class ModelImporterPackage(Package):
         if not event.silent:
             Events.Fire(Events.Application.Busy())
 
-        ini_path = Config.Active.Importer.importer_path / 'd3dx.ini'
-        ini = self.ini or IniHandler(IniHandlerSettings(ignore_comments=False), Paths.App.read_text(ini_path))
-
-        exclude_patterns = ini.get_option_values('exclude_recursive', section_name='Include').get('Include', {})
+        exclude_patterns = self.get_mods_exclude_patterns()
 
         mod_manager = ModManager()
         mod_result = mod_manager.optimize_mods_folder(
             mods_path=Config.Active.Importer.importer_path / 'Mods',
-            cache_path=Paths.App.Resources / 'Cache' / 'Ini Optimizer' / f'{self.metadata.package_name}.json',
+            cache_path=self.get_mods_optimizer_cache_path(),
             dry_run=False,
             use_cache=True,
             reset_cache=event.reset_cache,
-            exclude_patterns=exclude_patterns.values() or ['DISABLED*'],
+            exclude_patterns=exclude_patterns,
         )
 
         Events.Fire(Events.Application.StatusUpdate(status=L('optimizing_ini_files_in_folder', 'Optimizing INI files in {folder_name} folder...').format(folder_name='ShaderFixes')))
@@ -577,13 +627,25 @@ class ModelImporterPackage(Package):
         shader_result = mod_manager.optimize_shaderfixes_folder(
             shaderfixes_path=Config.Active.Importer.importer_path / 'ShaderFixes',
             dry_run=False,
-            exclude_patterns=exclude_patterns.values() or ['DISABLED*'],
+            exclude_patterns=exclude_patterns,
         )
 
         if not event.silent:
             Events.Fire(Events.Application.Ready())
             self.show_optimization_results_notification(mod_result, shader_result)
 
+    def get_mods_exclude_patterns(self) -> List[str]:
+        ini_path = Config.Active.Importer.importer_path / 'd3dx.ini'
+        ini = self.ini or IniHandler(IniHandlerSettings(ignore_comments=False), Paths.App.read_text(ini_path))
+        exclude_patterns = ini.get_option_values('exclude_recursive', section_name='Include').get('Include', {})
+        return list(exclude_patterns.values()) or ['DISABLED*']
+
+    def get_mods_optimizer_cache_path(self) -> Path:
+        return Paths.App.Resources / 'Cache' / 'Ini Optimizer' / f'{self.metadata.package_name}.json'
+
+    def get_applied_state_path(self) -> Path:
+        return Paths.App.Resources / 'Cache' / 'Applied State' / f'{self.metadata.package_name}.json'
+
     def show_optimization_results_notification(self, mod_result, shader_result):
         results = []
         if mod_result.disabled_mods_count:
@@ -622,30 +684,46 @@ class ModelImporterPackage(Package):
             message=message,
         ))
 
+    @Tracer.traced()
     def start_game(self, event):
         # Ensure package integrity
-        self.validate_package_files()
+        with Tracer.span('validate_package_files'):
+            self.validate_package_files()
         
         # Execute commands from XXMI command file
-        xxmi_cmd_handler = ModelImporterCommandFileHandler(Config.Active.Importer.importer_path / 'Core' / 'auto_update.xcmd')
-        xxmi_cmd_handler.execute_command_section(ModelImporterCommandFileSection.PreLaunch)
+        with Tracer.span('execute_pre_launch_commands'):
+            xxmi_cmd_handler = ModelImporterCommandFileHandler(Config.Active.Importer.importer_path / 'Core' / 'auto_update.xcmd')
+            xxmi_cmd_handler.execute_command_section(ModelImporterCommandFileSection.PreLaunch)
 
         # Check if game location is properly configured
-        game_path, game_exe_path = self.get_game_paths()
+        with Tracer.span('get_game_paths'):
+            game_path, game_exe_path = self.get_game_paths()
 
-        # Write configured settings to main 3dmigoto ini file
-        self.update_d3dx_ini(game_exe_path=game_exe_path)
+        # Configurators skip files they already configured with the same settings during previous launches
+        self.applied_state.load(self.get_applied_state_path(), self.get_installed_version())
 
-        # Optimize ini files in Mods and ShaderFixes folders
-        Events.Fire(Events.ModelImporter.OptimizeMods())
+        try:
+            # Write configured settings to main 3dmigoto ini file
+            with Tracer.span('update_d3dx_ini'):
+                self.update_d3dx_ini(game_exe_path=game_exe_path)
+
+            # Optimize ini files in Mods and ShaderFixes folders
+            with Tracer.span('optimize_mods'):
+                Events.Fire(Events.ModelImporter.OptimizeMods())
 
-        # Execute initialization sequence of implemented importer
-        self.initialize_game_launch(game_path)
+            # Execute initialization sequence of implemented importer
+            with Tracer.span('initialize_game_launch'):
+                self.initialize_game_launch(game_path)
+        finally:
+            log.debug(f'Game configuration: {self.applied_state.get_report()}')
+            self.applied_state.save()
 
-        start_exe_path, start_args, work_dir = self.get_start_cmd(game_path)
+        with Tracer.span('get_start_cmd'):
+            start_exe_path, start_args, work_dir = self.get_start_cmd(game_path)
 
-        Events.Fire(Events.MigotoManager.StartAndInject(game_exe_path=game_exe_path, start_exe_path=start_exe_path,
-                                                        start_args=start_args, work_dir=work_dir, use_hook=self.use_hook))
+        with Tracer.span('start_and_inject'):
+            Events.Fire(Events.MigotoManager.StartAndInject(game_exe_path=game_exe_path, start_exe_path=start_exe_path,
+                                                            start_args=start_args, work_dir=work_dir, use_hook=self.use_hook))
 
     def reg_search_game_folders(self, game_exe_files: List[str]):
         paths = []
@@ -680,23 +758,80 @@ class ModelImporterPackage(Package):
         return paths
 
     def autodetect_game_folders(self) -> List[Path]:
-        paths = self.reg_search_game_folders(Config.Active.Importer.game_exe_names)
+        self.discovery_cache.load(self.get_discovery_cache_path())
+
+        searches = []
 
         for file_path_str, search_patterns in self.autodetect_files.items():
 
             patterns = [self.autodetect_patterns[x] for x in search_patterns]
 
             if file_path_str == '{HOYOPLAY}':
-                paths += self.get_paths_from_hoyoplay(patterns, Config.Active.Importer.game_folder_children)
+                searches += [(file_path, patterns) for file_path in self.get_hoyoplay_data_files()]
                 continue
 
             file_path = Path(file_path_str.replace('{APPDATA}', str(Path(os.getenv('APPDATA')).parent)))
-            paths += self.find_paths_in_file(file_path, patterns, Config.Active.Importer.game_folder_children)
+            searches.append((file_path, patterns))
+
+        # Registry lookup is independent of files search, so it runs alongside
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            reg_paths = executor.submit(self.reg_search_game_folders, Config.Active.Importer.game_exe_names)
+            file_paths = self.find_paths_in_files(searches, Config.Active.Importer.game_folder_children)
+            paths = reg_paths.result()
+
+        paths += file_paths
 
         paths += [Path(x) for x in self.autodetect_known_paths]
 
+        self.discovery_cache.save()
+
+        return paths
+
+    def get_discovery_cache_path(self) -> Path:
+        # Launchers metadata is common for multiple games, so cache is shared by all importers
+        return Paths.App.Resources / 'Cache' / 'Game Detection.json'
+
+    def find_paths_in_files(self, searches: List[Tuple[Path, List[re.Pattern]]], known_children: List[str] = None) -> List[Path]:
+        """
+        Searches files for game paths, only files changed since previous search are read and they are read concurrently
+        """
+        results: List[Optional[List[str]]] = []
+        pending = {}
+        for search_id, (file_path, patterns) in enumerate(searches):
+            stat = self.discovery_cache.get_stat(file_path)
+            signature = self.get_search_signature(patterns, known_children)
+            cached_results = self.discovery_cache.get_results(file_path, signature, stat)
+            results.append(cached_results)
+            if cached_results is None and stat is not None:
+                pending[search_id] = (file_path, patterns, signature, stat)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(len(pending), 4)) as executor:
+                futures = {search_id: executor.submit(self.read_paths_from_file, file_path, patterns, known_children)
+                           for search_id, (file_path, patterns, signature, stat) in pending.items()}
+            for search_id, future in futures.items():
+                file_path, patterns, signature, stat = pending[search_id]
+                try:
+                    file_results = [str(path) for path in future.result()]
+                except Exception as e:
+                    # Failures aren't cached, file may be temporary locked
+                    log.debug(f'Failed to parse path from {file_path}:')
+                    log.exception(e)
+                    continue
+                results[search_id] = file_results
+                self.discovery_cache.set_results(file_path, signature, stat, file_results)
+
+        paths = []
+        for file_results in results:
+            if file_results:
+                paths += [Path(path) for path in file_results]
         return paths
 
+    @staticmethod
+    def get_search_signature(patterns: List[re.Pattern], known_children: List[str] = None) -> str:
+        data = json.dumps([[pattern.pattern for pattern in patterns], known_children or []])
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+
     def validate_package_files(self):
         ini_path = Config.Active.Importer.importer_path / 'd3dx.ini'
         if not ini_path.exists():
@@ -756,39 +891,43 @@ class ModelImporterPackage(Package):
 
         Config.Active.Importer.shortcut_deployed = True
 
-    def get_paths_from_hoyoplay(self, patterns: Union[re.Pattern, List[re.Pattern]], known_children: List[str] = None):
+    def get_hoyoplay_data_files(self) -> List[Path]:
         hoyoplay_path = Path(os.getenv('APPDATA')).parent / 'Roaming' / 'Cognosphere' / 'HYP'
+        return self.discovery_cache.find_files(hoyoplay_path, 'gamedata.dat')
+
+    def get_paths_from_hoyoplay(self, patterns: Union[re.Pattern, List[re.Pattern]], known_children: List[str] = None):
         paths = []
-        if hoyoplay_path.is_dir():
-            for root, dirs, files in hoyoplay_path.walk():
-                for file in files:
-                    if file == 'gamedata.dat':
-                        file_path = root / file
-                        paths += self.find_paths_in_file(file_path, patterns, known_children)
+        for file_path in self.get_hoyoplay_data_files():
+            paths += self.find_paths_in_file(file_path, patterns, known_children)
         return paths
 
     def find_paths_in_file(self, file_path: Path, patterns: Union[re.Pattern, List[re.Pattern]], known_children: List[str] = None):
-        paths = []
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                data = f.read()
-                if isinstance(patterns, re.Pattern):
-                    patterns = [patterns]
-                if known_children is None:
-                    known_children = []
-                for pattern in patterns:
-                    result = pattern.findall(data)
-                    for string in result:
-                        for child in known_children:
-                            pos = string.rfind(child)
-                            if pos != -1:
-                                string = string[:pos]
-                        path = Path(string)
-                        if path not in paths:
-                            paths.append(path)
+            return self.read_paths_from_file(file_path, patterns, known_children)
         except Exception as e:
             log.debug(f'Failed to parse path from {file_path}:')
             log.exception(e)
+        return []
+
+    @staticmethod
+    def read_paths_from_file(file_path: Path, patterns: Union[re.Pattern, List[re.Pattern]], known_children: List[str] = None):
+        paths = []
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            data = f.read()
+        if isinstance(patterns, re.Pattern):
+            patterns = [patterns]
+        if known_children is None:
+            known_children = []
+        for pattern in patterns:
+            result = pattern.findall(data)
+            for string in result:
+                for child in known_children:
+                    pos = string.rfind(child)
+                    if pos != -1:
+                        string = string[:pos]
+                path = Path(string)
+                if path not in paths:
+                    paths.append(path)
         return paths
 
     def uninstall(self):
@@ -1,9 +1,12 @@
 import re
 import os
 import json
+import time
 import sqlite3
 import logging
 
+from collections import deque
+
 from dataclasses import dataclass, field
 from typing import Dict, Union, Optional, Tuple, List
 from pathlib import Path
@@ -129,6 +132,8 @@ class WWMIPackage(ModelImporterPackage):
             requirements=['XXMI'],
         ))
         self.use_hook: bool = False
+        # Candidate path -> [game path, exe mtime_ns] of successful game folder lookups
+        self.game_path_cache: Optional[Dict[str, List]] = None
 
     def get_installed_version(self):
         try:
@@ -136,43 +141,132 @@ class WWMIPackage(ModelImporterPackage):
         except Exception as e:
             return ''
 
+    # Game folder lookup limits, search from drive root must not turn into full drive scan
+    game_search_max_depth = 5
+    game_search_timeout = 3.0
+    # Lowercase names of folders that never contain game installation
+    game_search_excluded_dirs = {
+        'windows', 'programdata', 'appdata', 'system volume information', '$recycle.bin', 'recovery',
+        'node_modules', 'shadercache', 'compatdata', 'downloading', 'temp', 'workshop',
+        # Subfolders of game installation itself, game exe is located in their parent
+        'client', 'engine',
+    }
+
     def normalize_game_path(self, game_path: Path) -> Path:
+        game_path = Path(game_path)
+
         if not game_path.is_absolute():
             raise ValueError(L('error_game_path_not_absolute', 'Failed to normalize path {path}: Path is not absolute!').format(path=game_path))
 
         if (game_path / 'Wuthering Waves.exe').is_file():
             return game_path
 
-        game_path_original = game_path
+        cached_game_path = self.get_cached_game_path(game_path)
+        if cached_game_path is not None:
+            return cached_game_path
+
+        result = self.find_game_folder(game_path)
+
+        if result is None:
+            for parent in game_path.parents:
+                if (parent / 'Wuthering Waves.exe').is_file():
+                    result = parent
+                    break
+
+        if result is None:
+            raise ValueError(L('error_wuthering_waves_exe_not_found', 'Failed to normalize path {path}: Wuthering Waves.exe not found!').format(path=game_path))
 
-        for path in game_path.rglob('*.exe'):
-            if path.is_file() and path.name == 'Wuthering Waves.exe':
-                return Path(path).parent
+        self.cache_game_path(game_path, result)
 
-        for i in range(len(game_path.parents)):
-            game_path = game_path.parent
-            for path in game_path.iterdir():
-                if path.is_file() and path.name == 'Wuthering Waves.exe':
-                    return Path(path).parent
+        return result
 
-        raise ValueError(L('error_wuthering_waves_exe_not_found', 'Failed to normalize path {path}: Wuthering Waves.exe not found!').format(path=game_path_original))
+    def find_game_folder(self, search_path: Path) -> Optional[Path]:
+        """
+        Breadth-first search of folder with Wuthering Waves.exe, limited by depth and time
+        Closest to search path match is returned
+        """
+        deadline = time.monotonic() + self.game_search_timeout
+        queue = deque([(search_path, 0)])
+        while queue:
+            folder_path, depth = queue.popleft()
+            try:
+                with os.scandir(folder_path) as entries:
+                    sub_folders = []
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            sub_folders.append(entry)
+                        elif entry.name.lower() == 'wuthering waves.exe' and entry.is_file():
+                            return Path(folder_path)
+            except OSError:
+                continue
+            if time.monotonic() > deadline:
+                log.debug(f'Game folder search in {search_path} timed out after {self.game_search_timeout}s')
+                return None
+            is_steam_library = os.path.basename(folder_path).lower() == 'steamapps'
+            if depth >= self.game_search_max_depth and not is_steam_library:
+                continue
+            for entry in sub_folders:
+                name = entry.name.lower()
+                if is_steam_library:
+                    # Steam games are installed to `steamapps\common`, it doesn't count towards depth limit, so
+                    # default `Program Files (x86)\Steam\steamapps\common\Wuthering Waves` is found from drive root
+                    if name == 'common':
+                        queue.append((entry.path, depth))
+                    continue
+                if name in self.game_search_excluded_dirs or name.startswith(('.', '$')):
+                    continue
+                queue.append((entry.path, depth + 1))
+        return None
+
+    def get_game_path_cache_path(self) -> Path:
+        return Paths.App.Resources / 'Cache' / 'Game Folders' / f'{self.metadata.package_name}.json'
+
+    def get_cached_game_path(self, game_path: Path) -> Optional[Path]:
+        if self.game_path_cache is None:
+            self.game_path_cache = {}
+            cache_path = self.get_game_path_cache_path()
+            if cache_path.is_file():
+                try:
+                    self.game_path_cache = json.loads(Paths.App.read_text(cache_path))
+                except Exception as e:
+                    log.debug(f'Failed to load game folders cache: {e}')
+        cached = self.game_path_cache.get(str(game_path), None)
+        if cached is None:
+            return None
+        cached_game_path, exe_mtime = Path(cached[0]), cached[1]
+        try:
+            # Entry is valid only while the same game exe is in place
+            if (cached_game_path / 'Wuthering Waves.exe').stat().st_mtime_ns == exe_mtime:
+                return cached_game_path
+        except OSError:
+            pass
+        return None
+
+    def cache_game_path(self, game_path: Path, result: Path):
+        try:
+            self.game_path_cache[str(game_path)] = [str(result), (result / 'Wuthering Waves.exe').stat().st_mtime_ns]
+            cache_path = self.get_game_path_cache_path()
+            Paths.verify_path(cache_path.parent)
+            Paths.App.write_file(cache_path, json.dumps(self.game_path_cache, indent=2), silent=True)
+        except Exception as e:
+            log.debug(f'Failed to update game folders cache: {e}')
 
     def autodetect_game_folders(self) -> List[Path]:
         paths = self.reg_search_game_folders(Config.Active.Importer.process_exe_names)
 
+        self.discovery_cache.load(self.get_discovery_cache_path())
+
         kuro_launcher_path = Path(os.getenv('APPDATA')) / 'KRLauncher'
-        for root, dirs, files in kuro_launcher_path.walk():
-            for file in files:
-                if file != 'kr_starter_game.json':
-                    continue
-                file_path = root / file
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        path = json.load(f).get('path', None)
-                        if path is not None:
-                            paths.append(path)
-                except:
-                    continue
+        for file_path in self.discovery_cache.find_files(kuro_launcher_path, 'kr_starter_game.json'):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    path = json.load(f).get('path', None)
+                    if path is not None:
+                        paths.append(path)
+            except:
+                continue
+
+        self.discovery_cache.save()
 
         result = []
 
@@ -238,7 +332,13 @@ class WWMIPackage(ModelImporterPackage):
     def initialize_game_launch(self, game_path: Path):
         # Configure LocalStorage.db
         if any([Config.Importers.WWMI.Importer.configure_game, Config.Importers.WWMI.Importer.unlock_fps]):
-            self.configure_settings(game_path)
+            storage_path = game_path / 'Client' / 'Saved' / 'LocalStorage'
+            if not self.applied_state.is_applied('LocalStorage.db', SettingsManager.get_storage_files(storage_path),
+                                                 self.get_local_storage_settings()):
+                self.configure_settings(game_path)
+                # Settings are collected again, as user may have changed them via Wounded Effect dialogue
+                self.applied_state.set_applied('LocalStorage.db', SettingsManager.get_storage_files(storage_path),
+                                               self.get_local_storage_settings())
         # Configure Engine.ini
         self.update_engine_ini(game_path)
         # Configure UserEngine.ini
@@ -250,6 +350,16 @@ class WWMIPackage(ModelImporterPackage):
         if not Config.Active.Importer.is_xxmi_dll_used():
             return
 
+    def get_local_storage_settings(self) -> dict:
+        return {
+            'unlock_fps': Config.Importers.WWMI.Importer.unlock_fps,
+            'configure_game': Config.Importers.WWMI.Importer.configure_game,
+            'xxmi_dll_used': Config.Active.Importer.is_xxmi_dll_used(),
+            'force_max_lod_bias': Config.Importers.WWMI.Importer.force_max_lod_bias,
+            'disable_wounded_fx': Config.Importers.WWMI.Importer.disable_wounded_fx,
+            'disable_wounded_fx_warned': Config.Importers.WWMI.Importer.disable_wounded_fx_warned,
+        }
+
     def configure_settings(self, game_path: Path):
         Events.Fire(Events.Application.StatusUpdate(status=L('status_configuring_settings', 'Configuring in-game settings...')))
 
@@ -326,6 +436,13 @@ class WWMIPackage(ModelImporterPackage):
     def update_engine_ini(self, game_path: Path):
         engine_ini_path = game_path / 'Client' / 'Saved' / 'Config' / 'WindowsNoEditor' / 'Engine.ini'
 
+        applied_settings = {
+            'apply_perf_tweaks': Config.Importers.WWMI.Importer.apply_perf_tweaks,
+            'perf_tweaks': Config.Importers.WWMI.Importer.perf_tweaks,
+        }
+        if self.applied_state.is_applied('Engine.ini', [engine_ini_path], applied_settings):
+            return
+
         Events.Fire(Events.Application.StatusUpdate(
             status=L('status_updating_file', 'Updating {file_name}...').format(file_name=engine_ini_path.name))
         )
@@ -361,22 +478,11 @@ class WWMIPackage(ModelImporterPackage):
         if ini.is_modified():
             Paths.App.write_file(engine_ini_path, ini.to_string())
 
+        self.applied_state.set_applied('Engine.ini', [engine_ini_path], applied_settings)
 
     def update_user_engine_ini(self, game_path: Path):
         engine_ini_path = game_path / 'Client' / 'Config' / 'UserEngine.ini'
 
-        Events.Fire(Events.Application.StatusUpdate(
-            status=L('status_updating_file', 'Updating {file_name}...').format(file_name=engine_ini_path.name))
-        )
-
-        if not engine_ini_path.exists():
-            Paths.verify_path(engine_ini_path.parent)
-            Paths.App.write_file(engine_ini_path, '')
-
-        Events.Fire(Events.PathManager.VerifyFileAccess(path=engine_ini_path, write=True))
-        with open(engine_ini_path, 'r', encoding='utf-8') as f:
-            ini = IniHandler(IniHandlerSettings(option_value_spacing=False, inline_comments=True, add_section_spacing=True, right_split=True), f)
-
         console_variables_options = {
             # Controls minimal camera FOV value when engine switches character LOD0 mesh to LOD1+.
             'r.Kuro.SkeletalMesh.DistanceLODBaseFOV': Config.Importers.WWMI.Importer.mesh_lod_distance_lod_base_fov,
@@ -402,6 +508,21 @@ class WWMIPackage(ModelImporterPackage):
         }
         log.debug(f'Using console variables: {console_variables_options}')
 
+        if self.applied_state.is_applied('UserEngine.ini', [engine_ini_path], console_variables_options):
+            return
+
+        Events.Fire(Events.Application.StatusUpdate(
+            status=L('status_updating_file', 'Updating {file_name}...').format(file_name=engine_ini_path.name))
+        )
+
+        if not engine_ini_path.exists():
+            Paths.verify_path(engine_ini_path.parent)
+            Paths.App.write_file(engine_ini_path, '')
+
+        Events.Fire(Events.PathManager.VerifyFileAccess(path=engine_ini_path, write=True))
+        with open(engine_ini_path, 'r', encoding='utf-8') as f:
+            ini = IniHandler(IniHandlerSettings(option_value_spacing=False, inline_comments=True, add_section_spacing=True, right_split=True), f)
+
         section_name = 'ConsoleVariables'
 
         for option_name, option_value in console_variables_options.items():
@@ -415,11 +536,17 @@ class WWMIPackage(ModelImporterPackage):
         if ini.is_modified():
             Paths.App.write_file(engine_ini_path, ini.to_string())
 
-    def update_game_user_settings_ini(self, game_path: Path):
-        Events.Fire(Events.Application.StatusUpdate(status=L('status_updating_file', 'Updating {file_name}...').format(file_name='GameUserSettings.ini')))
+        self.applied_state.set_applied('UserEngine.ini', [engine_ini_path], console_variables_options)
 
+    def update_game_user_settings_ini(self, game_path: Path):
         ini_path = game_path / 'Client' / 'Saved' / 'Config' / 'WindowsNoEditor' / 'GameUserSettings.ini'
 
+        applied_settings = {'FrameRateLimit': 120.000000}
+        if self.applied_state.is_applied('GameUserSettings.ini', [ini_path], applied_settings):
+            return
+
+        Events.Fire(Events.Application.StatusUpdate(status=L('status_updating_file', 'Updating {file_name}...').format(file_name='GameUserSettings.ini')))
+
         if not ini_path.exists():
             Paths.verify_path(ini_path.parent)
             Paths.App.write_file(ini_path, '')
@@ -428,13 +555,19 @@ class WWMIPackage(ModelImporterPackage):
         with open(ini_path, 'r', encoding='utf-8') as f:
             ini = IniHandler(IniHandlerSettings(option_value_spacing=False, inline_comments=True, add_section_spacing=True), f)
 
-        ini.set_option('/Script/Engine.GameUserSettings', 'FrameRateLimit', 120.000000)
+        ini.set_option('/Script/Engine.GameUserSettings', 'FrameRateLimit', applied_settings['FrameRateLimit'])
 
         if ini.is_modified():
             Paths.App.write_file(ini_path, ini.to_string())
 
+        self.applied_state.set_applied('GameUserSettings.ini', [ini_path], applied_settings)
+
 
 class SettingsManager:
+    # Keys read by settings configuration, loaded from db at once
+    known_keys = ['CustomFrameRate', 'MenuData', 'PlayMenuInfo', 'ImageDetail', 'RayTracing', 'RayTracedReflection',
+                  'RayTracedGI', 'SkinDamageMode']
+
     def __init__(self, game_path: Path):
         self.path = game_path / 'Client' / 'Saved' / 'LocalStorage'
         self.db: Optional[LocalStorage] = None
@@ -459,6 +592,7 @@ class SettingsManager:
         # Open active LocalStorage file for edits
         self.db = LocalStorage(default_db_path)
         self.db.connect()
+        self.db.load_values(self.known_keys)
 
         return self
 
@@ -545,6 +679,16 @@ class SettingsManager:
             if 'CustomFrameRate' in trigger.body:
                 self.db.delete_trigger(trigger.name)
 
+    @staticmethod
+    def get_storage_files(storage_path: Path) -> List[Path]:
+        """
+        Returns all LocalStorage db and journal files, as game may switch to another db or leave pending journal
+        """
+        if not storage_path.is_dir():
+            return []
+        return sorted(path for path in storage_path.iterdir()
+                      if path.is_file() and path.name.startswith('LocalStorage') and path.suffix in ('.db', '.db-journal'))
+
     def get_active_db_path(self):
         active_db_path = None
         db_paths = []
@@ -592,57 +736,124 @@ class SQLiteTrigger:
 
 
 class LocalStorage:
+    """
+    Batched LocalStorage.db editor
+    Values are read once and edited in memory, changes are written in single transaction on save
+    """
+    default_values = {
+        'NotFirstTimeOpenPush': '"___1B___"',
+        'HasLocalGameSettings': '"___1B___"',
+        'IsCustomImageQuality': '"___1B___"',
+    }
+
     def __init__(self, path: Path):
         self.path = path
         self.connection = None
-        self.cursor = None
-        self.modified = False
+        self.create_table = False
+        # Key -> value stored in db (None if key doesn't exist)
+        self.values: Dict[str, Optional[str]] = {}
+        # Key -> new value (None to delete key)
+        self.pending_values: Dict[str, Optional[str]] = {}
+        self.triggers: Dict[str, SQLiteTrigger] = {}
+        # Trigger name -> (key, value) of lock trigger to create (None to drop trigger)
+        self.pending_triggers: Dict[str, Optional[Tuple[str, str]]] = {}
+
+    @property
+    def modified(self) -> bool:
+        return self.create_table or bool(self.pending_values) or bool(self.pending_triggers)
 
     def disconnect(self):
         if self.connection is None:
             return
         self.connection.close()
-        self.cursor = None
-        self.modified = False
         self.connection = None
+        self.create_table = False
+        self.values = {}
+        self.pending_values = {}
+        self.triggers = {}
+        self.pending_triggers = {}
         log.debug(f'[{self.path.name}]: Connection closed')
 
     def connect(self):
         self.disconnect()
         log.debug(f'[{self.path.name}]: Connecting...')
-        self.connection = sqlite3.connect(self.path)
+        # Transactions are managed explicitly by save()
+        self.connection = sqlite3.connect(self.path, isolation_level=None)
         try:
-            self.cursor = self.connection.cursor()
-            try:
-                self.cursor.execute("SELECT * FROM LocalStorage")
-            except sqlite3.OperationalError:
+            # Table check and triggers list are served by the same schema query
+            result = self.connection.execute(
+                "SELECT type, name, tbl_name, sql FROM sqlite_master WHERE type IN ('table', 'trigger')")
+            has_table = False
+            for object_type, name, table, sql in result.fetchall():
+                if object_type == 'table':
+                    has_table = has_table or name == 'LocalStorage'
+                else:
+                    self.triggers[name] = SQLiteTrigger(name=name, table=table, body=sql)
+            if not has_table:
                 log.debug(f'[{self.path.name}]: Creating new settings database...')
-                self.cursor.execute("CREATE TABLE LocalStorage(key text primary key not null, value text not null)")
-                data = [
-                    ('NotFirstTimeOpenPush', '"___1B___"'),
-                    ('HasLocalGameSettings', '"___1B___"'),
-                    ('IsCustomImageQuality', '"___1B___"'),
-                ]
-                self.cursor.executemany(f"INSERT INTO LocalStorage VALUES (?,?)", data)
+                self.create_table = True
+                self.values = {key: None for key in self.default_values.keys()}
+                self.pending_values = dict(self.default_values)
         except Exception as e:
             self.disconnect()
             raise Exception(L('error_local_storage_init_failed', 'Failed to initialize LocalStorage: {error_text}').format(error_text=e))
 
+    def load_values(self, keys: List[str]):
+        """
+        Reads values of given keys with single query
+        """
+        keys = [key for key in keys if key not in self.values]
+        if not keys:
+            return
+        for key in keys:
+            self.values[key] = None
+        if self.create_table:
+            return
+        placeholders = ', '.join(['?'] * len(keys))
+        result = self.connection.execute(f"SELECT key, value FROM LocalStorage WHERE key IN ({placeholders})", keys)
+        for key, value in result.fetchall():
+            self.values[key] = value
+
     def save(self):
         if not self.modified:
             self.disconnect()
             return
-        self.connection.commit()
+        connection = self.connection
+        try:
+            connection.execute('BEGIN')
+            if self.create_table:
+                connection.execute("CREATE TABLE LocalStorage(key text primary key not null, value text not null)")
+            # Triggers are dropped before values are written, as lock triggers would revert updates of locked values
+            for name, lock in self.pending_triggers.items():
+                if self.triggers.get(name, None) is not None:
+                    connection.execute(f'DROP TRIGGER IF EXISTS {name}')
+            upserts = [(key, value) for key, value in self.pending_values.items() if value is not None]
+            if upserts:
+                connection.executemany(
+                    "INSERT INTO LocalStorage(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    upserts)
+            deletes = [(key,) for key, value in self.pending_values.items() if value is None]
+            if deletes:
+                connection.executemany("DELETE FROM LocalStorage WHERE key = ?", deletes)
+            for name, lock in self.pending_triggers.items():
+                if lock is not None:
+                    connection.execute(self.get_lock_trigger_sql(name, *lock))
+            connection.execute('COMMIT')
+        except Exception:
+            # BEGIN itself may fail (i.e. db is locked by running game), there's nothing to roll back then
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            self.disconnect()
+            raise
+        log.debug(f'[{self.path.name}]: File updated ({len(self.pending_values)} values, '
+                  f'{len(self.pending_triggers)} triggers)')
         self.disconnect()
-        log.debug(f'[{self.path.name}]: File updated')
 
     def get_value(self, key) -> Union[str, None]:
-        result = self.cursor.execute(f"SELECT value FROM LocalStorage WHERE key='{key}'")
-        data = result.fetchone()
-        if data is None or len(data) != 1:
-            return None
-        else:
-            return data[0]
+        if key in self.pending_values:
+            return self.pending_values[key]
+        self.load_values([key])
+        return self.values[key]
 
     def set_value(self, key: str, value: str):
         old_value = self.get_value(key)
@@ -650,39 +861,39 @@ class LocalStorage:
             log.debug(f'[{self.path.name}]: Skipped {key} value: {value} (already set)')
             return
         if old_value is None:
-            self.cursor.execute(f"INSERT INTO LocalStorage VALUES ('{key}', '{value}')")
             log.debug(f'[{self.path.name}]: Added {key} value: {value}')
         else:
-            self.cursor.execute(f"UPDATE LocalStorage SET value = '{value}' WHERE key='{key}'")
             log.debug(f'[{self.path.name}]: Updated {key} value: {old_value} -> {value}')
-        self.modified = True
+        self.set_pending_value(key, value)
 
     def delete_value(self, key):
         if self.get_value(key) is None:
             return
-        self.cursor.execute(f"DELETE FROM LocalStorage WHERE key='{key}'")
         log.debug(f'[{self.path.name}]: Removed {key} value')
-        self.modified = True
+        self.set_pending_value(key, None)
 
-    def get_trigger(self, name) -> Union[SQLiteTrigger, None]:
-        result = self.cursor.execute(f"SELECT * FROM sqlite_master WHERE type='trigger' AND name='{name}'")
-        data = result.fetchone()
-        if data is None:
-            return None
+    def set_pending_value(self, key: str, value: Optional[str]):
+        # Changes reverting value to stored one cancel out
+        if self.values[key] == value:
+            self.pending_values.pop(key, None)
         else:
-            return SQLiteTrigger(name=data[1], table=data[2], body=data[4])
+            self.pending_values[key] = value
+
+    def get_trigger(self, name) -> Union[SQLiteTrigger, None]:
+        if name in self.pending_triggers:
+            lock = self.pending_triggers[name]
+            if lock is None:
+                return None
+            return SQLiteTrigger(name=name, table='LocalStorage', body=self.get_lock_trigger_sql(name, *lock))
+        return self.triggers.get(name, None)
 
     def get_all_triggers(self) -> Union[List[SQLiteTrigger], None]:
-        result = self.cursor.execute(f"SELECT * FROM sqlite_master WHERE type='trigger'")
-        data = result.fetchmany()
-        if data is None:
-            return None
-        else:
-            return [SQLiteTrigger(name=t[1], table=t[2], body=t[4]) for t in data]
+        names = list(self.triggers.keys()) + [name for name in self.pending_triggers.keys() if name not in self.triggers]
+        return [trigger for trigger in map(self.get_trigger, names) if trigger is not None]
 
-    def set_value_lock_trigger(self, name, key, value):
-        self.delete_trigger(name)
-        self.cursor.execute(f'''
+    @staticmethod
+    def get_lock_trigger_sql(name, key, value) -> str:
+        return f'''
             CREATE TRIGGER {name}
             AFTER UPDATE OF value ON LocalStorage
             WHEN NEW.key = '{key}'
@@ -691,14 +902,24 @@ class LocalStorage:
                 SET value = {value}
                 WHERE key = '{key}';
             END;
-        ''')
+        '''
+
+    def set_value_lock_trigger(self, name, key, value):
+        trigger = self.triggers.get(name, None)
+        # Schema keeps statement text without trailing semicolon
+        sql = self.get_lock_trigger_sql(name, key, value).strip().rstrip(';')
+        if trigger is not None and trigger.body.strip().rstrip(';') == sql:
+            self.pending_triggers.pop(name, None)
+            log.debug(f'[{self.path.name}]: Skipped lock trigger {name} for {key} value: {value} (already set)')
+            return
+        self.pending_triggers[name] = (key, value)
         log.debug(f'[{self.path.name}]: Added lock trigger {name} for {key} value: {value}')
-        self.modified = True
 
     def delete_trigger(self, name):
         if self.get_trigger(name) is None:
             return
-        self.cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        if name in self.triggers:
+            self.pending_triggers[name] = None
+        else:
+            del self.pending_triggers[name]
         log.debug(f'[{self.path.name}]: Removed trigger {name}')
-        self.modified = True
-
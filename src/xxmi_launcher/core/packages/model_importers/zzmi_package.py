@@ -142,25 +142,34 @@ class ZZMIPackage(ModelImporterPackage):
                 """).format(error_text=e)) from e
 
     def configure_game_settings(self, game_path: Path):
-        Events.Fire(Events.Application.StatusUpdate(status=L('status_configuring_settings', 'Configuring in-game settings...')))
-
         config_path = game_path / 'ZenlessZoneZero_Data' / 'Persistent' / 'LocalStorage' / 'GENERAL_DATA.bin'
 
+        system_settings = {
+            # "Image Quality": "Custom"
+            '3': 3,
+            # "High-Precision Character Animation": "Disabled"
+            '13162': 0,
+            # "Character Quality": "High"
+            '99': 1,
+        }
+        if self.applied_state.is_applied('GENERAL_DATA.bin', [config_path], system_settings):
+            return
+
+        Events.Fire(Events.Application.StatusUpdate(status=L('status_configuring_settings', 'Configuring in-game settings...')))
+
         settings_manager = SettingsManager(config_path)
 
         # Load settings from GENERAL_DATA.bin or initialize new settings container
         settings_manager.load_settings()
 
-        # Set "Image Quality" to "Custom"
-        settings_manager.set_system_setting('3', 3)
-        # Set "High-Precision Character Animation" to "Disabled"
-        settings_manager.set_system_setting('13162', 0)
-        # Set "Character Quality" to "High"
-        settings_manager.set_system_setting('99', 1)
+        for setting_id, value in system_settings.items():
+            settings_manager.set_system_setting(setting_id, value)
 
         # Write settings to GENERAL_DATA.bin
         settings_manager.save_settings()
 
+        self.applied_state.set_applied('GENERAL_DATA.bin', [config_path], system_settings)
+
 
 class SettingsManager:
     def __init__(self, config_path: Path):
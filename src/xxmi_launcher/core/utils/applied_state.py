@@ -0,0 +1,135 @@
+import json
+import hashlib
+import logging
+
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+import core.path_manager as Paths
+
+log = logging.getLogger(__name__)
+
+
+class AppliedStateLedger:
+    """
+    Persisted record of settings applied by game configurators and fingerprints of files they left behind
+    Configurator may skip its work when neither its settings nor its files changed since it was applied
+    """
+    # Bumped when format or meaning of records changes
+    format_version = 1
+
+    def __init__(self):
+        self.file_path: Optional[Path] = None
+        self.version: str = ''
+        # Configurator name -> {'settings': hash, 'files': {path: [size, mtime_ns, sha256] or None}}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.modified: bool = False
+        # Configurator name -> 'skipped' or 'applied', collected for single launch
+        self.report: Dict[str, str] = {}
+
+    def load(self, file_path: Path, version: str = ''):
+        """
+        Loads ledger from file, records made by other format or package version are discarded
+        """
+        self.file_path = file_path
+        self.version = f'{self.format_version}/{version}'
+        self.entries = {}
+        self.report = {}
+        self.modified = False
+        if not file_path.is_file():
+            return
+        try:
+            data = json.loads(Paths.App.read_text(file_path))
+            if data.get('version', None) == self.version:
+                self.entries = data['entries']
+        except Exception as e:
+            log.debug(f'Failed to load applied state {file_path}: {e}')
+
+    def save(self):
+        if not self.modified or self.file_path is None:
+            return
+        try:
+            Paths.verify_path(self.file_path.parent)
+            data = json.dumps({'version': self.version, 'entries': self.entries}, indent=2)
+            Paths.App.write_file(self.file_path, data, silent=True)
+            self.modified = False
+        except Exception as e:
+            log.debug(f'Failed to save applied state {self.file_path}: {e}')
+
+    @staticmethod
+    def get_settings_hash(settings: Any) -> str:
+        data = json.dumps(settings, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get_file_hash(path: Path) -> str:
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(1024 * 1024):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def get_fingerprint(self, path: Path) -> Optional[List]:
+        if not path.is_file():
+            return None
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns, self.get_file_hash(path)]
+
+    def is_file_unchanged(self, path: Path, fingerprint: Optional[List]) -> bool:
+        if not path.is_file():
+            return fingerprint is None
+        if fingerprint is None:
+            return False
+        stat = path.stat()
+        size, mtime_ns, file_hash = fingerprint
+        if stat.st_size != size:
+            return False
+        if stat.st_mtime_ns == mtime_ns:
+            return True
+        # File was touched, only content matters
+        if self.get_file_hash(path) != file_hash:
+            return False
+        fingerprint[1] = stat.st_mtime_ns
+        self.modified = True
+        return True
+
+    def is_applied(self, name: str, paths: List[Path], settings: Any) -> bool:
+        """
+        Checks if given settings were already applied and files weren't changed since
+        Check result is added to launch report, so configurator is expected to skip its work on True
+        """
+        entry = self.entries.get(name, None)
+        applied = False
+        if entry is not None and entry['settings'] == self.get_settings_hash(settings):
+            files = entry['files']
+            try:
+                applied = (set(files.keys()) == {str(path) for path in paths} and
+                           all(self.is_file_unchanged(path, files[str(path)]) for path in paths))
+            except Exception as e:
+                log.debug(f'Failed to verify {name} applied state: {e}')
+        if applied:
+            self.report[name] = 'skipped'
+        return applied
+
+    def set_applied(self, name: str, paths: List[Path], settings: Any):
+        """
+        Records settings and fingerprints of files written by configurator
+        """
+        try:
+            files = {str(path): self.get_fingerprint(path) for path in paths}
+        except Exception as e:
+            log.debug(f'Failed to record {name} applied state: {e}')
+            self.remove(name)
+        else:
+            self.entries[name] = {'settings': self.get_settings_hash(settings), 'files': files}
+            self.modified = True
+        self.report[name] = 'applied'
+
+    def remove(self, name: str):
+        if self.entries.pop(name, None) is not None:
+            self.modified = True
+
+    def get_report(self) -> str:
+        skipped = [name for name, result in self.report.items() if result == 'skipped']
+        applied = [name for name, result in self.report.items() if result == 'applied']
+        return f'skipped {len(skipped)} unchanged {skipped}, applied {len(applied)} {applied}'
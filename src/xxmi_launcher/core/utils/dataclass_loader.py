@@ -0,0 +1,122 @@
+import types
+import typing
+
+from dataclasses import fields, is_dataclass
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+
+class DataclassLoader:
+    """
+    Builds nested dataclass objects from JSON data in a single pass
+    Field converters are compiled once per type and reused by every following load
+    Unknown keys are ignored and missing keys fall back to field defaults
+    """
+    def __init__(self):
+        self.converters: Dict[Any, Callable[[Any], Any]] = {}
+        self.schemas: Dict[type, List[Tuple[str, Callable[[Any], Any]]]] = {}
+
+    def load(self, data_class: type, data: Dict[str, Any]) -> Any:
+        return self.get_converter(data_class)(data)
+
+    def get_converter(self, field_type: Any) -> Callable[[Any], Any]:
+        converter = self.converters.get(field_type, None)
+        if converter is None:
+            converter = self.compile_converter(field_type)
+            self.converters[field_type] = converter
+        return converter
+
+    def get_schema(self, data_class: type) -> List[Tuple[str, Callable[[Any], Any]]]:
+        schema = self.schemas.get(data_class, None)
+        if schema is None:
+            type_hints = typing.get_type_hints(data_class)
+            # Fields with 'init=False' contain app state data that isn't supposed to be loaded
+            schema = [(data_field.name, self.get_converter(type_hints[data_field.name]))
+                      for data_field in fields(data_class) if data_field.init]
+            self.schemas[data_class] = schema
+        return schema
+
+    def compile_converter(self, field_type: Any) -> Callable[[Any], Any]:
+        if field_type is Any:
+            return lambda value: value
+
+        if is_dataclass(field_type):
+            return self.compile_dataclass_converter(field_type)
+
+        origin = typing.get_origin(field_type)
+        args = typing.get_args(field_type)
+
+        if origin is Union or origin is types.UnionType:
+            return self.compile_union_converter(args)
+
+        if field_type is list or origin is list:
+            item_converter = self.get_converter(args[0]) if args else None
+
+            def convert_list(value):
+                if not isinstance(value, list):
+                    raise ValueError(f'expected list, got {type(value).__name__}')
+                if item_converter is None:
+                    return list(value)
+                return [item_converter(item) for item in value]
+            return convert_list
+
+        if field_type is dict or origin is dict:
+            value_converter = self.get_converter(args[1]) if args else None
+
+            def convert_dict(value):
+                if not isinstance(value, dict):
+                    raise ValueError(f'expected dict, got {type(value).__name__}')
+                if value_converter is None:
+                    return dict(value)
+                return {key: value_converter(item) for key, item in value.items()}
+            return convert_dict
+
+        if field_type is float:
+            def convert_float(value):
+                # JSON doesn't distinguish 1.0 from 1, so int is accepted for float field
+                if isinstance(value, float):
+                    return value
+                if isinstance(value, int) and not isinstance(value, bool):
+                    return float(value)
+                raise ValueError(f'expected float, got {type(value).__name__}')
+            return convert_float
+
+        if isinstance(field_type, type):
+            def convert_instance(value):
+                if not isinstance(value, field_type):
+                    raise ValueError(f'expected {field_type.__name__}, got {type(value).__name__}')
+                return value
+            return convert_instance
+
+        raise ValueError(f'unsupported field type {field_type}')
+
+    def compile_dataclass_converter(self, data_class: type) -> Callable[[Any], Any]:
+        def convert_dataclass(value):
+            if isinstance(value, data_class):
+                return value
+            if not isinstance(value, dict):
+                raise ValueError(f'expected dict for {data_class.__name__}, got {type(value).__name__}')
+            kwargs = {}
+            for name, converter in self.get_schema(data_class):
+                if name not in value:
+                    continue
+                try:
+                    kwargs[name] = converter(value[name])
+                except ValueError as e:
+                    raise ValueError(f'{data_class.__name__}.{name}: {e}') from None
+            return data_class(**kwargs)
+        return convert_dataclass
+
+    def compile_union_converter(self, args: Tuple[Any, ...]) -> Callable[[Any], Any]:
+        allow_none = type(None) in args
+        converters = [self.get_converter(arg) for arg in args if arg is not type(None)]
+
+        def convert_union(value):
+            if value is None and allow_none:
+                return None
+            for converter in converters:
+                try:
+                    return converter(value)
+                except ValueError:
+                    continue
+            raise ValueError(f'value {value!r} matches none of union types')
+        return convert_union
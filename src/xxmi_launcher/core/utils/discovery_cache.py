@@ -0,0 +1,106 @@
+import os
+import json
+import logging
+
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+import core.path_manager as Paths
+
+log = logging.getLogger(__name__)
+
+
+class DiscoveryCache:
+    """
+    Persisted results of game paths discovery in launchers metadata and game logs, shared by all importers
+    Results are stored per file and search signature, and stay valid while file size and mtime are unchanged
+    """
+    def __init__(self):
+        self.file_path: Optional[Path] = None
+        self.modified: bool = False
+        # File path -> {'size': int, 'mtime_ns': int, 'results': {signature: [paths]}}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        # Search root + file name -> {'dirs': {dir path: mtime_ns}, 'files': [paths]}
+        self.indexes: Dict[str, Dict[str, Any]] = {}
+
+    def load(self, file_path: Path):
+        self.file_path = file_path
+        self.modified = False
+        if not file_path.is_file():
+            return
+        try:
+            data = json.loads(Paths.App.read_text(file_path))
+            self.files = data['files']
+            self.indexes = data['indexes']
+        except Exception as e:
+            log.debug(f'Failed to load discovery cache {file_path}: {e}')
+
+    def save(self):
+        if not self.modified or self.file_path is None:
+            return
+        try:
+            Paths.verify_path(self.file_path.parent)
+            data = json.dumps({'files': self.files, 'indexes': self.indexes}, indent=2)
+            Paths.App.write_file(self.file_path, data, silent=True)
+            self.modified = False
+        except Exception as e:
+            log.debug(f'Failed to save discovery cache {self.file_path}: {e}')
+
+    @staticmethod
+    def get_stat(file_path: Path) -> Optional[os.stat_result]:
+        try:
+            return file_path.stat()
+        except OSError:
+            return None
+
+    def get_results(self, file_path: Path, signature: str, stat: Optional[os.stat_result]) -> Optional[List[str]]:
+        """
+        Returns cached results of given search in file, or None if file was changed or never searched this way
+        """
+        entry = self.files.get(str(file_path), None)
+        if entry is None:
+            return None
+        if stat is None:
+            # File is gone, its results are stale
+            del self.files[str(file_path)]
+            self.modified = True
+            return None
+        if entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            return None
+        return entry['results'].get(signature, None)
+
+    def set_results(self, file_path: Path, signature: str, stat: os.stat_result, results: List[str]):
+        entry = self.files.get(str(file_path), None)
+        if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            entry = self.files[str(file_path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'results': {}}
+        entry['results'][signature] = results
+        self.modified = True
+
+    def find_files(self, root_path: Path, file_name: str) -> List[Path]:
+        """
+        Returns paths of all files with given name in folder tree
+        Tree is walked again only if any of its folders changed, which costs single stat per folder
+        """
+        key = f'{root_path}|{file_name}'
+        index = self.indexes.get(key, None)
+        if index is not None:
+            if all(self.get_dir_mtime(Path(dir_path)) == mtime for dir_path, mtime in index['dirs'].items()):
+                return [Path(path) for path in index['files']]
+
+        # Root is recorded even if it doesn't exist yet, so index gets invalidated once it's created
+        dirs, files = {str(root_path): self.get_dir_mtime(root_path)}, []
+        if root_path.is_dir():
+            for root, dir_names, file_names in os.walk(root_path):
+                dirs[root] = self.get_dir_mtime(Path(root))
+                if file_name in file_names:
+                    files.append(str(Path(root) / file_name))
+        self.indexes[key] = {'dirs': dirs, 'files': files}
+        self.modified = True
+        return [Path(path) for path in files]
+
+    @staticmethod
+    def get_dir_mtime(dir_path: Path) -> Optional[int]:
+        try:
+            return dir_path.stat().st_mtime_ns
+        except OSError:
+            return None
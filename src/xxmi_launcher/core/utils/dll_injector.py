@@ -1,6 +1,5 @@
 import logging
 import time
-import psutil
 import subprocess
 import win32api
 
@@ -13,6 +12,12 @@ from enum import Enum
 
 from core.locale_manager import L, LocaleString
 
+import core.utils.tracer as Tracer
+
+from core.utils.lazy_import import lazy_import
+
+# Process list is only scanned on injection, it's not worth loading psutil during launcher startup
+psutil = lazy_import('psutil')
 
 log = logging.getLogger(__name__)
 
@@ -181,6 +186,7 @@ class DllInjector:
         if not bool(self.hook):
             raise ValueError(L('error_dll_injector_hook_is_null', 'Hook is NULL for {dll_path}!').format(dll_path=str(dll_path)))
 
+    @Tracer.traced()
     def wait_for_injection(self, timeout: int = 15) -> bool:
         if self.dll_path is None:
             raise ValueError(L('error_dll_injector_path_not_defined', 'Invalid injector usage: dll path is not defined!'))
@@ -1,13 +1,26 @@
-import requests
+import io
+import logging
+import re
+import json
+import time
 
-from typing import List, Optional
+from pathlib import Path
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from typing import List, Optional, Dict, Tuple
 from dataclasses import dataclass
 
 from dacite import from_dict
-from requests.exceptions import SSLError
 
 from core.locale_manager import L
 from core.utils.proxy import ProxyConfig, ProxyManager
+from core.utils.http_session import HttpSession, HttpSessionConfig
+from core.utils.lazy_import import lazy_import
+
+requests = lazy_import('requests')
+
+log = logging.getLogger(__name__)
 
 
 @dataclass
@@ -23,36 +36,166 @@ class ResponseRelease:
     assets: List[ResponseReleaseAsset]
 
 
+class HttpRangeFile(io.RawIOBase):
+    """
+    Read-only seekable file-like view of remote file, backed by HTTP Range requests
+    Allows zipfile to read central directory and selected members without downloading the whole archive
+    """
+    content_range_pattern = re.compile(r'bytes (\d+)-(\d+)/(\d+)')
+
+    def __init__(self, client: 'GitHubClient', url: str, read_ahead: int = 256*1024):
+        super().__init__()
+        self.client = client
+        self.url = url
+        self.read_ahead = read_ahead
+        self.position = 0
+        self.size = 0
+        self.downloaded_bytes = 0
+        self.buffer_start = 0
+        self.buffer = b''
+        # Request the very first byte to resolve redirects and get the total size
+        response = self.request_range(0, 0, follow_redirects=True)
+        self.url = response.url
+
+    def request_range(self, start: int, end: int, follow_redirects: bool = False):
+        headers = {'Range': f'bytes={start}-{end}'}
+        # Auth header is only relevant for GitHub itself, CDN redirect targets are pre-signed
+        is_mirror_url = self.client.is_mirror_url(self.url)
+        if follow_redirects and self.client.access_token and not is_mirror_url:
+            headers['Authorization'] = f'token {self.client.access_token}'
+        response = self.client.http.get(
+            url=self.url,
+            headers=headers,
+            proxies=self.client.proxy_manager.proxies if not is_mirror_url else {},
+            verify=self.client.verify_ssl,
+            timeout=10,
+        )
+        if response.status_code != 206:
+            raise ValueError(f'Server does not support range requests (status {response.status_code})!')
+        result = self.content_range_pattern.findall(response.headers.get('content-range', ''))
+        if len(result) != 1:
+            raise ValueError(f'Failed to parse Content-Range header of range response!')
+        self.size = int(result[0][2])
+        self.downloaded_bytes += len(response.content)
+        return response
+
+    def prefetch(self, start: int, end: int):
+        start, end = max(0, start), min(end, self.size - 1)
+        if start > end:
+            return
+        if self.buffer_start <= start and end < self.buffer_start + len(self.buffer):
+            return
+        self.buffer = self.request_range(start, end).content
+        self.buffer_start = start
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        else:
+            raise ValueError(f'Invalid whence value: {whence}')
+        return self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.size - self.position
+        size = min(size, self.size - self.position)
+        if size <= 0:
+            return b''
+        end = self.position + size - 1
+        if not (self.buffer_start <= self.position and end < self.buffer_start + len(self.buffer)):
+            self.prefetch(self.position, max(end, self.position + self.read_ahead - 1))
+        offset = self.position - self.buffer_start
+        data = self.buffer[offset:offset + size]
+        self.position += len(data)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
 class GitHubClient:
     def __init__(self):
         self.proxy_manager = ProxyManager()
+        self.http = HttpSession()
         self.access_token = ''
         self.verify_ssl = False
+        self.mirror_source = ''
 
-    def configure(self, access_token: Optional[str], verify_ssl: Optional[bool], proxy_config: Optional[ProxyConfig]):
+    def configure(self, access_token: Optional[str], verify_ssl: Optional[bool], proxy_config: Optional[ProxyConfig],
+                  mirror_source: Optional[str] = None, http_config: Optional[HttpSessionConfig] = None):
         if access_token is not None:
             self.access_token = access_token.strip()
         if verify_ssl is not None:
             self.verify_ssl = verify_ssl
         if proxy_config is not None:
             self.proxy_manager.configure(proxy_config)
+        if mirror_source is not None:
+            self.mirror_source = mirror_source.strip().rstrip('/\\')
+        if http_config is not None:
+            self.http.configure(http_config)
+
+    def is_mirror_url(self, url: str) -> bool:
+        return url.startswith('file:') or (self.mirror_source != '' and url.startswith(self.mirror_source))
+
+    def get_mirror_url(self, repo_owner, repo_name, file_name) -> str:
+        """
+        Mirror layout: `<mirror_source>/<repo_owner>/<repo_name>/release.json` with release assets stored alongside
+        Mirror source is either plain HTTP(S) base url or local (network) directory
+        """
+        if self.mirror_source.startswith(('http://', 'https://')):
+            return f'{self.mirror_source}/{repo_owner}/{repo_name}/{file_name}'
+        else:
+            return (Path(self.mirror_source) / repo_owner / repo_name / file_name).resolve().as_uri()
+
+    def fetch_mirror_release(self, repo_owner, repo_name) -> ResponseRelease:
+        data = self.download_data(self.get_mirror_url(repo_owner, repo_name, 'release.json'))
+        response = from_dict(data_class=ResponseRelease, data=json.loads(data.decode('utf-8')))
+        # Mirrored assets are referenced by file names relative to release.json
+        for asset in response.assets:
+            asset.browser_download_url = self.get_mirror_url(repo_owner, repo_name, asset.browser_download_url)
+        return response
 
     def fetch_latest_release(self, repo_owner, repo_name,
                              asset_version_pattern, asset_name_format, signature_pattern=None, pre_release=False):
-        headers = {}
+        response = self.fetch_release(repo_owner, repo_name, pre_release=pre_release)
+        return self.parse_release(response, asset_version_pattern, asset_name_format, signature_pattern)
+
+    def fetch_release(self, repo_owner, repo_name, pre_release=False) -> ResponseRelease:
+        if self.mirror_source:
+            try:
+                return self.fetch_mirror_release(repo_owner, repo_name)
+            except Exception as e:
+                log.debug(f'Failed to fetch {repo_owner}/{repo_name} release from mirror, falling back to GitHub: {e}')
+
+        headers = {'Accept': 'application/vnd.github+json', 'Accept-Encoding': 'gzip, deflate'}
 
         if self.access_token:
             headers['Authorization'] = f'token {self.access_token}'
 
         try:
-            response = requests.get(
+            response = self.http.get(
                 url=f'https://api.github.com/repos/{repo_owner}/{repo_name}/releases{"/latest" if not pre_release else ""}',
                 headers=headers,
                 proxies=self.proxy_manager.proxies,
                 timeout=10,
                 verify=self.verify_ssl
             ).json()
-        except SSLError as e:
+        except requests.exceptions.SSLError as e:
             raise ValueError(L('error_ssl_certificate_validation_failed', """
                  Failed to validate SSL certificate of GitHub HTTPS connection!
                  
@@ -87,6 +230,115 @@ class GitHubClient:
         except Exception as e:
             raise ValueError(L('error_github_parse_response_failed', 'Failed to parse GitHub response!')) from e
 
+        return response
+
+    def fetch_latest_releases(self, repos: Dict[str, Tuple[str, str]], pre_release=False) -> Dict[str, ResponseRelease]:
+        """
+        Fetches latest releases of multiple repositories with a single GraphQL request (requires access token)
+        Returns dict of releases mapped to keys of `repos` dict, repos without releases are omitted
+        """
+        if not self.access_token:
+            raise ValueError('GitHub GraphQL API requires access token!')
+
+        query, variables = self.build_releases_query(repos, pre_release)
+
+        try:
+            response = self.http.post(
+                url='https://api.github.com/graphql',
+                headers={'Authorization': f'bearer {self.access_token}', 'Accept-Encoding': 'gzip, deflate'},
+                json={'query': query, 'variables': variables},
+                proxies=self.proxy_manager.proxies,
+                timeout=10,
+                verify=self.verify_ssl
+            ).json()
+        except requests.exceptions.SSLError as e:
+            raise ValueError(L('error_ssl_certificate_validation_failed', """
+                 Failed to validate SSL certificate of GitHub HTTPS connection!
+                 
+                 If you trust your proxy, uncheck *Verify SSL* in *Launcher Settings* and try again.
+            """)) from e
+        except Exception as e:
+            raise ValueError(L('error_github_connection_failed', """
+                 Failed to establish HTTPS connection to GitHub!
+                 
+                 Please check your Antivirus, Firewall, Proxy and VPN settings.
+            """)) from e
+
+        return self.parse_releases_response(response, list(repos.keys()), pre_release)
+
+    @staticmethod
+    def build_releases_query(repos: Dict[str, Tuple[str, str]], pre_release=False) -> Tuple[str, Dict[str, str]]:
+        release_fields = 'tagName description releaseAssets(first: 100) { nodes { name downloadUrl } }'
+        if pre_release:
+            # Same order as REST `/releases` endpoint: the most recent release, including pre-releases
+            release_query = f'releases(first: 1, orderBy: {{field: CREATED_AT, direction: DESC}}) {{ nodes {{ {release_fields} }} }}'
+        else:
+            release_query = f'latestRelease {{ {release_fields} }}'
+
+        arguments, repo_queries, variables = [], [], {}
+        for repo_id, (repo_owner, repo_name) in enumerate(repos.values()):
+            arguments.append(f'$owner{repo_id}: String!, $name{repo_id}: String!')
+            repo_queries.append(f'repo{repo_id}: repository(owner: $owner{repo_id}, name: $name{repo_id}) {{ {release_query} }}')
+            variables[f'owner{repo_id}'] = repo_owner
+            variables[f'name{repo_id}'] = repo_name
+
+        query = f'query({", ".join(arguments)}) {{ {" ".join(repo_queries)} }}'
+
+        return query, variables
+
+    @staticmethod
+    def parse_releases_response(response: dict, repo_keys: List[str], pre_release=False) -> Dict[str, ResponseRelease]:
+        if not isinstance(response, dict):
+            raise ValueError(L('error_github_parse_response_failed', 'Failed to parse GitHub response!'))
+
+        message, status = response.get('message', None), response.get('status', 0)
+        if message is not None:
+            message = message.lower()
+            if 'rate limit' in message:
+                raise ConnectionRefusedError(L('error_github_rate_limit_exceeded', 'GitHub API rate limit exceeded!'))
+            elif 'bad credentials' in message or int(status) == 401:
+                raise ConnectionError(L('error_github_invalid_token', """
+                     GitHub Personal Access Token is invalid!
+                     
+                     Please configure correct token in launcher settings.
+                """))
+
+        for error in response.get('errors', None) or []:
+            if error.get('type', '') == 'RATE_LIMITED':
+                raise ConnectionRefusedError(L('error_github_rate_limit_exceeded', 'GitHub API rate limit exceeded!'))
+
+        data = response.get('data', None)
+        if data is None:
+            raise ValueError(L('error_github_parse_response_failed', 'Failed to parse GitHub response!'))
+
+        releases = {}
+        for repo_id, repo_key in enumerate(repo_keys):
+            # Repository is null if it's not found or not accessible
+            repository = data.get(f'repo{repo_id}', None)
+            if repository is None:
+                continue
+            if pre_release:
+                release = (repository.get('releases', None) or {}).get('nodes', None) or [None]
+                release = release[0]
+            else:
+                release = repository.get('latestRelease', None)
+            if release is None:
+                continue
+            try:
+                releases[repo_key] = ResponseRelease(
+                    tag_name=release['tagName'],
+                    body=release['description'] or '',
+                    assets=[
+                        ResponseReleaseAsset(name=asset['name'], browser_download_url=asset['downloadUrl'])
+                        for asset in release['releaseAssets']['nodes']
+                    ],
+                )
+            except Exception as e:
+                raise ValueError(L('error_github_parse_response_failed', 'Failed to parse GitHub response!')) from e
+
+        return releases
+
+    def parse_release(self, response: ResponseRelease, asset_version_pattern, asset_name_format, signature_pattern=None):
         result = asset_version_pattern.findall(response.tag_name)
         if len(result) != 1:
             raise ValueError(L('error_github_parse_version_failed', 'Failed to parse latest release version!'))
@@ -117,35 +369,89 @@ class GitHubClient:
 
         return version, asset_download_url, signature, release_notes, manifest_download_url
 
-    def download_data(self, url, block_size=4096, update_progress_callback=None):
+    def download_data(self, url, block_size=4096, update_progress_callback=None, bandwidth_limit=0):
+        """
+        Downloads data from given url, `bandwidth_limit` (bytes per second) throttles download if it's above 0
+        """
+        if url.startswith('file:'):
+            return self.read_local_data(url, block_size, update_progress_callback)
+
         headers = {}
 
-        if self.access_token:
+        # Never leak access token to mirror, also mirrors are expected to be reachable without proxy
+        is_mirror_url = self.is_mirror_url(url)
+
+        if self.access_token and not is_mirror_url:
             headers['Authorization'] = f'token {self.access_token}'
 
-        response = requests.get(
+        response = self.http.get(
             url=url,
             headers=headers,
-            proxies=self.proxy_manager.proxies,
+            proxies=self.proxy_manager.proxies if not is_mirror_url else {},
             verify=self.verify_ssl,
             timeout=10,
             stream=True
         )
 
+        if is_mirror_url:
+            response.raise_for_status()
+
         downloaded_bytes = 0
         total_bytes = int(response.headers.get("content-length", 0))
         if update_progress_callback is not None:
             update_progress_callback(downloaded_bytes, total_bytes)
 
+        start_time = time.monotonic()
+
         data = bytearray()
         for block_data in response.iter_content(block_size):
             data += block_data
             downloaded_bytes += len(block_data)
             if update_progress_callback is not None:
                 update_progress_callback(downloaded_bytes, total_bytes)
+            if bandwidth_limit > 0:
+                # Sleep until average download speed fits into the budget
+                delay = downloaded_bytes / bandwidth_limit - (time.monotonic() - start_time)
+                if delay > 0:
+                    time.sleep(delay)
+
+        self.http.log_timings(response, downloaded_bytes)
 
         return data
 
+    @staticmethod
+    def get_local_path(url) -> Path:
+        """
+        Returns path of local file url, url of network share file keeps its server name: `file://server/share/...`
+        """
+        parsed_url = urlparse(url)
+        path = parsed_url.path
+        if parsed_url.netloc not in ('', 'localhost'):
+            path = f'//{parsed_url.netloc}{path}'
+        return Path(url2pathname(path))
+
+    @staticmethod
+    def read_local_data(url, block_size=4096, update_progress_callback=None):
+        file_path = GitHubClient.get_local_path(url)
+
+        downloaded_bytes = 0
+        total_bytes = file_path.stat().st_size
+        if update_progress_callback is not None:
+            update_progress_callback(downloaded_bytes, total_bytes)
+
+        data = bytearray()
+        with open(file_path, 'rb') as f:
+            while block_data := f.read(max(block_size, 1024*1024)):
+                data += block_data
+                downloaded_bytes += len(block_data)
+                if update_progress_callback is not None:
+                    update_progress_callback(downloaded_bytes, total_bytes)
+
+        return data
+
+    def open_range_file(self, url) -> HttpRangeFile:
+        return HttpRangeFile(self, url)
+
     def parse_release_notes(self, body) -> str:
         # Skip warning section header to exclude it from search
         body = body.replace('## Warning', '')
@@ -0,0 +1,92 @@
+import time
+import threading
+
+from typing import Dict
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool
+
+
+class ConnectionTimings(threading.local):
+    """
+    Per-thread storage of connection establishment timings of the last request
+    Timings stay empty when request reuses pooled keep-alive connection
+    """
+    def __init__(self):
+        self.timed = False
+        self.tcp = None
+        self.tls = None
+
+    def reset(self):
+        # Set once request gets connection from timed pool, so reused connections can be told from untimed ones
+        self.timed = False
+        self.tcp = None
+        self.tls = None
+
+
+connection_timings = ConnectionTimings()
+
+
+class TimedConnectionMixin:
+    def _new_conn(self):
+        # Includes DNS resolution (done by proxy for SOCKS), urllib3 doesn't expose it separately
+        start_time = time.perf_counter()
+        sock = super()._new_conn()
+        connection_timings.tcp = time.perf_counter() - start_time
+        return sock
+
+    def connect(self):
+        start_time = time.perf_counter()
+        super().connect()
+        if isinstance(self, HTTPSConnection):
+            # Also includes CONNECT tunnel setup for HTTP(S) proxy
+            connection_timings.tls = time.perf_counter() - start_time - (connection_timings.tcp or 0)
+
+
+class TimedConnectionPoolMixin:
+    def _get_conn(self, *args, **kwargs):
+        connection_timings.timed = True
+        return super()._get_conn(*args, **kwargs)
+
+
+# Stock pool class -> its timed subclass
+timed_pool_classes: Dict[type, type] = {}
+
+
+def get_timed_pool_class(pool_class: type) -> type:
+    """
+    Returns subclass of given connection pool class collecting timings of its connections
+    Works for direct, HTTP(S) proxy and SOCKS proxy pools alike, as they only differ by connection class
+    """
+    if issubclass(pool_class, TimedConnectionPoolMixin) or not issubclass(pool_class, HTTPConnectionPool):
+        return pool_class
+    timed_pool_class = timed_pool_classes.get(pool_class, None)
+    if timed_pool_class is None:
+        connection_class = pool_class.ConnectionCls
+        timed_connection_class = type(f'Timed{connection_class.__name__}', (TimedConnectionMixin, connection_class), {})
+        timed_pool_class = type(f'Timed{pool_class.__name__}', (TimedConnectionPoolMixin, pool_class), {
+            'ConnectionCls': timed_connection_class,
+        })
+        timed_pool_classes[pool_class] = timed_pool_class
+    return timed_pool_class
+
+
+def install_timed_pool_classes(manager):
+    manager.pool_classes_by_scheme = {
+        scheme: get_timed_pool_class(pool_class) for scheme, pool_class in manager.pool_classes_by_scheme.items()
+    }
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        install_timed_pool_classes(self.poolmanager)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        # Proxy managers (including SOCKS one) are created lazily per proxy with their own pool classes
+        is_new = proxy not in self.proxy_manager
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        if is_new:
+            install_timed_pool_classes(manager)
+        return manager
@@ -0,0 +1,107 @@
+import logging
+import time
+
+from typing import Optional
+from dataclasses import dataclass, replace
+from threading import Lock
+
+from core.utils.lazy_import import lazy_import
+
+# Importing requests stack takes ~100ms, which is wasted for entry points that never go online
+requests = lazy_import('requests')
+http_adapters = lazy_import('core.utils.http_adapters')
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class HttpSessionConfig:
+    max_retries: int = 3
+    retry_backoff: float = 0.5
+    pool_size: int = 4
+
+
+class HttpSession:
+    """
+    Pooled keep-alive session with retries of idempotent requests and per-request timing logs
+    Underlying requests session is created on first request
+    """
+    def __init__(self):
+        self._session: Optional['requests.Session'] = None
+        self.cfg = HttpSessionConfig()
+        self.lock = Lock()
+
+    @property
+    def session(self) -> 'requests.Session':
+        if self._session is None:
+            with self.lock:
+                if self._session is None:
+                    session = requests.Session()
+                    self.mount_adapters(session)
+                    self._session = session
+        return self._session
+
+    def configure(self, cfg: HttpSessionConfig):
+        """
+        Applies copy of given config, adapters are remounted only if it differs from the current one
+        """
+        with self.lock:
+            if cfg == self.cfg:
+                return
+            self.cfg = replace(cfg)
+            if self._session is not None:
+                self.mount_adapters(self._session)
+
+    def mount_adapters(self, session: 'requests.Session'):
+        from urllib3.util.retry import Retry
+        retry = Retry(
+            total=max(0, self.cfg.max_retries),
+            backoff_factor=max(0.0, self.cfg.retry_backoff),
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=['GET', 'HEAD'],
+            raise_on_status=False,
+        )
+        adapter = http_adapters.TimedHTTPAdapter(pool_connections=self.cfg.pool_size, pool_maxsize=self.cfg.pool_size,
+                                                 max_retries=retry)
+        old_adapters = {session.adapters.get(prefix, None) for prefix in ('https://', 'http://')}
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        # Release connections of replaced pool
+        for old_adapter in old_adapters:
+            if old_adapter is not None:
+                old_adapter.close()
+
+    def request(self, method: str, url: str, **kwargs) -> 'requests.Response':
+        session = self.session
+        connection_timings = http_adapters.connection_timings
+        connection_timings.reset()
+        start_time = time.perf_counter()
+        response = session.request(method, url, **kwargs)
+        # Connection is established by the time headers are received, even for streamed responses
+        response.connection_timings = (connection_timings.timed, connection_timings.tcp, connection_timings.tls)
+        response.start_time = start_time
+        if not kwargs.get('stream', False):
+            self.log_timings(response, len(response.content))
+        return response
+
+    def get(self, url: str, **kwargs) -> 'requests.Response':
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> 'requests.Response':
+        return self.request('POST', url, **kwargs)
+
+    @staticmethod
+    def log_timings(response: 'requests.Response', size: int):
+        timed, tcp, tls = getattr(response, 'connection_timings', (False, None, None))
+        total = time.perf_counter() - getattr(response, 'start_time', time.perf_counter())
+        if not timed:
+            connect = 'unknown'
+        elif tcp is None:
+            connect = 'reused'
+        else:
+            connect = f'tcp {tcp:.3f}s'
+            if tls is not None:
+                connect += f', tls {tls:.3f}s'
+        encoding = response.headers.get('content-encoding', 'identity')
+        log.debug(f'{response.request.method} {response.url.split("?")[0]}: {response.status_code}, connect: {connect}, '
+                  f'first byte: {response.elapsed.total_seconds():.3f}s, total: {total:.3f}s, {size} bytes ({encoding})')
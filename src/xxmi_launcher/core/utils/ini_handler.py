@@ -1,8 +1,9 @@
 import re
 import logging
+import difflib
 
 from dataclasses import dataclass, field
-from typing import Dict, Union
+from typing import Dict, List, Union, Optional, Tuple
 from pathlib import Path
 
 log = logging.getLogger(__name__)
@@ -15,6 +16,105 @@ class IniHandlerSettings:
     inline_comments: bool = False
     add_section_spacing: bool = False
     right_split: bool = False
+    # Keeps original lines and applies changes as line edits, so untouched parts of file stay byte-identical
+    # Formatting options above are used only for added lines
+    lossless: bool = False
+
+
+class IniLine:
+    """
+    Original or added line of lossless ini document
+    """
+    __slots__ = ('text', 'value_span', 'inserted')
+
+    def __init__(self, text: str, value_span: Optional[Tuple[int, int]] = None):
+        # Line text with line break, None for removed line
+        self.text: Optional[str] = text
+        # Position of option value in text
+        self.value_span = value_span
+        # Lines added after this one
+        self.inserted: List['IniLine'] = []
+
+    def set_value(self, value: str):
+        start, end = self.value_span
+        self.text = self.text[:start] + value + self.text[end:]
+        self.value_span = (start, start + len(value))
+
+    def set_inline_comment(self, comment: str):
+        end = self.value_span[1]
+        line_break = self.text[len(self.text.rstrip('\r\n')):]
+        self.text = f'{self.text[:end]} ; {comment}{line_break}'
+
+
+class IniDocument:
+    """
+    Line model of lossless ini, added lines are attached to existing ones to keep original lines order intact
+    """
+    def __init__(self, cfg: IniHandlerSettings, lines: List[str]):
+        self.cfg = cfg
+        self.lines = [IniLine(line) for line in lines]
+        self.original_text = ''.join(lines)
+        # Line break of added lines follows the first one found in the file
+        self.newline = '\n'
+        for line in lines:
+            if line.endswith('\r\n'):
+                self.newline = '\r\n'
+                break
+            if line.endswith('\n'):
+                break
+
+    def iter_lines(self, lines: List[IniLine]):
+        for line in lines:
+            yield line
+            if line.inserted:
+                yield from self.iter_lines(line.inserted)
+
+    def to_string(self) -> str:
+        return ''.join([line.text for line in self.iter_lines(self.lines) if line.text is not None])
+
+    def is_modified(self) -> bool:
+        return self.to_string() != self.original_text
+
+    def get_diff(self) -> List[str]:
+        diff = difflib.unified_diff(self.original_text.splitlines(), self.to_string().splitlines(), lineterm='', n=0)
+        # Skip file names header
+        return list(diff)[2:]
+
+    def format_option(self, name: str, value: str, inline_comment: Optional[str] = None) -> IniLine:
+        separator = ' = ' if self.cfg.option_value_spacing else '='
+        start = len(name) + len(separator)
+        text = f'{name}{separator}{value}'
+        if inline_comment:
+            text += f' ; {inline_comment}'
+        return IniLine(text + self.newline, (start, start + len(value)))
+
+    def insert_line(self, anchor: IniLine, line: IniLine):
+        # Anchor may be the last line of file without line break
+        if anchor.text is not None and not anchor.inserted and not anchor.text.endswith(('\n', '\r')):
+            anchor.text += self.newline
+        anchor.inserted.append(line)
+
+    def insert_line_before(self, anchor: IniLine, line: IniLine):
+        lines = self.find_owner(self.lines, anchor)
+        lines.insert(lines.index(anchor), line)
+
+    def find_owner(self, lines: List[IniLine], line: IniLine) -> Optional[List[IniLine]]:
+        if line in lines:
+            return lines
+        for owner_line in lines:
+            if owner_line.inserted:
+                owner = self.find_owner(owner_line.inserted, line)
+                if owner is not None:
+                    return owner
+        return None
+
+    def append_line(self, line: IniLine):
+        for last_line in reversed(list(self.iter_lines(self.lines))):
+            if last_line.text is not None:
+                if not last_line.text.endswith(('\n', '\r')):
+                    last_line.text += self.newline
+                break
+        self.lines.append(line)
 
 
 class IniHandlerSection:
@@ -22,89 +122,144 @@ class IniHandlerSection:
         self.name = name
         self.comments = comments
         self.options = []
+        # Lowercase option name -> ascending positions of options with this name in `options` list
+        self.index: Dict[str, List[int]] = {}
         self.modified = False
+        # Lossless mode: document lines of options (in `options` order), all section lines and insertion point
+        self.document: Optional[IniDocument] = None
+        self.option_lines: List[Optional[IniLine]] = []
+        # Lossless mode: comment lines preceding option lines (in `options` order)
+        self.comment_lines: List[List[IniLine]] = []
+        self.lines: List[IniLine] = []
+        self.anchor_line: Optional[IniLine] = None
+
+    def build_index(self):
+        self.index = {}
+        for option_id, option in enumerate(self.options):
+            self.index.setdefault(option[0].lower(), []).append(option_id)
+
+    def append_option(self, option: tuple, line: Optional[IniLine] = None, comment_lines: Optional[List[IniLine]] = None):
+        if line is None and self.document is not None:
+            line, comment_lines = self.add_option_line(*option)
+        self.index.setdefault(option[0].lower(), []).append(len(self.options))
+        self.options.append(option)
+        self.option_lines.append(line)
+        self.comment_lines.append(comment_lines or [])
+
+    def add_option_line(self, name, value, modified, comments, inline_comment) -> Tuple[IniLine, List[IniLine]]:
+        # Comments are only passed for new options by callers, as parsed ones are already in the document
+        comment_lines = self.format_comments(comments or [])
+        for comment_line in comment_lines:
+            self.document.insert_line(self.anchor_line, comment_line)
+        line = self.document.format_option(name, value, inline_comment)
+        self.document.insert_line(self.anchor_line, line)
+        self.lines.append(line)
+        return line, comment_lines
+
+    def format_comments(self, comments: List[str]) -> List[IniLine]:
+        comment_lines = [IniLine(comment.rstrip('\r\n') + self.document.newline) for comment in comments]
+        self.lines.extend(comment_lines)
+        return comment_lines
+
+    def set_comment_lines(self, option_id: int, comments: List[str]):
+        # Comments of existing option replace all lines between it and previous option, same as in `to_string`
+        for comment_line in self.comment_lines[option_id]:
+            comment_line.text = None
+        comment_lines = self.format_comments(comments)
+        for comment_line in comment_lines:
+            self.document.insert_line_before(self.option_lines[option_id], comment_line)
+        self.comment_lines[option_id] = comment_lines
 
     def get_option(self, name, cast_type=str):
-        for (option_name, option_value, modified, comments, inline_comment) in self.options:
-            if option_name.lower() == name.lower():
-                if cast_type == str:
-                    return str(option_value)
-                elif cast_type == int:
-                    return int(option_value)
-                elif cast_type == float:
-                    return float(option_value)
+        option_ids = self.index.get(name.lower(), None)
+        if not option_ids:
+            return None
+        option_value = self.options[option_ids[0]][1]
+        if cast_type == str:
+            return str(option_value)
+        elif cast_type == int:
+            return int(option_value)
+        elif cast_type == float:
+            return float(option_value)
         return None
 
     def get_option_values(self, name):
-        result = {}
-        for option_id, (option_name, option_value, modified, comments, inline_comment) in enumerate(self.options):
-            if option_name.lower() == name.lower():
-                result[option_id] = option_value
-        return result
+        return {option_id: self.options[option_id][1] for option_id in self.index.get(name.lower(), [])}
 
     def set_option(self, name, value, flag_modified=True, overwrite=True, comments=None, inline_comment=None):
         if overwrite:
-            for i, (option_name, option_value, modified, default_comments, default_inline_comment) in enumerate(self.options):
-                if option_name.lower() == name.lower():
-                    if str(value) == option_value:
-                        return
-                    if comments is not None:
-                        default_comments = comments
-                    if inline_comment:
-                        default_inline_comment = inline_comment
-                    if flag_modified and not modified:
-                        modified = True
-                    self.options[i] = (name, str(value), modified, default_comments, default_inline_comment)
-                    if modified:
-                        self.modified = True
+            option_ids = self.index.get(name.lower(), None)
+            if option_ids:
+                i = option_ids[0]
+                option_name, option_value, modified, default_comments, default_inline_comment = self.options[i]
+                comments_changed = comments is not None and comments != default_comments
+                inline_comment_changed = bool(inline_comment) and inline_comment != default_inline_comment
+                if str(value) == option_value and not comments_changed and not inline_comment_changed:
                     return
-            self.options.append((name, str(value), flag_modified, comments, inline_comment))
-            if flag_modified:
-                self.modified = True
-        else:
-            self.options.append((name, str(value), flag_modified, comments, inline_comment))
-            if flag_modified:
-                self.modified = True
+                if comments_changed:
+                    default_comments = comments
+                if inline_comment_changed:
+                    default_inline_comment = inline_comment
+                if flag_modified and not modified:
+                    modified = True
+                self.options[i] = (name, str(value), modified, default_comments, default_inline_comment)
+                line = self.option_lines[i]
+                if line is not None:
+                    # Original name case and formatting are kept in lossless mode
+                    line.set_value(str(value))
+                    if comments_changed:
+                        self.set_comment_lines(i, comments)
+                    if inline_comment_changed:
+                        line.set_inline_comment(inline_comment)
+                if modified:
+                    self.modified = True
+                return
+        self.append_option((name, str(value), flag_modified, comments, inline_comment))
+        if flag_modified:
+            self.modified = True
 
     def remove_option(self, name, value=None, not_equal=False):
+        # Unlike lookups, removal matches option names case-sensitively
+        option_ids = [option_id for option_id in self.index.get(name.lower(), []) if self.options[option_id][0] == name]
         if value is None:
             # Filter out all options with given name
-            filter_func = lambda option: option[0] != name
+            removed_ids = option_ids
+        elif not_equal:
+            # Filter out all options with given name but different value
+            # Useful to make sure that section doesn't contain duplicate options with different values
+            removed_ids = [option_id for option_id in option_ids if self.options[option_id][1] != str(value)]
         else:
-            if not_equal:
-                # Filter out all options with given name but different value
-                # Useful to make sure that section doesn't contain duplicate options with different values
-                filter_func = lambda option: option[0] != name or (option[0] == name and option[1] == str(value))
-            else:
-                # Filter out all options with given name and same value
-                # Useful when ini contains multiple option with same name (deviates from classic format)
-                filter_func = lambda option: option[0] != name or (option[0] == name and option[1] != str(value))
-
-        options = list(filter(filter_func, self.options))
-
-        if len(options) != len(self.options):
-            self.options = options
+            # Filter out all options with given name and same value
+            # Useful when ini contains multiple option with same name (deviates from classic format)
+            removed_ids = [option_id for option_id in option_ids if self.options[option_id][1] == str(value)]
+
+        if removed_ids:
+            removed_ids = set(removed_ids)
+            for option_id in removed_ids:
+                if self.option_lines[option_id] is not None:
+                    # Line is kept as removed, as it may still be insertion point of added options
+                    self.option_lines[option_id].text = None
+            self.options = [option for option_id, option in enumerate(self.options) if option_id not in removed_ids]
+            self.option_lines = [line for option_id, line in enumerate(self.option_lines) if option_id not in removed_ids]
+            self.comment_lines = [lines for option_id, lines in enumerate(self.comment_lines) if option_id not in removed_ids]
+            self.build_index()
             self.modified = True
 
     def to_string(self, cfg: IniHandlerSettings):
-        result = ''
+        result = []
         if self.comments is None:
-            result += '\n'
+            result.append('\n')
         else:
-            for comment in self.comments:
-                result += comment
-        result += f'[{self.name}]' + '\n'
+            result.extend(self.comments)
+        result.append(f'[{self.name}]\n')
+        separator = ' = ' if cfg.option_value_spacing else '='
         for (option_name, option_value, modified, comments, inline_comment) in self.options:
             if comments is not None:
-                for comment in comments:
-                    result += comment
+                result.extend(comments)
             if inline_comment:
                 option_value += f' ; {inline_comment}'
-            if cfg.option_value_spacing:
-                result += f'{option_name} = {option_value}' + '\n'
-            else:
-                result += f'{option_name}={option_value}' + '\n'
-        return result
+            result.append(f'{option_name}{separator}{option_value}\n')
+        return ''.join(result)
 
     def __repr__(self):
         return self.name
@@ -115,8 +270,9 @@ class IniHandler:
         self.cfg = cfg
         self.sections = None
         self.footer_comments = []
+        self.document: Optional[IniDocument] = None
         if isinstance(data, str):
-            data = data.splitlines()
+            data = data.splitlines(keepends=cfg.lossless)
         if isinstance(data, list):
             self.from_text(data)
         else:
@@ -137,34 +293,54 @@ class IniHandler:
         self.sections = {}
         current_section = None
         current_comments = []
+        # Lossless mode: lines since the last option, they belong to the next section if it starts before next option
+        pending_lines = []
+
+        if self.cfg.lossless:
+            self.document = IniDocument(self.cfg, lines)
 
         for line_id, line in enumerate(lines):
             stripped_line = line.rstrip()
+            document_line = self.document.lines[line_id] if self.document is not None else None
 
-            result = section_pattern.findall(stripped_line)
-            if len(result) == 1:
-                current_section = self.get_section(result[0])
+            # Cheap checks go first, as most lines are neither sections nor options
+            result = section_pattern.match(stripped_line) if stripped_line.startswith('[') else None
+            if result is not None:
+                current_section = self.get_section(result.group(1))
                 if current_section is None:
-                    current_section = self.add_section(result[0], comments=current_comments)
+                    current_section = self.add_section(result.group(1), comments=current_comments, line=document_line)
                     current_comments = []
+                if document_line is not None:
+                    current_section.lines.extend(pending_lines)
+                    current_section.lines.append(document_line)
+                    pending_lines = []
                 continue
 
-            result = option_pattern.findall(stripped_line)
-            if len(result) == 1 and current_section is not None:
-                result = result[0]
-                if len(result) == 2:
-                    option = result[0].rstrip()
-                    value = result[1].strip()
-                    inline_comment = None
-                    if self.cfg.inline_comments:
-                        split_pos = value.find(';')
-                        if split_pos != -1:
-                            inline_comment = value[split_pos+1:].strip()
-                            value = value[:split_pos].rstrip()
-                    current_section.set_option(option, value, flag_modified=False, overwrite=False,
-                                               comments=current_comments, inline_comment=inline_comment)
-
-                    current_comments = []
+            if document_line is not None:
+                pending_lines.append(document_line)
+
+            result = option_pattern.match(stripped_line) if '=' in stripped_line else None
+            if result is not None and current_section is not None:
+                option = result.group(1).rstrip()
+                value = result.group(2).strip()
+                inline_comment = None
+                if self.cfg.inline_comments:
+                    split_pos = value.find(';')
+                    if split_pos != -1:
+                        inline_comment = value[split_pos+1:].strip()
+                        value = value[:split_pos].rstrip()
+                comment_lines = None
+                if document_line is not None:
+                    document_line.value_span = (result.start(2), result.start(2) + len(value))
+                    current_section.anchor_line = document_line
+                    current_section.lines.extend(pending_lines)
+                    # Lines since previous option or section header are comments of this option
+                    comment_lines = pending_lines[:-1]
+                    pending_lines = []
+                current_section.append_option((option, value, False, current_comments, inline_comment),
+                                              document_line, comment_lines)
+
+                current_comments = []
                 continue
 
             if not self.cfg.ignore_comments:
@@ -173,8 +349,17 @@ class IniHandler:
         if len(current_comments) > 0:
             self.footer_comments = current_comments
 
-    def add_section(self, name, comments=None):
+    def add_section(self, name, comments=None, line: Optional[IniLine] = None):
         section = IniHandlerSection(name, comments)
+        if self.document is not None:
+            section.document = self.document
+            if line is None:
+                # New section is added to the end of file
+                for text in [self.document.newline, f'[{name}]{self.document.newline}']:
+                    line = IniLine(text)
+                    self.document.append_line(line)
+                    section.lines.append(line)
+            section.anchor_line = line
         self.sections[name.lower()] = section
         return section
 
@@ -182,30 +367,38 @@ class IniHandler:
         return self.sections.get(section.lower(), None)
 
     def remove_section(self, section):
-        del self.sections[section.lower()]
+        removed_section = self.sections.pop(section.lower())
+        for line in removed_section.lines:
+            line.text = None
         self.modified = True
 
     def is_modified(self):
+        if self.document is not None:
+            # Edits may cancel each other out, so only actual change of content counts
+            return self.document.is_modified()
         for section in self.sections.values():
             if section.modified:
                 return True
         return self.modified
 
     def to_string(self):
-        result = ''
+        if self.document is not None:
+            return self.document.to_string()
+        result = []
         for section in self.sections.values():
-            result += section.to_string(self.cfg)
+            result.append(section.to_string(self.cfg))
             if self.cfg.add_section_spacing:
-                result += '\n'
-        for comment in self.footer_comments:
-            result += comment
-        return result
+                result.append('\n')
+        result.extend(self.footer_comments)
+        return ''.join(result)
 
-    def set_option(self, section_name, option_name, option_value, modified=True, overwrite=True, comments=None):
+    def set_option(self, section_name, option_name, option_value, modified=True, overwrite=True, comments=None,
+                   inline_comment=None):
         section = self.get_section(section_name)
         if section is None:
             section = self.add_section(section_name)
-        section.set_option(option_name, option_value, flag_modified=modified, overwrite=overwrite, comments=comments)
+        section.set_option(option_name, option_value, flag_modified=modified, overwrite=overwrite, comments=comments,
+                           inline_comment=inline_comment)
 
     def remove_option(self, option_name, section_name=None, option_value=None, not_equal=False):
         if section_name:
@@ -233,4 +426,9 @@ class IniHandler:
             if len(values) > 0:
                 result[section.name] = values
 
-        return result
\ No newline at end of file
+        return result
+
+    def get_diff(self) -> List[str]:
+        if self.document is None:
+            raise ValueError(f'Diff is only supported in lossless mode!')
+        return self.document.get_diff()
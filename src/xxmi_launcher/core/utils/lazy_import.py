@@ -0,0 +1,34 @@
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Module proxy which imports the real module on first attribute access
+    Allows to keep heavy dependencies out of startup path of entry points that never touch them
+    """
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            # Goes through builtins.__import__, so lazily loaded modules are visible to import profiler
+            __import__(self.__name__)
+            module = sys.modules[self.__name__]
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    module = sys.modules.get(name, None)
+    if module is not None:
+        return module
+    return LazyModule(name)
@@ -0,0 +1,247 @@
+import re
+import json
+import logging
+import time
+
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+import core.path_manager as Paths
+
+log = logging.getLogger(__name__)
+
+
+class LogStat:
+    """
+    Base of statistic computed by LogAnalyzer
+    Maps line kinds to byte regex patterns, every matched line is passed to `process` along with its kind
+    State must be JSON serializable, as it's stored in analyzer checkpoint to resume on newly appended lines
+    """
+    name: str = ''
+    # Bump on any change of patterns or state layout to discard stored state
+    version: int = 1
+    patterns: Dict[str, bytes] = {}
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        raise NotImplementedError
+
+    def process(self, kind: str, match: re.Match):
+        raise NotImplementedError
+
+    def get_state(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def set_state(self, state: Dict[str, Any]):
+        raise NotImplementedError
+
+
+class LaunchCounterStat(LogStat):
+    version = 1
+    patterns = {
+        'package_load': rb'Loaded package: (?P<package_name>\w+)',
+        'launch': rb'ApplicationEvents\.Launch\(\)\r?$',
+        'warning': rb'ApplicationEvents\.ShowWarning',
+        'error': rb'ApplicationEvents\.ShowError',
+        'ready': rb'ApplicationEvents\.Ready\(\)\r?$',
+    }
+
+    def __init__(self, exclude_failed: bool = True):
+        self.name = f'launch_counters{"_exclude_failed" if exclude_failed else ""}'
+        self.exclude_failed = exclude_failed
+        super().__init__()
+
+    def reset(self):
+        self.launch_counters = {'GIMI': 0, 'SRMI': 0, 'WWMI': 0, 'ZZMI': 0, 'HIMI': 0, 'EFMI': 0}
+        self.active_package = ''
+        self.launch_in_progress = False
+
+    def process(self, kind: str, match: re.Match):
+        # Detect which model importer is used for launch event
+        if kind == 'package_load':
+            package_name = match.group('package_name').decode()
+            if package_name in self.launch_counters:
+                self.active_package = package_name
+                self.launch_in_progress = False  # Reset launch event state to handle possible malformed logs
+            return
+        # Skip all lines 'till model importer package load
+        if not self.active_package:
+            return
+        # Detect launch event
+        if kind == 'launch':
+            self.launch_in_progress = True
+            return
+        # Detect result of launch event
+        if not self.launch_in_progress:
+            return
+        # Abort launch event parsing on warning or error
+        if kind in ('warning', 'error'):
+            if self.exclude_failed:
+                self.launch_in_progress = False
+        # Detect launch event finish
+        elif kind == 'ready':
+            self.launch_counters[self.active_package] += 1
+            self.launch_in_progress = False
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            'launch_counters': self.launch_counters,
+            'active_package': self.active_package,
+            'launch_in_progress': self.launch_in_progress,
+        }
+
+    def set_state(self, state: Dict[str, Any]):
+        self.launch_counters = state['launch_counters']
+        self.active_package = state['active_package']
+        self.launch_in_progress = state['launch_in_progress']
+
+
+class LogAnalyzer:
+    """
+    Streams log file in chunks and feeds lines matched by single compiled pattern of all added stats
+    Stores byte offset of last processed line along with stats state, so next update scans only appended data
+    """
+    # Size of file head used to detect log being replaced (i.e. rotated or removed)
+    head_size: int = 256
+
+    def __init__(self, log_path: Path, checkpoint_path: Optional[Path] = None, chunk_size: int = 1024 * 1024):
+        self.log_path = log_path
+        self.checkpoint_path = checkpoint_path
+        self.chunk_size = chunk_size
+        self.stats: List[LogStat] = []
+        self.patterns: Dict[str, bytes] = {}
+        self.kind_stats: Dict[str, List[LogStat]] = {}
+        self.pattern: Optional[re.Pattern] = None
+        # Literal prefixes of line patterns, used to locate candidate matches with fast bytes search
+        self.literals: Optional[List[bytes]] = None
+
+    def add_stat(self, stat: LogStat) -> LogStat:
+        for kind, pattern in stat.patterns.items():
+            if self.patterns.get(kind, pattern) != pattern:
+                raise ValueError(f'Log stat {stat.name} redefines `{kind}` line pattern')
+            self.patterns[kind] = pattern
+            self.kind_stats.setdefault(kind, []).append(stat)
+        self.stats.append(stat)
+        self.pattern = None
+        return stat
+
+    def compile_pattern(self) -> re.Pattern:
+        literals = set(self.get_literal_prefix(pattern) for pattern in self.patterns.values())
+        # Regex scan of every byte is used only if some pattern doesn't start with literal
+        self.literals = None if b'' in literals else list(literals)
+        return re.compile(b'|'.join(b'(?P<%s>%s)' % (kind.encode(), pattern) for kind, pattern in self.patterns.items()),
+                          re.MULTILINE)
+
+    @staticmethod
+    def get_literal_prefix(pattern: bytes) -> bytes:
+        prefix = bytearray()
+        pos = 0
+        while pos < len(pattern):
+            char = pattern[pos:pos + 1]
+            if char == b'\\' and pos + 1 < len(pattern) and not pattern[pos + 1:pos + 2].isalnum():
+                char = pattern[pos + 1:pos + 2]
+                pos += 2
+            elif char in b'\\.^$*+?{}[]|()':
+                break
+            else:
+                pos += 1
+            # Quantified char is optional or repeated, so it can't be part of prefix
+            if pattern[pos:pos + 1] in (b'*', b'+', b'?', b'{'):
+                break
+            prefix += char
+        return bytes(prefix)
+
+    def update(self):
+        start_time = time.perf_counter()
+
+        if self.pattern is None:
+            self.pattern = self.compile_pattern()
+
+        offset, head = self.load_checkpoint()
+
+        with open(self.log_path, 'rb') as f:
+            # Log was replaced, keep stats state and process new file from the start
+            if head != f.read(len(head)) or f.seek(0, 2) < offset:
+                offset = 0
+            f.seek(offset)
+            start_offset = offset
+            tail = b''
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                data = tail + chunk
+                # Last line may be incomplete, it'll be processed along with the next chunk or update
+                end = data.rfind(b'\n') + 1
+                self.process_data(data[:end])
+                tail = data[end:]
+                offset += end
+            f.seek(0)
+            head = f.read(min(self.head_size, offset))
+
+        self.save_checkpoint(offset, head)
+
+        log.debug(f'Analyzed {offset - start_offset} bytes of {self.log_path.name} in {time.perf_counter() - start_time:.3f}s')
+
+    def process_data(self, data: bytes):
+        kind_stats = self.kind_stats
+        for match in self.find_matches(data):
+            kind = match.lastgroup
+            for stat in kind_stats[kind]:
+                stat.process(kind, match)
+
+    def find_matches(self, data: bytes):
+        if self.literals is None:
+            yield from self.pattern.finditer(data)
+            return
+        positions = set()
+        for literal in self.literals:
+            pos = data.find(literal)
+            while pos != -1:
+                positions.add(pos)
+                pos = data.find(literal, pos + 1)
+        for pos in sorted(positions):
+            match = self.pattern.match(data, pos)
+            if match is not None:
+                yield match
+
+    def load_checkpoint(self):
+        for stat in self.stats:
+            stat.reset()
+        if self.checkpoint_path is None or not self.checkpoint_path.is_file():
+            return 0, b''
+        try:
+            checkpoint = json.loads(Paths.App.read_text(self.checkpoint_path))
+            if checkpoint['log_path'] != str(self.log_path):
+                return 0, b''
+            states = checkpoint['stats']
+            # Whole log must be reprocessed if any of stats has no stored state
+            for stat in self.stats:
+                state = states.get(stat.name, None)
+                if state is None or state['version'] != stat.version:
+                    return 0, b''
+            for stat in self.stats:
+                stat.set_state(states[stat.name]['state'])
+            return checkpoint['offset'], bytes.fromhex(checkpoint['head'])
+        except Exception as e:
+            log.debug(f'Failed to load log analyzer checkpoint {self.checkpoint_path}: {e}')
+            for stat in self.stats:
+                stat.reset()
+            return 0, b''
+
+    def save_checkpoint(self, offset: int, head: bytes):
+        if self.checkpoint_path is None:
+            return
+        checkpoint = {
+            'log_path': str(self.log_path),
+            'offset': offset,
+            'head': head.hex(),
+            'stats': {stat.name: {'version': stat.version, 'state': stat.get_state()} for stat in self.stats},
+        }
+        try:
+            Paths.verify_path(self.checkpoint_path.parent)
+            Paths.App.write_file(self.checkpoint_path, json.dumps(checkpoint), silent=True)
+        except Exception as e:
+            log.debug(f'Failed to save log analyzer checkpoint {self.checkpoint_path}: {e}')
@@ -0,0 +1,159 @@
+import os
+import gzip
+import shutil
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+import atexit
+
+from pathlib import Path
+from typing import Optional
+
+
+class ArchivingFileHandler(logging.FileHandler):
+    """
+    Appending file handler which moves log to archive folder once it exceeds size or age limit
+    Archived logs are compressed to .gz by background thread, so rollover doesn't stall logging
+    """
+    def __init__(self, filename: Path, archive_path: Path, max_bytes: int, max_age: int, backup_count: int,
+                 encoding: str = 'utf-8'):
+        super().__init__(filename, mode='a', encoding=encoding)
+        self.archive_path = archive_path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backup_count = backup_count
+        self.log_start_time = self.get_log_start_time()
+        # Rollover fails while log is open by another launcher instance, so retries are throttled
+        self.next_rollover_attempt = 0
+        self.compress_thread: Optional[threading.Thread] = None
+        # Compress logs archived by previous run that got terminated before compression finished
+        self.start_compression()
+
+    def get_log_start_time(self) -> float:
+        """
+        Reads timestamp of the first log record, as file creation time can't be trusted due to Windows file tunneling
+        """
+        try:
+            with open(self.baseFilename, 'r', encoding=self.encoding, errors='ignore') as f:
+                head = f.read(19)
+            return time.mktime(time.strptime(head, '%Y-%m-%d %H:%M:%S'))
+        except Exception:
+            return time.time()
+
+    def should_rollover(self) -> bool:
+        now = time.time()
+        if now < self.next_rollover_attempt:
+            return False
+        if now - self.log_start_time > self.max_age:
+            return True
+        if self.stream is not None and self.stream.tell() > self.max_bytes:
+            return True
+        return False
+
+    def do_rollover(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        try:
+            self.archive_path.mkdir(parents=True, exist_ok=True)
+            os.replace(self.baseFilename, self.get_archived_log_path())
+            self.log_start_time = time.time()
+            self.start_compression()
+        except OSError:
+            self.next_rollover_attempt = time.time() + 60
+        finally:
+            self.stream = self._open()
+
+    def get_archived_log_path(self) -> Path:
+        log_path = Path(self.baseFilename)
+        now = time.time()
+        archived_log_name = f'{log_path.stem} {time.strftime("%Y-%m-%d %H-%M-%S", time.localtime(now))}-{int(now * 1000) % 1000:03}'
+        archived_log_path = self.archive_path / f'{archived_log_name}{log_path.suffix}'
+        index = 1
+        while archived_log_path.exists() or archived_log_path.with_name(archived_log_path.name + '.gz').exists():
+            # Suffix keeps chronological order of names, as '_' goes after '.' of extension
+            archived_log_path = self.archive_path / f'{archived_log_name}_{index:02}{log_path.suffix}'
+            index += 1
+        return archived_log_path
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self.should_rollover():
+                self.do_rollover()
+        except Exception:
+            self.handleError(record)
+        super().emit(record)
+
+    def start_compression(self):
+        if self.compress_thread is not None and self.compress_thread.is_alive():
+            # Running thread picks up newly archived log before exit
+            return
+        self.compress_thread = threading.Thread(target=self.compress_archive, daemon=True)
+        self.compress_thread.start()
+
+    def compress_archive(self):
+        if not self.archive_path.is_dir():
+            return
+        log_path = Path(self.baseFilename)
+        while True:
+            archived_logs = sorted(self.archive_path.glob(f'{log_path.stem} *{log_path.suffix}'))
+            if not archived_logs:
+                break
+            for archived_log_path in archived_logs:
+                compressed_log_path = archived_log_path.with_name(archived_log_path.name + '.gz')
+                tmp_path = compressed_log_path.with_name(compressed_log_path.name + '.tmp')
+                try:
+                    with open(archived_log_path, 'rb') as f_in, gzip.open(tmp_path, 'wb', compresslevel=6) as f_out:
+                        shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+                    os.replace(tmp_path, compressed_log_path)
+                    archived_log_path.unlink()
+                except OSError:
+                    # Most likely log is still open by another launcher instance, it'll be picked up next time
+                    return
+        # Remove oldest archives exceeding backup count, timestamped names are sorted chronologically
+        compressed_logs = sorted(self.archive_path.glob(f'{log_path.stem} *{log_path.suffix}.gz'))
+        for compressed_log_path in compressed_logs[:max(0, len(compressed_logs) - self.backup_count)]:
+            try:
+                compressed_log_path.unlink()
+            except OSError:
+                pass
+
+
+log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def initialize(log_path: Path, archive_path: Path, log_format: str, level: int = logging.DEBUG,
+               max_bytes: int = 10 * 1024 * 1024, max_age: int = 14 * 24 * 60 * 60, backup_count: int = 10):
+    """
+    Routes root logger records through queue to the file handler running in listener thread,
+    so UI and worker threads never wait for log file I/O
+    """
+    global log_listener
+
+    file_handler = ArchivingFileHandler(log_path, archive_path, max_bytes, max_age, backup_count)
+    file_handler.setFormatter(logging.Formatter(log_format))
+
+    log_queue = queue.SimpleQueue()
+    log_listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=False)
+    log_listener.start()
+
+    root_logger = logging.getLogger()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.setLevel(level)
+
+    atexit.register(shutdown)
+
+
+def shutdown():
+    """
+    Writes all queued records to the file and stops listener thread, must be called before os._exit
+    """
+    global log_listener
+    if log_listener is None:
+        return
+    listener, log_listener = log_listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
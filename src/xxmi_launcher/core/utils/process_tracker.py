@@ -1,13 +1,19 @@
 import time
-import psutil
+import threading
 import subprocess
 
-from typing import Tuple
+from typing import Tuple, Dict, Optional
 from enum import Enum
-from multiprocessing import Process, Value
 
-import win32gui
-import win32process
+import core.utils.tracer as Tracer
+
+from core.utils.lazy_import import lazy_import
+
+# Process list is only needed once game launch starts, it's not worth loading psutil during launcher startup
+psutil = lazy_import('psutil')
+# Window lookups are Windows-only, so process waits stay usable without pywin32
+win32gui = lazy_import('win32gui')
+win32process = lazy_import('win32process')
 
 
 class ProcessPriority(Enum):
@@ -36,12 +42,9 @@ def get_hwnds_for_pid(pid, check_visibility: bool = False):
 
 
 def get_process(process_id=None, process_name=None):
-    for process in psutil.process_iter():
-        try:
-            if process.name() == process_name or process.pid == process_id:
-                return process
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            pass
+    for process in psutil.process_iter(attrs=['name']):
+        if process.info['name'] == process_name or process.pid == process_id:
+            return process
     return None
 
 
@@ -52,107 +55,134 @@ class WaitResult(Enum):
     Terminated = -300
 
 
-def wait_for_process(process_name, timeout=10, with_window=False, cmd=None, inject_dll=None, check_visibility: bool = False) -> Tuple[WaitResult, int]:
-    process = ProcessWaiter(process_name, timeout, with_window, cmd=cmd, inject_dll=inject_dll, check_visibility=check_visibility)
-    process.start()
-    process.join()
-    result = int(process.data.value)
-    """
-    Possible result values:
-    0...MAX_PID: exit before timeout with process found
-    -200: timeout reached
+class ProcessWatcher:
     """
-
-    if result < 0:
-        return WaitResult(result), -1
-    else:
-        return WaitResult.Found, result
-
-
-def wait_for_process_exit(process_name, timeout=10, kill_timeout=-1) -> Tuple[WaitResult, int]:
-    process = ProcessWaiter(process_name, timeout, wait_exit=True, kill_timeout=kill_timeout)
-    process.start()
-    process.join()
-    result = int(process.data.value)
+    In-process service for process spawn and exit waits
+    Once found, process is tracked by its PID (verified against creation time) instead of name lookups
+    Process list scans are shared between concurrent waits and made at most once per poll interval
     """
-    Possible result values:
-    0...MAX_PID: process exit before timeout
-    -100: exit before timeout with process not found
-    -200: timeout reached with process alive
-    -300: process terminated after kill_timeout
-    """
-
-    if result < 0:
-        return WaitResult(result), -1
-    else:
-        return WaitResult.Found, result
-
-
-class ProcessWaiter(Process):
-    """
-    Waits for process spawn or exit
-    Possible self.data.value returns:
-    0...MAX_PID: exit before timeout with process found
-    -100: exit before timeout with process not found
-    -200: timeout reached
-    -300: process terminated after kill_timeout
-    """
-    def __init__(self, process_name, timeout=-1, with_window=False, wait_exit=False, kill_timeout=-1, cmd=None, inject_dll=None, check_visibility: bool = False):
-        Process.__init__(self)
-        self.process_name = process_name
-        self.timeout = int(timeout)
-        self.with_window = with_window
-        self.check_visibility = check_visibility
-        self.wait_exit = wait_exit
-        self.kill_timeout = kill_timeout
-        self.cmd = cmd
-        self.inject_dll = inject_dll
-        self.data = Value('i', -100)
-
-    def run(self):
+    def __init__(self, poll_interval: float = 0.1):
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        # Process name -> process found by previous waits
+        self.processes: Dict[str, 'psutil.Process'] = {}
+        # Process name -> first process with this name found by the last scan
+        self.snapshot: Dict[str, 'psutil.Process'] = {}
+        self.scan_time: Optional[float] = None
+
+    def scan(self):
+        snapshot = {}
+        for process in psutil.process_iter(attrs=['name']):
+            # Name is prefetched with single call, inaccessible names are None
+            name = process.info['name']
+            if name is not None and name not in snapshot:
+                snapshot[name] = process
+        self.snapshot = snapshot
+        self.scan_time = time.monotonic()
+
+    def find_process(self, process_name: str, since: Optional[float] = None) -> Optional['psutil.Process']:
+        """
+        Returns running process with given name, scan results made before `since` aren't trusted
+        """
+        if since is None:
+            since = time.monotonic() - self.poll_interval
+        with self.lock:
+            process = self.processes.get(process_name, None)
+            if process is not None:
+                if process.is_running():
+                    return process
+                del self.processes[process_name]
+            # Waits polling at the same time reuse result of the scan made by the first of them
+            if self.scan_time is None or self.scan_time < since:
+                self.scan()
+            process = self.snapshot.get(process_name, None)
+            if process is None or not process.is_running():
+                return None
+            self.processes[process_name] = process
+            return process
+
+    def wait_for_spawn(self, process_name: str, timeout: float = -1, with_window: bool = False,
+                       check_visibility: bool = False) -> Tuple[WaitResult, int]:
+        """
+        Waits for process with given name to start, and optionally for its window to appear
+        """
+        time_start = time.monotonic()
+        since = time_start
+        while True:
+            process = self.find_process(process_name, since)
+            since = None
+            if process is not None:
+                if not with_window or len(get_hwnds_for_pid(pid=process.pid, check_visibility=check_visibility)) != 0:
+                    return WaitResult.Found, process.pid
+            if timeout != -1 and time.monotonic() - time_start >= timeout:
+                return WaitResult.Timeout, -1
+            time.sleep(self.poll_interval)
+
+    def wait_for_exit(self, process_name: str, timeout: float = -1, kill_timeout: float = -1) -> Tuple[WaitResult, int]:
+        """
+        Waits for all processes with given name to exit, killing them once kill_timeout is reached
+        """
+        time_start = time.monotonic()
+        process = self.find_process(process_name, time_start)
+        if process is None:
+            return WaitResult.NotFound, -1
+
+        result = WaitResult.Found, process.pid
+        while True:
+            elapsed = time.monotonic() - time_start
 
-        if self.cmd:
-            subprocess.Popen(self.cmd)
+            if timeout != -1 and elapsed >= timeout:
+                return WaitResult.Timeout, -1
 
-        time_start = time.time()
+            if kill_timeout != -1 and elapsed >= kill_timeout:
+                result = WaitResult.Terminated, -1
+                try:
+                    process.kill()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
 
-        while True:
+            # Wait for process handle until the next deadline instead of polling process list
+            deadlines = [t - elapsed for t in (timeout, kill_timeout) if t != -1 and t > elapsed]
+            try:
+                process.wait(timeout=min(deadlines) if deadlines else None)
+            except psutil.TimeoutExpired:
+                continue
+            except psutil.AccessDenied:
+                time.sleep(self.poll_interval)
+                continue
 
-            current_time = time.time()
+            # Another process with the same name may be still running
+            process = self.find_process(process_name, time.monotonic())
+            if process is None:
+                return result
+            if result[0] == WaitResult.Found:
+                result = WaitResult.Found, process.pid
 
-            if self.timeout != -1 and current_time - time_start >= self.timeout:
-                break
 
-            process = get_process(process_name=self.process_name)
+process_watcher = ProcessWatcher()
 
-            if process is not None:
-                # Process is found
-                self.data.value = process.pid
-
-                if not self.wait_exit:
-                    # We're in wait-for-process-spawn mode
-                    if not self.with_window:
-                        # Exit loop: process is found and waiting for window is not required
-                        if self.inject_dll:
-                            # inject(process.pid, str(self.inject_dll))
-                            raise NotImplementedError
-                        return
-                    elif len(get_hwnds_for_pid(pid=self.data.value, check_visibility=self.check_visibility)) != 0:
-                        # Exit loop: process is found and window is also found
-                        if self.inject_dll:
-                            # inject(process.pid, str(self.inject_dll))
-                            raise NotImplementedError
-                        return
-
-                # Start process termination attempts once kill_timeout is reached
-                if self.kill_timeout != -1 and current_time - time_start >= self.kill_timeout:
-                    self.data.value = -300
-                    process.kill()
 
-            elif self.wait_exit:
-                return
+@Tracer.traced()
+def wait_for_process(process_name, timeout=10, with_window=False, cmd=None, inject_dll=None, check_visibility: bool = False) -> Tuple[WaitResult, int]:
+    """
+    Possible results:
+    Found: process (and its window if with_window is set) is found before timeout, pid is returned
+    Timeout: timeout reached
+    """
+    if inject_dll:
+        raise NotImplementedError
+    if cmd:
+        subprocess.Popen(cmd)
+    return process_watcher.wait_for_spawn(process_name, timeout=timeout, with_window=with_window,
+                                          check_visibility=check_visibility)
 
-            time.sleep(0.1)
 
-        # Timeout reached, lets signal it with -200 return code
-        self.data.value = -200
+def wait_for_process_exit(process_name, timeout=10, kill_timeout=-1) -> Tuple[WaitResult, int]:
+    """
+    Possible results:
+    Found: process exit before timeout, pid is returned
+    NotFound: process is not running
+    Timeout: timeout reached with process alive
+    Terminated: process terminated after kill_timeout
+    """
+    return process_watcher.wait_for_exit(process_name, timeout=timeout, kill_timeout=kill_timeout)
@@ -2,9 +2,12 @@ import base64
 
 from pathlib import Path
 
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import ec
+from core.utils.lazy_import import lazy_import
+
+# Cryptography backend is loaded on first key operation to keep it out of cold start
+hashes = lazy_import('cryptography.hazmat.primitives.hashes')
+serialization = lazy_import('cryptography.hazmat.primitives.serialization')
+ec = lazy_import('cryptography.hazmat.primitives.asymmetric.ec')
 
 
 class Security:
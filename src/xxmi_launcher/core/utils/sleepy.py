@@ -1,9 +1,12 @@
 import io
+import re
+import json
+import math
 import struct
 
 from pathlib import Path
 from enum import Enum
-from typing import List, Tuple, Union
+from typing import List, Tuple, Union, Dict
 
 
 # https: // github.com / dotnet / runtime / blob / a7efcd9ca9255dc9faa8b4a2761cdfdb62619610 / src / libraries / System.Runtime.Serialization.Formatters / src / System / Runtime / Serialization / Formatters / Binary / BinaryEnums.cs  # L7C1-L32C6
@@ -188,7 +191,13 @@ class BinaryWriter:
         self.write_enum_as_byte(BinaryHeaderEnum.MessageEnd)
 
 
+control_chars_pattern = re.compile(r'[\x00-\x1f]')
+
+
 class JsonSerializer:
+    # Shorter lists are faster to format in Python than to check and pass to json.dumps
+    json_list_min_length: int = 16
+
     def __init__(self,
                  indent: Union[None, str, int] = 4,
                  separators: Tuple[str, str] = (',', ':'),
@@ -207,9 +216,38 @@ class JsonSerializer:
         self.newline = newline
 
     def dumps(self, obj):
-        return self.newline + self.dump_value(obj)
+        parts = [self.newline]
+        self.write_value(parts, obj, 0)
+        return ''.join(parts)
 
     def dump_value(self, value, level: int = 0) -> str:
+        parts = []
+        self.write_value(parts, value, level)
+        return ''.join(parts)
+
+    def dump_list(self, src_list: list, level: int) -> str:
+        parts = []
+        self.write_list(parts, src_list, level)
+        return ''.join(parts)
+
+    def dump_dict(self, src_dict: dict, level: int) -> str:
+        parts = []
+        self.write_dict(parts, src_dict, level)
+        return ''.join(parts)
+
+    def write_value(self, parts: List[str], value, level: int):
+        text = self.dump_scalar(value)
+        if text is not None:
+            parts.append(text)
+        elif isinstance(value, list):
+            self.write_list(parts, value, level + 1)
+        elif isinstance(value, dict):
+            self.write_dict(parts, value, level + 1)
+        else:
+            raise ValueError(f'Value {value} has unsupported type {type(value)}!')
+
+    @staticmethod
+    def dump_scalar(value) -> Union[str, None]:
         if isinstance(value, str):
             return '"' + value.replace('\\', '\\\\').replace('\"', '\\\"') + '"'
         elif isinstance(value, bool):
@@ -220,44 +258,200 @@ class JsonSerializer:
             return str(value)
         elif isinstance(value, float):
             return str(value).replace(',', '.')
-        elif isinstance(value, list):
-            return self.dump_list(value, level + 1)
-        elif isinstance(value, dict):
-            return self.dump_dict(value, level + 1)
-        else:
-            raise ValueError(f'Value {value} has unsupported type {type(value)}!')
-
-    def dump_list(self, src_list: list, level: int) -> str:
-        result = '[' + self.newline
-
-        for element_id, value in enumerate(src_list):
-            is_last_element = element_id == len(src_list) - 1
-            item_separator = '' if is_last_element else self.item_separator
-            value = self.dump_value(value, level)
-            result += f'{self.indent*level}{value}{item_separator}{self.newline}'
-
-        result += self.indent * (level - 1) + ']'
-
-        return result
-
-    def dump_dict(self, src_dict: dict, level: int) -> str:
-        result = '{' + self.newline
-
+        return None
+
+    def write_list(self, parts: List[str], src_list: list, level: int):
+        if len(src_list) >= self.json_list_min_length and self.is_plain_list(src_list):
+            # Compact json.dumps output of flat list of plain values differs only by separators, so they're replaced
+            # with multiline ones (without `indent` arg to keep C encoder in use)
+            indent = self.indent * level
+            text = json.dumps(src_list, ensure_ascii=False, separators=(self.item_separator + self.newline + indent, ':'))
+            parts.append(f'[{self.newline}{indent}{text[1:-1]}{self.newline}{self.indent * (level - 1)}]')
+            return
+
+        dump_scalar = self.dump_scalar
+        append = parts.append
+        indent = self.indent * level
+        # Separator is written before every element, so there's no need to track the last one
+        separator = '[' + self.newline
+        item_separator = self.item_separator + self.newline
+
+        for value in src_list:
+            text = dump_scalar(value)
+            if text is not None:
+                append(separator + indent + text)
+            else:
+                append(separator + indent)
+                self.write_value(parts, value, level)
+            separator = item_separator
+
+        closing = self.indent * (level - 1) + ']'
+        # Empty list is still written in multiline form
+        append(self.newline + closing if src_list else separator + closing)
+
+    def write_dict(self, parts: List[str], src_dict: dict, level: int):
+        dump_scalar = self.dump_scalar
+        append = parts.append
+        indent = self.indent * level
+        separator = '{' + self.newline
+        item_separator = self.item_separator + self.newline
+        key_separator = self.key_separator + ' '
+
+        # Keys are aligned to the longest one met so far
         max_key_len = 0
-        for element_id, (key, value) in enumerate(src_dict.items()):
-            max_key_len = len(key) if len(key) > max_key_len else max_key_len
-            spacing = max_key_len - len(key) + 1
-            is_last_element = element_id == len(src_dict) - 1
-            item_separator = '' if is_last_element else self.item_separator
-            value = self.dump_value(value, level)
-            result += f'{self.indent*level}"{key}"{" " * spacing}{self.key_separator} {value}{item_separator}{self.newline}'
+        for key, value in src_dict.items():
+            key_len = len(key)
+            if key_len > max_key_len:
+                max_key_len = key_len
+            text = dump_scalar(value)
+            if text is not None:
+                append(f'{separator}{indent}"{key}"{" " * (max_key_len - key_len + 1)}{key_separator}{text}')
+            else:
+                append(f'{separator}{indent}"{key}"{" " * (max_key_len - key_len + 1)}{key_separator}')
+                self.write_value(parts, value, level)
+            separator = item_separator
 
-        result += self.indent * (level - 1) + '}'
+        closing = self.indent * (level - 1) + '}'
+        # Empty dict is still written in multiline form
+        append(self.newline + closing if src_dict else separator + closing)
 
-        return result
+    @staticmethod
+    def is_plain_list(src_list: list) -> bool:
+        """
+        Checks whether all list values are formatted by json.dumps the same way as by write_value
+        Subclasses of plain types are excluded, as json.dumps ignores their __str__
+        """
+        for value in src_list:
+            value_type = type(value)
+            if value_type is str:
+                # Unlike json.dumps, write_value doesn't escape control characters
+                if control_chars_pattern.search(value):
+                    return False
+            elif value_type is float:
+                # Unlike str, json.dumps formats special values as NaN and Infinity
+                if not math.isfinite(value):
+                    return False
+            elif value_type is not int and value_type is not bool and value is not None:
+                return False
+        return True
+
+
+class SleepyCodec:
+    """
+    Bulk implementation of Sleepy XOR codec, output is identical to byte by byte Sleepy.internal_decode/internal_write
+    Whole buffers are XORed as big integers, while evil bytes are handled with strided slices and translate tables:
+    * Writer moves characters > 0x40 down by 0x40 and puts `1` flag byte before them, if character position hits
+      evil magic byte (one with both high bits set). Flag byte is written even for unshifted characters (as `0`).
+    * Reader treats every byte at evil magic position as flag for the following byte.
+    """
+    # Maps byte to flag of evil shift applied by writer
+    shift_flag_table = bytes(int(b > 0x40) for b in range(256))
+    # Maps byte to its value after evil shift applied by writer
+    shift_down_table = bytes(b - 0x40 if b > 0x40 else b for b in range(256))
+    # Maps evil flag byte to shift value applied by reader
+    shift_up_table = bytes([0] + [0x40] * 255)
+
+    def __init__(self, magic: bytes):
+        if len(magic) == 0:
+            raise ValueError('[SleepyCodec] Magic cannot be empty!')
+        self.magic = magic
+        self.evil = [(b & 0xC0) == 0xC0 for b in magic]
+        self.prefix_layout, self.cycle_layout, self.cycle_length = self.get_write_layout()
+
+    def get_write_layout(self) -> Tuple[List[Tuple[int, bool]], List[Tuple[int, bool]], int]:
+        """
+        Positions of written characters depend only on magic and form a periodic walk over its bytes
+        Returns (position, is_flagged) of characters before the walk starts to repeat, ones of single repeated period
+        and length of the period in bytes
+        """
+        magic_length = len(self.magic)
+        visited = {}
+        layout = []
+        position = 0
+        while position % magic_length not in visited:
+            visited[position % magic_length] = len(layout)
+            flagged = self.evil[position % magic_length]
+            layout.append((position, flagged))
+            position += 2 if flagged else 1
+        cycle_start = visited[position % magic_length]
+        return layout[:cycle_start], layout[cycle_start:], position - layout[cycle_start][0]
+
+    def xor(self, data: bytes) -> bytes:
+        length = len(data)
+        key = (self.magic * (length // len(self.magic) + 1))[:length]
+        return (int.from_bytes(data, 'little') ^ int.from_bytes(key, 'little')).to_bytes(length, 'little')
+
+    def decode(self, data: bytes) -> str:
+        data = self.xor(data)
+        magic_length = len(self.magic)
+        char_residues = [residue for residue in range(magic_length) if not self.evil[residue]]
+        stride = len(char_residues)
+        chars_count = sum(len(range(residue, len(data), magic_length)) for residue in char_residues)
+        # Characters are decoded to 16-bit lanes, as shifted byte may exceed 0xFF for malformed input
+        values = bytearray(chars_count * 2)
+        shifts = bytearray(chars_count * 2)
+        for lane, residue in enumerate(char_residues):
+            chars = data[residue::magic_length]
+            values[lane * 2::stride * 2] = chars
+            # Only the byte right before character may carry its flag, as the next character resets it
+            flag_residue = (residue - 1) % magic_length
+            if not self.evil[flag_residue]:
+                continue
+            flags = data[flag_residue::magic_length]
+            if residue == 0:
+                # Very first character has no preceding flag byte
+                flags = b'\x00' + flags
+            shifts[lane * 2::stride * 2] = flags[:len(chars)].translate(self.shift_up_table)
+        decoded = (int.from_bytes(values, 'little') + int.from_bytes(shifts, 'little')).to_bytes(chars_count * 2, 'little')
+        low_bytes, high_bytes = decoded[0::2], decoded[1::2]
+        if high_bytes.count(0) == len(high_bytes):
+            return low_bytes.decode('latin-1')
+        return ''.join(map(chr, (low | high << 8 for low, high in zip(low_bytes, high_bytes))))
+
+    def encode(self, content: bytes) -> bytes:
+        chars_count = len(content)
+        prefix_count = len(self.prefix_layout)
+        period = len(self.cycle_layout)
+
+        # Resolve position of the last character to get encoded length
+        if chars_count == 0:
+            return b''
+        if chars_count <= prefix_count:
+            position, flagged = self.prefix_layout[chars_count - 1]
+        else:
+            cycles, char_id = divmod(chars_count - 1 - prefix_count, period)
+            position, flagged = self.cycle_layout[char_id]
+            position += cycles * self.cycle_length
+        encoded = bytearray(position + 1 + flagged)
+
+        layout = [(char_id, position, flagged, 1) for char_id, (position, flagged) in enumerate(self.prefix_layout)]
+        layout += [(prefix_count + char_id, position, flagged, period)
+                   for char_id, (position, flagged) in enumerate(self.cycle_layout)]
+        for char_id, position, flagged, step in layout:
+            if char_id >= chars_count:
+                break
+            # Prefix characters are placed one by one, periodic ones with strided slices
+            chars = content[char_id:char_id + 1] if char_id < prefix_count else content[char_id::step]
+            stride = self.cycle_length
+            end = position + (len(chars) - 1) * stride + 1
+            if flagged:
+                encoded[position:end:stride] = chars.translate(self.shift_flag_table)
+                encoded[position + 1:end + 1:stride] = chars.translate(self.shift_down_table)
+            else:
+                encoded[position:end:stride] = chars
+
+        return self.xor(encoded)
 
 
 class Sleepy:
+    def __init__(self):
+        self.codecs: Dict[bytes, SleepyCodec] = {}
+
+    def get_codec(self, magic: bytes) -> SleepyCodec:
+        codec = self.codecs.get(magic, None)
+        if codec is None:
+            codec = self.codecs[magic] = SleepyCodec(magic)
+        return codec
 
     def read_file(self, path: Path, magic: bytes) -> str:
         with open(path, 'rb') as f:
@@ -344,9 +538,6 @@ class Sleepy:
         if not stream.readable():
             raise ValueError("[Sleepy::ReadString] Stream must be readable!")
 
-        cnt = ['{:02x}'.format(x) for x in stream.read()]
-        stream.seek(0)
-
         # Create wrapper over stream that emulates C# binary reader
         reader = BinaryReader(stream)
 
@@ -356,21 +547,13 @@ class Sleepy:
         # Consume data length bytes
         length = reader.get_binary_formatter_data_length()
 
-        # Calculate magic length
-        magic_length = len(magic)
-
-        # Allocate temporary buffer
-        buffer_chars = [''] * length
-
-        # Create evil
-        evil, evils_count = self.create_evil(magic)
-
-        j = self.internal_decode(magic, evil, stream, length, magic_length, buffer_chars)
+        # Decode data bytes in bulk
+        content = self.get_codec(magic).decode(stream.read(length))
 
         # Consume footer bytes and assert footer integrity
         reader.emulate_sleepy_binary_formatter_footer_assertion()
 
-        return ''.join(buffer_chars[:j])
+        return content
 
     def write_string(self, stream: io.BytesIO, content: str, magic: bytes):
         # Stream assertion
@@ -387,26 +570,15 @@ class Sleepy:
         # Emulate header write
         writer.emulate_sleepy_binary_formatter_header_write()
 
-        # Do the do
-        content_len = len(content)
-        buffer_len = content_len * 2
-
-        # Alloc temporary buffers
-        content_bytes = bytearray(buffer_len)
-        encoded_bytes = bytearray(buffer_len)
-
-        # Create evil
-        evil, evils_count = self.create_evil(magic)
+        # Convert string to bytes (UTF-8 encoding), only `len(content)` bytes are written just like by internal_write
+        content_bytes = content.encode('utf-8')[:len(content)]
 
-        # Convert string to bytes (UTF-8 encoding)
-        content_bytes[:content_len] = content.encode('utf-8')
-
-        # Do the do (pt. 2)
-        h = self.internal_write(magic, content_len, content_bytes, encoded_bytes, evil)
+        # Do the do
+        encoded_bytes = self.get_codec(magic).encode(content_bytes)
 
         # Write length and encoded bytes to stream
-        writer.write_7_bit_encoded_int(h)  # Assuming h is meant to be written as an int32.
-        writer.write(encoded_bytes[:h])
+        writer.write_7_bit_encoded_int(len(encoded_bytes))
+        writer.write(encoded_bytes)
 
         # Emulate footer write
         writer.emulate_sleepy_binary_formatter_footer_write()
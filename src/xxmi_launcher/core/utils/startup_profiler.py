@@ -0,0 +1,91 @@
+import sys
+import time
+import logging
+import builtins
+import threading
+
+from typing import Dict, List, Tuple, Optional
+
+log = logging.getLogger(__name__)
+
+
+class ImportProfiler:
+    """
+    Measures time spent on first import of every module by wrapping builtins.__import__
+    Self time excludes nested imports, so heavy dependencies show up under their own names
+    """
+    def __init__(self):
+        self.original_import = None
+        # Module name -> (cumulative time, self time)
+        self.timings: Dict[str, Tuple[float, float]] = {}
+        # Time spent on outermost imports, nested ones are already included
+        self.total_time = 0.0
+        self.local = threading.local()
+
+    def enable(self):
+        if self.original_import is not None:
+            return
+        self.original_import = builtins.__import__
+        builtins.__import__ = self.profiled_import
+
+    def disable(self):
+        if self.original_import is None:
+            return
+        builtins.__import__ = self.original_import
+        self.original_import = None
+
+    def profiled_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Relative imports and already imported modules are passed through as is
+        if level != 0 or name in sys.modules:
+            return self.original_import(name, globals, locals, fromlist, level)
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        stack.append(0.0)
+        start_time = time.perf_counter()
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            children_time = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            else:
+                self.total_time += elapsed
+            self.timings[name] = (elapsed, elapsed - children_time)
+
+    def get_report(self, top: int = 25) -> List[str]:
+        lines = [f'Imported {len(self.timings)} modules in {self.total_time:.3f}s:']
+        for name, (cumulative, self_time) in sorted(self.timings.items(), key=lambda x: x[1][1], reverse=True)[:top]:
+            lines.append(f'    {self_time * 1000:8.1f}ms self {cumulative * 1000:8.1f}ms cumulative  {name}')
+        return lines
+
+
+import_profiler: Optional[ImportProfiler] = None
+startup_logged = False
+
+
+def enable_import_profiler():
+    global import_profiler
+    import_profiler = ImportProfiler()
+    import_profiler.enable()
+
+
+def log_startup(mode: str):
+    """
+    Logs time passed since process creation (including interpreter and bundle boot) and import report if enabled
+    Only the first call is logged, as later ones are made by restarted flows
+    """
+    global startup_logged
+    if startup_logged:
+        return
+    startup_logged = True
+    try:
+        import psutil
+        uptime = time.time() - psutil.Process().create_time()
+        log.debug(f'Cold start ({mode}): {uptime:.3f}s, {len(sys.modules)} modules loaded')
+    except Exception as e:
+        log.debug(f'Failed to measure cold start time: {e}')
+    if import_profiler is not None:
+        import_profiler.disable()
+        log.debug('\n'.join(import_profiler.get_report()))
@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import logging
+import threading
+import functools
+
+from pathlib import Path
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, List, Dict, Any
+
+from core.utils.lazy_import import lazy_import
+
+# Path manager is only needed to write finished trace, tracer itself is imported by low level utils
+Paths = lazy_import('core.path_manager')
+
+log = logging.getLogger(__name__)
+
+
+class Trace:
+    """
+    Span events of single traced operation in Chrome trace event format (viewable in chrome://tracing or Perfetto)
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.start_time = time.time()
+        self.start_counter = time.perf_counter_ns()
+        self.events: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+
+    def add_span(self, name: str, start_counter: int, end_counter: int, args: Dict[str, Any]):
+        event = {
+            'name': name,
+            'ph': 'X',
+            'ts': (start_counter - self.start_counter) // 1000,
+            'dur': (end_counter - start_counter) // 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        }
+        if args:
+            event['args'] = args
+        with self.lock:
+            self.events.append(event)
+
+    def get_durations(self) -> Dict[str, float]:
+        """
+        Returns total duration in ms of every span name, repeated spans are summed up
+        """
+        durations = {}
+        for event in self.events:
+            durations[event['name']] = durations.get(event['name'], 0) + event['dur'] / 1000
+        return durations
+
+
+# Trace is bound to context of thread that started it, so spans of unrelated threads don't leak into it
+active_trace: ContextVar[Optional[Trace]] = ContextVar('active_trace', default=None)
+
+
+@contextmanager
+def span(name: str, **args):
+    trace = active_trace.get()
+    if trace is None:
+        yield
+        return
+    start_counter = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        trace.add_span(name, start_counter, time.perf_counter_ns(), args)
+
+
+def traced(name: Optional[str] = None):
+    """
+    Decorator wrapping every call of function with span, spans are recorded only while trace is active
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if active_trace.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_trace(name: str):
+    active_trace.set(Trace(name))
+
+
+def finish_trace(traces_path: Path, summary_path: Path, status: str = 'ok', max_traces: int = 20, max_launches: int = 50,
+                 **args):
+    """
+    Writes trace of finished operation to json file and updates rolling summary of span durations percentiles
+    """
+    trace = active_trace.get()
+    active_trace.set(None)
+    if trace is None:
+        return
+    trace.add_span(trace.name, trace.start_counter, time.perf_counter_ns(), {'status': status, **args})
+
+    try:
+        Paths.verify_path(traces_path)
+        # Milliseconds keep names of traces started within the same second unique
+        timestamp = time.strftime('%Y-%m-%d %H-%M-%S', time.localtime(trace.start_time))
+        timestamp += f'-{int(trace.start_time * 1000) % 1000:03d}'
+        trace_path = traces_path / f'{trace.name} {timestamp}.json'
+        Paths.App.write_file(trace_path, json.dumps({'traceEvents': trace.events, 'displayTimeUnit': 'ms'}), silent=True)
+        # Timestamped names are sorted chronologically
+        for old_trace_path in sorted(traces_path.glob(f'{trace.name} *.json'))[:-max_traces]:
+            old_trace_path.unlink()
+    except Exception as e:
+        log.debug(f'Failed to write {trace.name} trace: {e}')
+
+    try:
+        update_summary(summary_path, trace, status, max_launches, args)
+    except Exception as e:
+        log.debug(f'Failed to update {trace.name} trace summary: {e}')
+
+
+def update_summary(summary_path: Path, trace: Trace, status: str, max_launches: int, args: Dict[str, Any]):
+    launches = []
+    if summary_path.is_file():
+        try:
+            launches = json.loads(Paths.App.read_text(summary_path))['launches']
+        except Exception:
+            pass
+
+    durations = trace.get_durations()
+    launches.append({
+        'time': int(trace.start_time),
+        'status': status,
+        **args,
+        'durations': {name: round(duration, 3) for name, duration in durations.items()},
+    })
+    launches = launches[-max_launches:]
+
+    stage_durations: Dict[str, List[float]] = {}
+    for launch in launches:
+        for name, duration in launch['durations'].items():
+            stage_durations.setdefault(name, []).append(duration)
+    stages = {name: {'count': len(values), 'p50': get_percentile(values, 50), 'p95': get_percentile(values, 95)}
+              for name, values in stage_durations.items()}
+
+    Paths.verify_path(summary_path.parent)
+    Paths.App.write_file(summary_path, json.dumps({'stages': stages, 'launches': launches}, indent=2), silent=True)
+
+    log.debug(f'{trace.name} trace: {durations[trace.name]:.0f}ms ({status}), '
+              f'last {len(launches)} p50/p95: {stages[trace.name]["p50"]:.0f}/{stages[trace.name]["p95"]:.0f}ms')
+
+
+def get_percentile(values: List[float], percentile: int) -> float:
+    values = sorted(values)
+    rank = max(0, -(-len(values) * percentile // 100) - 1)
+    return values[rank]
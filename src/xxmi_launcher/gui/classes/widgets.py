@@ -3,26 +3,81 @@ import logging
 import time
 import tkinter
 import re
+import hashlib
 # import cv2
 # import math
 
 from typing import Union, Tuple, List, Dict, Optional, Callable
 from pathlib import Path
+from collections import OrderedDict
 
 from tkinter import Menu, INSERT, font
 from customtkinter import CTkBaseClass, CTkButton, CTkImage, CTkLabel, CTkProgressBar, CTkEntry, CTkCheckBox, CTkTextbox, CTkOptionMenu, CTkRadioButton, StringVar
 from customtkinter import END, CURRENT
 from customtkinter import ThemeManager, CTkFont
-from PIL import Image, ImageTk, ImageDraw
+from PIL import Image, ImageTk
 
 import core.config_manager as Config
 
 from gui.classes.element import UIElementBase
 from gui.classes.windows import UIWindow
+from core.utils.lazy_import import lazy_import
+
+# Drawing is only needed for rounded rectangles, the rest of PIL is loaded by customtkinter anyway
+ImageDraw = lazy_import('PIL.ImageDraw')
 
 logging.getLogger('PIL').setLevel(logging.INFO)
 
 
+class ImageRasterCache:
+    """
+    Memory-bounded LRU of prepared PhotoImages keyed by source, scaled size, opacity and brightness
+    Lets hover animations and theme reloads reuse rasters instead of processing source image again
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.images: OrderedDict[tuple, Tuple[ImageTk.PhotoImage, int]] = OrderedDict()
+        # Multiplier -> lookup table for Image.point
+        self.luts: Dict[float, List[int]] = {}
+
+    def get(self, key: tuple) -> Optional[ImageTk.PhotoImage]:
+        entry = self.images.get(key, None)
+        if entry is None:
+            return None
+        self.images.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: tuple, image: ImageTk.PhotoImage, size_bytes: int):
+        if key in self.images:
+            self.size_bytes -= self.images.pop(key)[1]
+        self.images[key] = (image, size_bytes)
+        self.size_bytes += size_bytes
+        # Evicted images stay alive while they're displayed by widgets holding them
+        while self.size_bytes > self.max_bytes and len(self.images) > 1:
+            self.size_bytes -= self.images.popitem(last=False)[1][1]
+
+    def get_lut(self, multiplier: float) -> List[int]:
+        lut = self.luts.get(multiplier, None)
+        if lut is None:
+            # Same values as produced by Image.point for lambda p: p * multiplier
+            lut = self.luts[multiplier] = [min(255, round(p * multiplier)) for p in range(256)]
+        return lut
+
+    @staticmethod
+    def get_source_key(image: Image.Image, path: Optional[Path] = None) -> tuple:
+        if path is not None:
+            try:
+                return 'path', str(path), path.stat().st_mtime_ns
+            except OSError:
+                pass
+        # Generated images (like rounded rectangles) are identified by content, so identical ones are shared
+        return 'image', image.mode, image.size, hashlib.sha1(image.tobytes()).hexdigest()
+
+
+image_raster_cache = ImageRasterCache()
+
+
 class UIWidget(UIElementBase):
     def __init__(self, master, **kwargs):
         UIElementBase.__init__(self, **kwargs)
@@ -193,6 +248,7 @@ class UIImage(UICanvasWidget, CTkBaseClass):
         self.brightness = None
 
         self._image = None
+        self._image_key = None
         self.image = None
         self.image_path = None
         self.image_tag = None
@@ -243,6 +299,7 @@ class UIImage(UICanvasWidget, CTkBaseClass):
         if self._update_attrs(['image_path'], kwargs):
             if isinstance(self.image_path, Image.Image):
                 self._image = self.image_path
+                self._image_key = image_raster_cache.get_source_key(self._image)
                 self.image_path = None
             else:
                 path = Path(self.image_path)
@@ -276,6 +333,7 @@ class UIImage(UICanvasWidget, CTkBaseClass):
                 #         self._video_rendering_active = False
 
                 self._image = Image.open(str(path))
+                self._image_key = image_raster_cache.get_source_key(self._image, path)
 
         if self._update_attrs(['width', 'height', 'opacity', 'brightness'], kwargs):
             self.image = self.create_image(self._image, self._width, self._height, self.opacity, self.brightness)
@@ -450,26 +508,36 @@ class UIImage(UICanvasWidget, CTkBaseClass):
         return bg
 
     def create_image(self, image: Image.Image, width, height, opacity: float, brightness: float):
-        # Modify opacity and/or brightness
-        if opacity != 1 or brightness != 1:
-            channels = image.split()
-            output = []
-            for channel_id, channel in enumerate(channels):
-                # RGB
-                if channel_id <= 2 and brightness != 1:
-                    channel = channel.point(lambda p: p * brightness)
-                # Alpha
-                elif channel_id == 3 and opacity != 1:
-                    channel = channel.point(lambda p: p * opacity)
-                output.append(channel)
-            image = Image.merge(image.mode, output)
-        # Modify size and/or brightness
         width = int(self._apply_widget_scaling(width))
         height = int(self._apply_widget_scaling(height))
+
+        key = (self._image_key, width, height, opacity, brightness)
+        if self._image_key is not None:
+            photo_image = image_raster_cache.get(key)
+            if photo_image is not None:
+                return photo_image
+
+        # Modify opacity and/or brightness
+        if opacity != 1 or brightness != 1:
+            identity_lut = image_raster_cache.get_lut(1)
+            brightness_lut = image_raster_cache.get_lut(brightness)
+            opacity_lut = image_raster_cache.get_lut(opacity)
+            # RGB channels get brightness table, alpha channel gets opacity table
+            luts = [brightness_lut if band_id <= 2 else opacity_lut if band_id == 3 else identity_lut
+                    for band_id in range(len(image.getbands()))]
+            if image.mode in ('RGB', 'RGBA'):
+                image = image.point(sum(luts, []))
+            else:
+                image = Image.merge(image.mode, [channel.point(lut) for channel, lut in zip(image.split(), luts)])
+        # Modify size
         if image.width != width or image.height != height:
             image = image.resize((width, height))
 
-        return ImageTk.PhotoImage(image)
+        photo_image = ImageTk.PhotoImage(image)
+        if self._image_key is not None:
+            image_raster_cache.put(key, photo_image, width * height * 4)
+
+        return photo_image
 
     def move(self, x, y):
         self._x = int(self._apply_widget_scaling(x))
@@ -53,6 +53,9 @@ class MainWindow(UIMainWindow):
         Events.Subscribe(Events.Application.ShowWarning, lambda event: self.show_messagebox(event))
         Events.Subscribe(Events.Application.ShowInfo, lambda event: self.show_messagebox(event))
 
+        # Debounced config saves are run by event loop of GUI thread
+        Config.Config.save_scheduler = self
+
     def load_theme(self, theme: str):
         # Skip loading the same theme
         if self.active_theme == theme:
@@ -248,6 +251,7 @@ class MainWindow(UIMainWindow):
 
     def close(self):
         Events.Fire(Events.Application.Ready())
+        Config.Config.save_scheduler = None
         super().close()
 
     def show_messagebox(self, event=None, **kwargs):
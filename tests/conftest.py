@@ -0,0 +1,34 @@
+import sys
+import shutil
+
+from pathlib import Path
+
+import pytest
+
+REPO_PATH = Path(__file__).parent.parent
+
+sys.path.insert(0, str(REPO_PATH / 'src' / 'xxmi_launcher'))
+
+
+@pytest.fixture(scope='session', autouse=True)
+def root_path(tmp_path_factory) -> Path:
+    """
+    Initializes locale of launcher rooted in temporary folder
+    """
+    import core.locale_manager as Locale
+    root_path = tmp_path_factory.mktemp('root')
+    shutil.copytree(REPO_PATH / 'Locale', root_path / 'Locale')
+    Locale.initialize(root_path)
+    return root_path
+
+
+@pytest.fixture(scope='session')
+def app_paths(root_path):
+    """
+    Initializes launcher paths, modules depending on them can only be imported on Windows
+    """
+    pytest.importorskip('win32api')
+    import core.path_manager as Paths
+    Paths.initialize(root_path)
+    return Paths.App
+
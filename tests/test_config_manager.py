@@ -0,0 +1,163 @@
+import copy
+import json
+
+from dataclasses import fields, is_dataclass
+
+import pytest
+
+
+def populate(obj, path: str = ''):
+    """
+    Changes every value of nested config to non-default one, lists and dicts get extra items
+    """
+    if is_dataclass(obj):
+        for obj_field in fields(obj):
+            if obj_field.init:
+                setattr(obj, obj_field.name, populate(getattr(obj, obj_field.name), f'{path}.{obj_field.name}'))
+        return obj
+    if isinstance(obj, dict):
+        # Extra item is a copy of existing one, so its type is valid for typed dicts as well
+        extra = copy.deepcopy(next(iter(obj.values()))) if obj else None
+        for key, value in obj.items():
+            obj[key] = populate(value, f'{path}[{key}]')
+        if extra is not None and not is_dataclass(extra):
+            obj[f'{path}_extra'] = populate(extra, f'{path}_extra')
+        return obj
+    if isinstance(obj, list):
+        return [populate(value, f'{path}[{i}]') for i, value in enumerate(obj)] + [f'{path}_extra']
+    if isinstance(obj, bool):
+        return not obj
+    if isinstance(obj, int):
+        return obj + 7
+    if isinstance(obj, float):
+        return obj + 0.25
+    if isinstance(obj, str):
+        return f'{obj}{path}'
+    return obj
+
+
+@pytest.fixture()
+def config_data(app_paths) -> dict:
+    import core.config_manager as Config
+    from core.package_manager import PackageConfig
+    config = populate(Config.AppConfig())
+    for package_name in ['Launcher', 'XXMI', 'GIMI', 'SRMI', 'WWMI', 'ZZMI', 'HIMI', 'EFMI']:
+        config.Packages.packages[package_name] = populate(PackageConfig(), package_name)
+    # Config file is written by `save` as JSON, so data types are the same as on real load
+    return json.loads(config.as_json())
+
+
+def test_loader_matches_dacite(config_data):
+    dacite = pytest.importorskip('dacite')
+    import core.config_manager as Config
+    from core.utils.dataclass_loader import DataclassLoader
+
+    config = Config.AppConfig()
+    cfg = config.as_dict(config)
+    cfg.update(config_data)
+    expected = dacite.from_dict(data_class=Config.AppConfig, data=cfg)
+
+    config = Config.AppConfig()
+    cfg = {config_field.name: getattr(config, config_field.name) for config_field in fields(Config.AppConfig) if config_field.init}
+    cfg.update(config_data)
+    result = DataclassLoader().load(Config.AppConfig, cfg)
+
+    # State fields with 'init=False' aren't loaded from file
+    for config_field in fields(Config.AppConfig):
+        if config_field.init:
+            assert getattr(result, config_field.name) == getattr(expected, config_field.name), config_field.name
+    assert config.as_dict(result) == config_data
+    assert len(config_data['Importers']) == 6
+
+
+def test_from_json(config_data, tmp_path):
+    import core.config_manager as Config
+    config_path = tmp_path / 'XXMI Launcher Config.json'
+    config_path.write_text(json.dumps(config_data, indent=4))
+
+    config = Config.AppConfig()
+    config.from_json(config_path)
+
+    assert config.as_dict(config) == config_data
+    assert config.saved_state == config_data
+
+
+def test_from_json_missing_keys(app_paths, tmp_path):
+    import core.config_manager as Config
+    config_path = tmp_path / 'XXMI Launcher Config.json'
+    config_path.write_text(json.dumps({
+        'Launcher': {'unknown_option': 1},
+        'Importers': {'WWMI': {'Importer': {'game_folder': 'D:/Games/WuWa'}}},
+    }))
+
+    config = Config.AppConfig()
+    config.from_json(config_path)
+
+    default_config = Config.AppConfig()
+    assert config.Launcher == default_config.Launcher
+    assert config.Importers.WWMI.Importer.game_folder == 'D:/Games/WuWa'
+    assert config.Importers.WWMI.Importer.game_exe_names == default_config.Importers.WWMI.Importer.game_exe_names
+    assert config.Importers.GIMI == default_config.Importers.GIMI
+
+
+class ManualScheduler:
+    """
+    Stand-in of Tk widget `after`, delayed calls are run by test on demand
+    """
+    def __init__(self):
+        self.calls = []
+
+    def after(self, delay_ms, func, *args):
+        self.calls.append((delay_ms, func, args))
+
+    def run(self):
+        calls, self.calls = self.calls, []
+        for _, func, args in calls:
+            func(*args)
+
+
+@pytest.fixture()
+def config(app_paths, tmp_path, monkeypatch):
+    import core.config_manager as Config
+    monkeypatch.setattr(Config.AppConfig, 'config_path', tmp_path / 'XXMI Launcher Config.json')
+    config = Config.AppConfig()
+    config.save_scheduler = ManualScheduler()
+    writes = []
+    monkeypatch.setattr(app_paths, 'write_file', lambda path, data, **kwargs: writes.append(json.loads(data)))
+    return config, writes
+
+
+def test_schedule_save_coalesced(config):
+    config, writes = config
+    for launch_count in range(3):
+        config.Importers.WWMI.Importer.launch_count = launch_count
+        config.schedule_save(delay=0.5)
+
+    assert writes == []
+    assert [call[0] for call in config.save_scheduler.calls] == [500, 500, 500]
+
+    config.save_scheduler.run()
+
+    assert len(writes) == 1
+    assert writes[0]['Importers']['WWMI']['Importer']['launch_count'] == 2
+
+
+def test_save_supersedes_scheduled_save(config):
+    config, writes = config
+    config.Importers.WWMI.Importer.launch_count = 5
+    config.schedule_save()
+    config.save()
+    config.Importers.WWMI.Importer.launch_count = 6
+
+    config.save_scheduler.run()
+
+    assert [cfg['Importers']['WWMI']['Importer']['launch_count'] for cfg in writes] == [5]
+
+
+def test_schedule_save_without_scheduler(config):
+    config, writes = config
+    config.save_scheduler = None
+
+    config.schedule_save()
+
+    assert len(writes) == 1
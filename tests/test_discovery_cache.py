@@ -0,0 +1,45 @@
+import pytest
+
+
+@pytest.fixture()
+def discovery_cache(app_paths):
+    from core.utils.discovery_cache import DiscoveryCache
+    return DiscoveryCache()
+
+
+def test_find_files(discovery_cache, tmp_path):
+    (tmp_path / 'a' / 'b').mkdir(parents=True)
+    (tmp_path / 'a' / 'b' / 'gamedata.dat').touch()
+
+    assert discovery_cache.find_files(tmp_path, 'gamedata.dat') == [tmp_path / 'a' / 'b' / 'gamedata.dat']
+
+    (tmp_path / 'c').mkdir()
+    (tmp_path / 'c' / 'gamedata.dat').touch()
+
+    assert sorted(discovery_cache.find_files(tmp_path, 'gamedata.dat')) == [
+        tmp_path / 'a' / 'b' / 'gamedata.dat', tmp_path / 'c' / 'gamedata.dat']
+
+
+def test_find_files_root_created_later(discovery_cache, tmp_path):
+    root_path = tmp_path / 'HYP'
+
+    assert discovery_cache.find_files(root_path, 'gamedata.dat') == []
+    assert discovery_cache.find_files(root_path, 'gamedata.dat') == []
+
+    (root_path / 'game').mkdir(parents=True)
+    (root_path / 'game' / 'gamedata.dat').touch()
+
+    assert discovery_cache.find_files(root_path, 'gamedata.dat') == [root_path / 'game' / 'gamedata.dat']
+
+
+def test_find_files_root_removed(discovery_cache, tmp_path):
+    root_path = tmp_path / 'KRLauncher'
+    root_path.mkdir()
+    (root_path / 'kr_starter_game.json').touch()
+
+    assert discovery_cache.find_files(root_path, 'kr_starter_game.json') == [root_path / 'kr_starter_game.json']
+
+    (root_path / 'kr_starter_game.json').unlink()
+    root_path.rmdir()
+
+    assert discovery_cache.find_files(root_path, 'kr_starter_game.json') == []
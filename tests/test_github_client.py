@@ -0,0 +1,145 @@
+import re
+import json
+
+from pathlib import Path
+
+import pytest
+
+from core.utils.github_client import GitHubClient
+
+FIXTURES_PATH = Path(__file__).parent / 'fixtures' / 'github'
+
+# Same patterns as used by packages
+asset_version_pattern = re.compile(r'.*(\d\.\d\.\d).*')
+signature_pattern = re.compile(r'^## Signature[\r\n]+- ((?:[A-Za-z0-9+\/]{4})*(?:[A-Za-z0-9+\/]{4}|[A-Za-z0-9+\/]{3}=|[A-Za-z0-9+\/]{2}={2})$)', re.MULTILINE)
+
+repo_keys = ['XXMI', 'Updater', 'Missing']
+
+release_url = 'https://github.com/SpectrumQT/XXMI-Libs-Package/releases/download'
+release_notes = '## Release Notes v%s\r\n- Fixed shader dumping for new game version\r\n- Updated d3dx.ini defaults\r\n\r\n'
+signatures = [
+    '9Y2SZCUhgqqBvs5dfnr7JCjZ1Rrhswb0gUasdEgyyJoTK1frTYcaWAfnTbHUIZ3g77QGuFCHWve2H39Xavouq60dya86moIqmentkTwLkW70PQEdvmGXMRDY0usBXLQHYXTDYqjE',
+    'ILAVXSAolndG7PQ0d7yPD/tSn+9t35toTKoddD/wKHzeopwWQDTNLL9oVApf4xnjGXGPZzDju6hqyGFSBLN7ZqTC8K0hfSUYQhj6L+U1RJ34qcOsIP+wufaa+WBxenKyN52XVM76',
+    'iNeGDlw47BUd5HuGMjhOfZjdhIwUWRzpPyt9rEw4C3QMg/ytAdkrC7+QMD9bTFoJkvkXvj/8TajurI9mqoRi0utFIdzeyMWu3t9SIz9H3GBIkPvHqVuJqy8zJP1U1g4HBV6C+Qqd',
+]
+
+
+def load_response(file_name):
+    with open(FIXTURES_PATH / file_name, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def parse(releases, repo_key, asset_name_format):
+    return GitHubClient().parse_release(releases[repo_key], asset_version_pattern, asset_name_format, signature_pattern)
+
+
+def test_build_releases_query():
+    query, variables = GitHubClient.build_releases_query({
+        'XXMI': ('SpectrumQT', 'XXMI-Libs-Package'),
+        'Updater': ('SpectrumQT', 'XXMI-Launcher'),
+    })
+
+    assert variables == {'owner0': 'SpectrumQT', 'name0': 'XXMI-Libs-Package', 'owner1': 'SpectrumQT', 'name1': 'XXMI-Launcher'}
+    assert query.startswith('query($owner0: String!, $name0: String!, $owner1: String!, $name1: String!) {')
+    assert 'repo0: repository(owner: $owner0, name: $name0) { latestRelease {' in query
+    assert 'repo1: repository(owner: $owner1, name: $name1) { latestRelease {' in query
+    assert 'releaseAssets(first: 100) { nodes { name downloadUrl } }' in query
+    assert query.count('{') == query.count('}')
+
+
+def test_build_releases_query_pre_release():
+    query, variables = GitHubClient.build_releases_query({'XXMI': ('SpectrumQT', 'XXMI-Libs-Package')}, pre_release=True)
+
+    assert variables == {'owner0': 'SpectrumQT', 'name0': 'XXMI-Libs-Package'}
+    assert 'releases(first: 1, orderBy: {field: CREATED_AT, direction: DESC}) { nodes {' in query
+    assert 'latestRelease' not in query
+    assert query.count('{') == query.count('}')
+
+
+def test_parse_releases_response():
+    releases = GitHubClient.parse_releases_response(load_response('graphql_release.json'), repo_keys)
+
+    # Repository that isn't found or accessible is skipped
+    assert set(releases.keys()) == {'XXMI', 'Updater'}
+
+    assert parse(releases, 'XXMI', 'XXMI-PACKAGE-v%s.zip') == (
+        '1.7.3',
+        f'{release_url}/v1.7.3/XXMI-PACKAGE-v1.7.3.zip',
+        signatures[0],
+        release_notes % '1.7.3',
+        f'{release_url}/v1.7.3/Manifest.json',
+    )
+    assert parse(releases, 'Updater', 'XXMI-UPDATER-PACKAGE-v%s.zip') == (
+        '0.2.1',
+        f'{release_url}/v0.2.1/XXMI-UPDATER-PACKAGE-v0.2.1.zip',
+        signatures[1],
+        release_notes % '0.2.1',
+        None,
+    )
+
+
+def test_parse_releases_response_pre_release():
+    releases = GitHubClient.parse_releases_response(load_response('graphql_pre_release.json'), repo_keys[:2], pre_release=True)
+
+    # Repository without releases is skipped
+    assert set(releases.keys()) == {'XXMI'}
+
+    assert parse(releases, 'XXMI', 'XXMI-PACKAGE-v%s.zip') == (
+        '1.8.0',
+        f'{release_url}/v1.8.0-beta/XXMI-PACKAGE-v1.8.0.zip',
+        signatures[2],
+        release_notes % '1.8.0',
+        f'{release_url}/v1.8.0-beta/Manifest.json',
+    )
+
+
+def test_parse_releases_response_missing_assets():
+    releases = GitHubClient.parse_releases_response(load_response('graphql_missing_assets.json'), repo_keys[:2])
+
+    assert releases['Updater'].body == ''
+    assert releases['Updater'].assets == []
+
+    with pytest.raises(ValueError):
+        parse(releases, 'XXMI', 'XXMI-PACKAGE-v%s.zip')
+    with pytest.raises(ValueError):
+        parse(releases, 'Updater', 'XXMI-UPDATER-PACKAGE-v%s.zip')
+
+
+@pytest.mark.parametrize('file_name, error', [
+    ('graphql_rate_limited.json', ConnectionRefusedError),
+    ('graphql_bad_credentials.json', ConnectionError),
+    ('graphql_error.json', ValueError),
+])
+def test_parse_releases_response_error(file_name, error):
+    with pytest.raises(error) as e:
+        GitHubClient.parse_releases_response(load_response(file_name), repo_keys)
+    assert e.type is error
+
+
+@pytest.mark.parametrize('path, local_path', [
+    (r'\\server\share\SpectrumQT\XXMI-Libs-Package\release.json', '//server/share/SpectrumQT/XXMI-Libs-Package/release.json'),
+    (r'\\server\share\Mirror Folder\release.json', '//server/share/Mirror Folder/release.json'),
+])
+def test_get_local_path_unc(path, local_path):
+    from pathlib import PureWindowsPath
+    url = PureWindowsPath(path).as_uri()
+
+    assert str(GitHubClient.get_local_path(url)).replace('\\', '/') == local_path
+
+
+def test_read_mirror_data(tmp_path):
+    client = GitHubClient()
+    client.configure(access_token=None, verify_ssl=None, proxy_config=None, mirror_source=str(tmp_path / 'Mirror Folder'))
+
+    release_path = tmp_path / 'Mirror Folder' / 'SpectrumQT' / 'XXMI-Libs-Package' / 'release.json'
+    release_path.parent.mkdir(parents=True)
+    release_path.write_bytes(b'{}' * 1024)
+
+    url = client.get_mirror_url('SpectrumQT', 'XXMI-Libs-Package', 'release.json')
+    assert client.is_mirror_url(url)
+
+    progress = []
+    data = client.download_data(url, update_progress_callback=lambda downloaded, total: progress.append((downloaded, total)))
+
+    assert data == b'{}' * 1024
+    assert progress[-1] == (2048, 2048)
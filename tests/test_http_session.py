@@ -0,0 +1,141 @@
+import logging
+
+from threading import Thread, Barrier
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+
+import core.utils.http_adapters as http_adapters
+
+from core.utils.http_session import HttpSession, HttpSessionConfig
+
+
+def get_adapter(http: HttpSession):
+    return http.session.adapters['https://']
+
+
+def test_configure_unchanged_keeps_adapter():
+    http = HttpSession()
+    cfg = HttpSessionConfig(max_retries=5)
+    http.configure(cfg)
+    adapter = get_adapter(http)
+
+    http.configure(HttpSessionConfig(max_retries=5))
+    http.configure(cfg)
+
+    assert get_adapter(http) is adapter
+    assert http.session.adapters['http://'] is adapter
+
+
+def test_configure_changed_replaces_and_closes_adapter(monkeypatch):
+    http = HttpSession()
+    cfg = HttpSessionConfig()
+    http.configure(cfg)
+    adapter = get_adapter(http)
+    closed = []
+    monkeypatch.setattr(adapter, 'close', lambda: closed.append(adapter))
+
+    # Config object is shared with launcher config and gets modified in place
+    cfg.pool_size = 8
+    http.configure(cfg)
+
+    new_adapter = get_adapter(http)
+    assert new_adapter is not adapter
+    assert new_adapter._pool_maxsize == 8
+    assert closed == [adapter]
+
+    http.configure(cfg)
+    assert get_adapter(http) is new_adapter
+
+
+def test_session_created_once():
+    http = HttpSession()
+    barrier = Barrier(8)
+    sessions = []
+
+    def get_session():
+        barrier.wait()
+        sessions.append(http.session)
+
+    threads = [Thread(target=get_session) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(sessions) == 8
+    assert all(session is sessions[0] for session in sessions)
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        # Proxied requests have absolute url in request line
+        data = self.path.encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def get_connect_timings(caplog):
+    return [record.getMessage().split('connect: ')[1].split(', first byte')[0]
+            for record in caplog.records if 'connect: ' in record.getMessage()]
+
+
+@pytest.mark.parametrize('use_proxy', [False, True])
+def test_connection_timings(server_url, caplog, use_proxy):
+    http = HttpSession()
+    http.configure(HttpSessionConfig())
+    url, kwargs = f'{server_url}/file', {}
+    if use_proxy:
+        url, kwargs = 'http://example.invalid/file', {'proxies': {'http': server_url}}
+
+    with caplog.at_level(logging.DEBUG, logger='core.utils.http_session'):
+        for _ in range(2):
+            response = http.get(url, **kwargs)
+            assert response.content == (url if use_proxy else '/file').encode()
+
+    timings = get_connect_timings(caplog)
+    assert len(timings) == 2
+    assert timings[0].startswith('tcp ') and 'tls' not in timings[0]
+    assert timings[1] == 'reused'
+
+
+def test_connection_timings_unknown(server_url, caplog, monkeypatch):
+    http = HttpSession()
+    http.configure(HttpSessionConfig())
+    # Pools of stock adapter don't collect timings
+    monkeypatch.setattr(http_adapters, 'install_timed_pool_classes', lambda manager: None)
+
+    with caplog.at_level(logging.DEBUG, logger='core.utils.http_session'):
+        http.get('http://example.invalid/file', proxies={'http': server_url})
+
+    assert get_connect_timings(caplog) == ['unknown']
+
+
+def test_socks_proxy_pools_timed():
+    pytest.importorskip('socks')
+    adapter = http_adapters.TimedHTTPAdapter()
+    manager = adapter.proxy_manager_for('socks5h://127.0.0.1:1080')
+
+    for pool_class in manager.pool_classes_by_scheme.values():
+        assert issubclass(pool_class, http_adapters.TimedConnectionPoolMixin)
+        assert issubclass(pool_class.ConnectionCls, http_adapters.TimedConnectionMixin)
+        assert 'SOCKS' in pool_class.ConnectionCls.__name__
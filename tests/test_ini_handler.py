@@ -0,0 +1,79 @@
+import pytest
+
+from core.utils.ini_handler import IniHandler, IniHandlerSettings
+
+INI_TEXT = (
+    '; Header\r\n'
+    '[Constants]\r\n'
+    '; Hunting mode\r\n'
+    'global $hunting = 0 ; Off by default\r\n'
+    '\r\n'
+    'global $dump=1\r\n'
+    '[Present]\r\n'
+    'run = CommandListUpdate'
+)
+
+
+def get_ini(**kwargs):
+    return IniHandler(IniHandlerSettings(ignore_comments=False, lossless=True, **kwargs), INI_TEXT)
+
+
+def test_lossless_unchanged():
+    ini = get_ini(inline_comments=True)
+    ini.set_option('Constants', 'global $hunting', 0)
+
+    assert not ini.is_modified()
+    assert ini.to_string() == INI_TEXT
+
+
+def test_lossless_set_value_keeps_formatting():
+    ini = get_ini(inline_comments=True)
+    ini.set_option('Constants', 'global $hunting', 2)
+    ini.set_option('Constants', 'global $dump', 0)
+
+    assert ini.to_string() == INI_TEXT.replace('$hunting = 0', '$hunting = 2').replace('$dump=1', '$dump=0')
+
+
+def test_lossless_set_inline_comment():
+    ini = get_ini(inline_comments=True)
+    ini.set_option('Constants', 'global $hunting', 0, inline_comment='Set by launcher')
+    ini.set_option('Constants', 'global $dump', 1, inline_comment='Dump on start')
+
+    assert ini.to_string() == (INI_TEXT
+                               .replace('Off by default', 'Set by launcher')
+                               .replace('$dump=1', '$dump=1 ; Dump on start'))
+    assert ini.get_diff() == [
+        '@@ -4 +4 @@',
+        '-global $hunting = 0 ; Off by default',
+        '+global $hunting = 0 ; Set by launcher',
+        '@@ -6 +6 @@',
+        '-global $dump=1',
+        '+global $dump=1 ; Dump on start',
+    ]
+
+
+def test_lossless_set_comments():
+    ini = get_ini(inline_comments=True)
+    ini.set_option('Constants', 'global $hunting', 0, comments=['; Hunting mode, 0 - off, 1 - on', '; Set by launcher'])
+    ini.set_option('Constants', 'global $dump', 1, comments=[])
+
+    assert ini.to_string() == (INI_TEXT
+                               .replace('; Hunting mode\r\n', '; Hunting mode, 0 - off, 1 - on\r\n; Set by launcher\r\n')
+                               .replace('Off by default\r\n\r\n', 'Off by default\r\n'))
+
+
+def test_lossless_set_comments_of_added_option():
+    ini = get_ini()
+    ini.set_option('Present', 'post run', 'CommandListReload', comments=['; Old'])
+    ini.set_option('Present', 'post run', 'CommandListReload', comments=['; New', '; Reload'])
+
+    assert ini.to_string() == INI_TEXT + '\r\n; New\r\n; Reload\r\npost run = CommandListReload\r\n'
+
+
+@pytest.mark.parametrize('lossless', [False, True])
+def test_set_comments_when_value_unchanged(lossless):
+    ini = IniHandler(IniHandlerSettings(ignore_comments=False, lossless=lossless), INI_TEXT)
+    ini.set_option('Constants', 'global $dump', 1, comments=['; Frame dump\n'])
+
+    assert ini.is_modified()
+    assert '; Frame dump' in ini.to_string()
@@ -0,0 +1,241 @@
+import io
+import zipfile
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('cryptography')
+
+
+class RangeFile(io.BytesIO):
+    """
+    Local stand-in of HttpRangeFile, records requested ranges
+    """
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.size = len(data)
+        self.downloaded_bytes = 0
+        self.ranges = []
+
+    def prefetch(self, start: int, end: int):
+        self.ranges.append((start, end))
+        self.downloaded_bytes += end - start + 1
+
+
+def make_zip(files, local_extra=None) -> bytes:
+    """
+    Returns zip with given files, `local_extra` is written to local headers only to mimic zip tools that do so
+    """
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w', compression=zipfile.ZIP_DEFLATED) as zip:
+        for file_name, file_data in files.items():
+            zip_info = zipfile.ZipInfo(file_name, date_time=(2024, 1, 1, 0, 0, 0))
+            zip_info.compress_type = zipfile.ZIP_DEFLATED
+            if local_extra is not None:
+                zip_info.extra = local_extra
+            zip.writestr(zip_info, file_data)
+            zip_info.extra = b''
+    return data.getvalue()
+
+
+@pytest.fixture()
+def security():
+    from core.utils.security import Security
+    security = Security()
+    security.generate_key_pair()
+    return security
+
+
+@pytest.fixture()
+def package(app_paths, security, tmp_path):
+    from core.package_manager import Package, PackageMetadata, PackageConfig
+    package = Package(PackageMetadata(
+        package_name='TestPackage',
+        deploy_name='Deploy',
+        asset_name_format='TestPackage-%s.zip',
+        signature_public_key=security.encode(security.serialize_public_key()),
+    ))
+    package.cfg = PackageConfig(latest_version='1.0.0')
+    package.package_path = tmp_path / 'TestPackage'
+    return package
+
+
+def deploy(package, files):
+    for file_name, file_data in files.items():
+        file_path = package.get_deployment_path() / package.metadata.deploy_name / file_name
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(file_data)
+
+
+def make_manifest(zip_data: bytes, tmp_path: Path, security=None):
+    from core.package_manager import Manifest
+    zip_path = tmp_path / 'release.zip'
+    zip_path.write_bytes(zip_data)
+    manifest = Manifest(version='1.0.0')
+    manifest.add_files_from_zip(zip_path)
+    if security is not None:
+        manifest.sign_files(security)
+    return manifest
+
+
+release_files = {
+    'unchanged.txt': b'unchanged' * 100,
+    'Sub/unchanged.dll': b'\x00\x01' * 500,
+    'same_size.txt': b'new content',
+    'missing.txt': b'missing',
+    'large.bin': bytes(range(256)) * 64,
+}
+
+
+def test_manifest_files_from_zip(package, security, tmp_path):
+    manifest = make_manifest(make_zip(release_files), tmp_path, security)
+
+    assert set(manifest.files.keys()) == set(release_files.keys())
+    assert manifest.files['missing.txt'].size == len(b'missing')
+    assert package.security.verify(manifest.files_signature, manifest.files_as_json())
+
+
+def test_get_changed_files(package, tmp_path):
+    manifest = make_manifest(make_zip(release_files), tmp_path)
+    deploy(package, {
+        'unchanged.txt': release_files['unchanged.txt'],
+        'Sub/unchanged.dll': release_files['Sub/unchanged.dll'],
+        'same_size.txt': b'old content',
+        'large.bin': b'truncated',
+    })
+
+    changed_files = package.get_changed_files(manifest)
+
+    assert set(changed_files.keys()) == {'same_size.txt', 'missing.txt', 'large.bin'}
+
+
+@pytest.mark.parametrize('file_name', ['../outside.txt', 'Sub/../../outside.txt'])
+def test_get_changed_files_forbidden_path(package, tmp_path, file_name):
+    from core.package_manager import ManifestFile
+    manifest = make_manifest(make_zip({}), tmp_path)
+    manifest.files[file_name] = ManifestFile(sha256='', size=0)
+
+    with pytest.raises(ValueError):
+        package.get_changed_files(manifest)
+
+
+@pytest.mark.parametrize('local_extra', [None, b'\xfe\xca\x08\x00' + b'\x00' * 8])
+def test_get_zip_member_end(package, local_extra):
+    zip_data = make_zip(release_files, local_extra=local_extra)
+    remote_file = RangeFile(zip_data)
+
+    with zipfile.ZipFile(remote_file, 'r') as zip:
+        zip_infos = zip.infolist()
+        for i, zip_info in enumerate(zip_infos[:-1]):
+            # Members are stored back to back, so each one ends where the next one starts
+            assert package.get_zip_member_end(remote_file, zip_info) == zip_infos[i + 1].header_offset
+
+
+def test_get_zip_member_end_bad_header(package):
+    zip_data = make_zip(release_files)
+    remote_file = RangeFile(zip_data)
+
+    with zipfile.ZipFile(remote_file, 'r') as zip:
+        zip_info = zip.infolist()[1]
+        zip_info.header_offset += 1
+        with pytest.raises(ValueError):
+            package.get_zip_member_end(remote_file, zip_info)
+
+
+@pytest.mark.parametrize('local_extra', [None, b'\xfe\xca\x08\x00' + b'\x00' * 8])
+def test_download_changed_files(package, security, tmp_path, local_extra):
+    zip_data = make_zip(release_files, local_extra=local_extra)
+    manifest = make_manifest(zip_data, tmp_path, security)
+    deploy(package, {file_name: release_files[file_name] for file_name in ['unchanged.txt', 'Sub/unchanged.dll', 'large.bin']})
+    deploy(package, {'same_size.txt': b'old content'})
+
+    remote_file = RangeFile(zip_data)
+    package.manager = SimpleNamespace(github_client=SimpleNamespace(
+        download_data=lambda url, block_size: manifest.as_json().encode('utf-8'),
+        open_range_file=lambda url: remote_file,
+    ))
+    package.manifest_url = 'https://example.com/Manifest.json'
+    package.download_url = 'https://example.com/release.zip'
+
+    assert package.download_changed_files()
+
+    deploy_path = package.downloaded_asset_path / 'Deploy'
+    downloaded_files = {path.relative_to(deploy_path).as_posix() for path in deploy_path.rglob('*') if path.is_file()}
+    assert downloaded_files == {'same_size.txt', 'missing.txt'}
+    for file_name in downloaded_files:
+        assert (deploy_path / file_name).read_bytes() == release_files[file_name]
+
+    # Each changed member is fetched with a single range ending exactly where its data ends
+    with zipfile.ZipFile(io.BytesIO(zip_data), 'r') as zip:
+        for file_name in downloaded_files:
+            zip_info = zip.getinfo(file_name)
+            data_end = package.get_zip_member_end(io.BytesIO(zip_data), zip_info)
+            assert (zip_info.header_offset, data_end - 1) in remote_file.ranges
+
+
+def test_download_changed_files_bad_signature(package, tmp_path):
+    from core.utils.security import Security
+    other_security = Security()
+    other_security.generate_key_pair()
+
+    zip_data = make_zip(release_files)
+    manifest = make_manifest(zip_data, tmp_path, other_security)
+    package.manager = SimpleNamespace(github_client=SimpleNamespace(
+        download_data=lambda url, block_size: manifest.as_json().encode('utf-8'),
+        open_range_file=lambda url: RangeFile(zip_data),
+    ))
+
+    with pytest.raises(ValueError):
+        package.download_changed_files()
+
+
+def test_download_changed_files_not_supported(package, security, tmp_path, monkeypatch):
+    zip_data = make_zip(release_files)
+    manifest = make_manifest(zip_data, tmp_path, security)
+    package.manager = SimpleNamespace(github_client=SimpleNamespace(
+        download_data=lambda url, block_size: manifest.as_json().encode('utf-8'),
+        open_range_file=lambda url: pytest.fail('Release zip is opened for unsupported delta update'),
+    ))
+    monkeypatch.setattr(package, 'is_delta_update_supported', lambda manifest, changed_files: False)
+
+    assert not package.download_changed_files()
+    assert package.downloaded_asset_path is None
+
+
+@pytest.fixture()
+def model_importer_package(app_paths, security, tmp_path, monkeypatch):
+    from core.package_manager import PackageMetadata
+    from core.packages.model_importers.model_importer import ModelImporterPackage
+    package = ModelImporterPackage(PackageMetadata(
+        package_name='TestImporter',
+        asset_name_format='TestImporter-%s.zip',
+        signature_public_key=security.encode(security.serialize_public_key()),
+    ))
+    importer_path = tmp_path / 'TestImporter'
+    monkeypatch.setattr(package, 'get_deployment_path', lambda: importer_path)
+    return package
+
+
+@pytest.mark.parametrize('xcmd_data, deployed_xcmd_data, supported', [
+    (None, None, True),
+    (b'[PostInstall]\ndelete = Core/Legacy\n', b'[PostInstall]\ndelete = Core/Legacy\n', True),
+    (b'[PreInstall]\ndelete = ShaderFixes/Legacy\n', b'[PreInstall]\ndelete = ShaderFixes/Legacy\n', False),
+    # Changed command file may get PreInstall commands
+    (b'[PostInstall]\ndelete = Core/Legacy\n', b'[PostInstall]\n', False),
+    (b'[PostInstall]\ndelete = Core/Legacy\n', None, False),
+])
+def test_model_importer_delta_update_supported(model_importer_package, tmp_path, xcmd_data, deployed_xcmd_data, supported):
+    files = dict(release_files)
+    if xcmd_data is not None:
+        files['Core/auto_update.xcmd'] = xcmd_data
+    manifest = make_manifest(make_zip(files), tmp_path)
+    deployed_files = dict(release_files)
+    if deployed_xcmd_data is not None:
+        deployed_files['Core/auto_update.xcmd'] = deployed_xcmd_data
+    deploy(model_importer_package, deployed_files)
+
+    changed_files = model_importer_package.get_changed_files(manifest)
+
+    assert model_importer_package.is_delta_update_supported(manifest, changed_files) == supported
@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+import shutil
+import itertools
+import subprocess
+
+from threading import Thread, Barrier
+
+import pytest
+
+pytestmark = pytest.mark.skipif(sys.platform != 'linux', reason='Dummy processes are made of Linux sleep binary')
+
+psutil = pytest.importorskip('psutil')
+
+from core.utils.process_tracker import ProcessWatcher, WaitResult
+
+process_ids = itertools.count()
+
+
+@pytest.fixture()
+def dummy(tmp_path):
+    """
+    Returns unique process name and function to start process with this name, started processes are killed after test
+    """
+    # Linux process name is limited to 15 characters
+    process_name = f'xxmi{os.getpid() % 100000}_{next(process_ids)}'[:15]
+    path = tmp_path / process_name
+    shutil.copy(shutil.which('sleep'), path)
+    processes = []
+
+    def start(duration: float = 60, delay: float = 0):
+        if delay:
+            time.sleep(delay)
+        process = subprocess.Popen([str(path), str(duration)])
+        processes.append(process)
+        return process
+
+    yield process_name, start
+
+    for process in processes:
+        process.kill()
+        process.wait()
+
+
+def start_delayed(start, delay: float, duration: float = 60) -> Thread:
+    thread = Thread(target=start, args=(duration, delay))
+    thread.start()
+    return thread
+
+
+def test_wait_for_spawn(dummy):
+    process_name, start = dummy
+    watcher = ProcessWatcher(poll_interval=0.02)
+    thread = start_delayed(start, 0.2)
+
+    result, pid = watcher.wait_for_spawn(process_name, timeout=5)
+    thread.join()
+
+    assert result == WaitResult.Found
+    assert psutil.Process(pid).name() == process_name
+
+
+def test_wait_for_spawn_already_running(dummy):
+    process_name, start = dummy
+    process = start()
+
+    assert ProcessWatcher(poll_interval=0.02).wait_for_spawn(process_name, timeout=0) == (WaitResult.Found, process.pid)
+
+
+def test_wait_for_spawn_timeout(dummy):
+    process_name, _ = dummy
+    time_start = time.monotonic()
+
+    assert ProcessWatcher(poll_interval=0.02).wait_for_spawn(process_name, timeout=0.3) == (WaitResult.Timeout, -1)
+    assert 0.3 <= time.monotonic() - time_start < 2
+
+
+def test_wait_for_exit(dummy):
+    process_name, start = dummy
+    process = start(duration=0.3)
+    watcher = ProcessWatcher(poll_interval=0.02)
+
+    assert watcher.wait_for_exit(process_name, timeout=5) == (WaitResult.Found, process.pid)
+    assert not psutil.pid_exists(process.pid)
+
+
+def test_wait_for_exit_not_found(dummy):
+    process_name, _ = dummy
+
+    assert ProcessWatcher(poll_interval=0.02).wait_for_exit(process_name, timeout=5) == (WaitResult.NotFound, -1)
+
+
+def test_wait_for_exit_kill(dummy):
+    process_name, start = dummy
+    process = start()
+    time_start = time.monotonic()
+
+    result = ProcessWatcher(poll_interval=0.02).wait_for_exit(process_name, timeout=5, kill_timeout=0.3)
+
+    assert result == (WaitResult.Terminated, -1)
+    assert 0.3 <= time.monotonic() - time_start < 2
+    assert not psutil.pid_exists(process.pid)
+
+
+def test_wait_for_exit_timeout(dummy):
+    process_name, start = dummy
+    process = start()
+    time_start = time.monotonic()
+
+    assert ProcessWatcher(poll_interval=0.02).wait_for_exit(process_name, timeout=0.3) == (WaitResult.Timeout, -1)
+    assert 0.3 <= time.monotonic() - time_start < 2
+    assert process.poll() is None
+
+
+def test_wait_for_exit_of_all_processes(dummy):
+    process_name, start = dummy
+    start(duration=0.2)
+    last_process = start(duration=0.6)
+    time_start = time.monotonic()
+
+    result, pid = ProcessWatcher(poll_interval=0.02).wait_for_exit(process_name, timeout=5)
+
+    assert result == WaitResult.Found
+    assert time.monotonic() - time_start >= 0.4
+    assert last_process.poll() is not None
+
+
+def test_concurrent_waits(dummy, monkeypatch):
+    process_name, start = dummy
+    watcher = ProcessWatcher(poll_interval=0.05)
+    scans = []
+    scan = watcher.scan
+    monkeypatch.setattr(watcher, 'scan', lambda: scans.append(time.monotonic()) or scan())
+
+    waits_count = 8
+    barrier = Barrier(waits_count + 1)
+    spawn_results, exit_results = [], []
+
+    def wait():
+        barrier.wait()
+        spawn_results.append(watcher.wait_for_spawn(process_name, timeout=5))
+        barrier.wait()
+        exit_results.append(watcher.wait_for_exit(process_name, timeout=5))
+
+    threads = [Thread(target=wait) for _ in range(waits_count)]
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    time.sleep(0.3)
+    process = start(duration=0.3)
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+
+    assert spawn_results == [(WaitResult.Found, process.pid)] * waits_count
+    assert exit_results == [(WaitResult.Found, process.pid)] * waits_count
+    # Waits polling at the same time share process list scans
+    assert len(scans) < waits_count * 3
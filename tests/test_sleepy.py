@@ -0,0 +1,140 @@
+import io
+import json
+import base64
+import random
+
+from pathlib import Path
+
+import pytest
+
+from core.utils.sleepy import Sleepy, SleepyCodec, JsonSerializer
+
+FIXTURES_PATH = Path(__file__).parent / 'fixtures' / 'sleepy'
+
+# Magic of ZZZ GENERAL_DATA.bin
+GENERAL_DATA_MAGIC = bytes([85, 110, 209, 150, 116, 209, 131, 206, 149, 110, 103, 105, 110, 208, 181, 46, 71, 208, 176,
+                            109, 101, 206, 159, 98, 106, 101, 209, 129, 116])
+
+
+def load_codec_cases():
+    with open(FIXTURES_PATH / 'codec_golden.json', 'r', encoding='utf-8') as f:
+        return json.load(f)['cases']
+
+
+def load_json_cases():
+    with open(FIXTURES_PATH / 'json_golden.json', 'r', encoding='utf-8') as f:
+        return json.load(f)['cases']
+
+
+def reference_encode(magic: bytes, content: str) -> bytes:
+    """
+    Byte by byte encoding, same as the one done by write_string before bulk codec
+    """
+    content_len = len(content)
+    content_bytes, encoded_bytes = bytearray(content_len * 2), bytearray(content_len * 2)
+    content_bytes[:content_len] = content.encode('utf-8')[:content_len]
+    evil, _ = Sleepy.create_evil(magic)
+    length = Sleepy.internal_write(magic, content_len, content_bytes, encoded_bytes, evil)
+    return bytes(encoded_bytes[:length])
+
+
+def reference_decode(magic: bytes, data: bytes) -> str:
+    """
+    Byte by byte decoding, same as the one done by read_string before bulk codec
+    """
+    evil, _ = Sleepy.create_evil(magic)
+    # Old read_string buffer had no room for the last character when there were no flag bytes
+    buffer_chars = [''] * (len(data) + 1)
+    Sleepy.internal_decode(magic, evil, io.BytesIO(data), len(data), len(magic), buffer_chars)
+    return ''.join(buffer_chars)
+
+
+@pytest.mark.parametrize('case', load_codec_cases(), ids=lambda case: case['name'])
+def test_write_string_golden(case):
+    stream = io.BytesIO()
+    Sleepy().write_string(stream, case['content'], bytes.fromhex(case['magic']))
+
+    assert stream.getvalue() == base64.b64decode(case['data'])
+
+
+@pytest.mark.parametrize('case', load_codec_cases(), ids=lambda case: case['name'])
+def test_read_string_golden(case):
+    stream = io.BytesIO(base64.b64decode(case['data']))
+
+    assert Sleepy().read_string(stream, bytes.fromhex(case['magic'])) == case['decoded']
+    assert stream.read() == b''
+
+
+def get_random_magic(rng: random.Random) -> bytes:
+    # Evil bytes have both high bits set, mix them in at random positions including the first and the last ones
+    return bytes(rng.choice([rng.randrange(0xC0), rng.randrange(0xC0, 0x100)]) for _ in range(rng.randint(1, 16)))
+
+
+def test_codec_random_payloads():
+    rng = random.Random(41)
+    alphabet = '{}[]":,. \r\n\t0123456789@ABCZ`abcz~\x00\x3f\x40\x41\x7f\xe9'
+    for _ in range(2000):
+        magic = get_random_magic(rng)
+        content = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 200)))
+        codec = SleepyCodec(magic)
+
+        encoded = codec.encode(content.encode('utf-8')[:len(content)])
+        assert encoded == reference_encode(magic, content), (magic, content)
+        assert codec.decode(encoded) == reference_decode(magic, encoded), (magic, content)
+
+
+def test_codec_random_data():
+    rng = random.Random(42)
+    for _ in range(2000):
+        magic = get_random_magic(rng)
+        data = rng.randbytes(rng.randint(0, 200))
+
+        assert SleepyCodec(magic).decode(data) == reference_decode(magic, data), (magic, data)
+
+
+def test_codec_round_trip_without_consecutive_evils():
+    rng = random.Random(43)
+    for _ in range(500):
+        magic = get_random_magic(rng)
+        codec = SleepyCodec(magic)
+        # Flag byte occupies evil position before character, so characters landing onto evil positions get mangled
+        if any(codec.evil[i] and codec.evil[(i + 1) % len(magic)] for i in range(len(magic))):
+            continue
+        content = bytes(rng.randrange(0x80) for _ in range(rng.randint(0, 300)))
+
+        assert codec.decode(codec.encode(content)) == content.decode('ascii')
+
+
+def test_codec_empty_magic():
+    with pytest.raises(ValueError):
+        SleepyCodec(b'')
+
+
+@pytest.fixture(params=['default', 'buffered', 'json_dumps'])
+def serializer(request, monkeypatch):
+    # Fast path is used only for flat lists longer than json_list_min_length, move the threshold to force either path
+    if request.param == 'buffered':
+        monkeypatch.setattr(JsonSerializer, 'json_list_min_length', 1 << 32)
+    elif request.param == 'json_dumps':
+        monkeypatch.setattr(JsonSerializer, 'json_list_min_length', 1)
+    return JsonSerializer()
+
+
+@pytest.mark.parametrize('case', load_json_cases(), ids=lambda case: case['name'])
+def test_json_dumps_golden(serializer, case):
+    assert serializer.dumps(case['value']) == case['expected']
+
+
+def test_json_dumps_general_data_golden(serializer):
+    content = Sleepy().read_file(FIXTURES_PATH / 'GENERAL_DATA.bin', GENERAL_DATA_MAGIC)
+
+    assert serializer.dumps(json.loads(content)) == content
+
+    stream = io.BytesIO()
+    Sleepy().write_string(stream, content, GENERAL_DATA_MAGIC)
+    assert stream.getvalue() == (FIXTURES_PATH / 'GENERAL_DATA.bin').read_bytes()
+
+
+def test_json_dumps_unsupported_type(serializer):
+    with pytest.raises(ValueError):
+        serializer.dumps({'set': [{1, 2}]})
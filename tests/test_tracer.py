@@ -0,0 +1,64 @@
+import json
+
+from threading import Thread
+
+import pytest
+
+import core.utils.tracer as Tracer
+
+
+@pytest.fixture()
+def trace():
+    Tracer.start_trace('Test')
+    yield Tracer.active_trace.get()
+    Tracer.active_trace.set(None)
+
+
+def get_span_names(trace):
+    return [event['name'] for event in trace.events]
+
+
+def test_span_without_trace():
+    with Tracer.span('idle'):
+        pass
+    assert Tracer.active_trace.get() is None
+
+
+def test_spans_of_other_threads_ignored(trace):
+    @Tracer.traced('traced_call')
+    def traced_call():
+        pass
+
+    def unrelated_work():
+        with Tracer.span('unrelated'):
+            traced_call()
+
+    thread = Thread(target=unrelated_work)
+    thread.start()
+    thread.join()
+
+    with Tracer.span('launch_stage', step=1):
+        traced_call()
+
+    assert get_span_names(trace) == ['traced_call', 'launch_stage']
+    assert trace.events[1]['args'] == {'step': 1}
+
+
+def test_finish_trace_unique_names(app_paths, tmp_path, monkeypatch):
+    traces_path, summary_path = tmp_path / 'Traces', tmp_path / 'Launch Stats.json'
+
+    for start_time in [1700000000.125, 1700000000.625, 1700000001.125]:
+        monkeypatch.setattr(Tracer.time, 'time', lambda: start_time)
+        Tracer.start_trace('Launch')
+        with Tracer.span('stage'):
+            pass
+        Tracer.finish_trace(traces_path, summary_path, importer='WWMI')
+
+    assert Tracer.active_trace.get() is None
+    trace_names = sorted(path.name for path in traces_path.glob('Launch *.json'))
+    assert len(trace_names) == 3
+    assert [name[-8:-5] for name in trace_names] == ['125', '625', '125']
+
+    summary = json.loads(summary_path.read_text())
+    assert len(summary['launches']) == 3
+    assert summary['stages']['stage']['count'] == 3
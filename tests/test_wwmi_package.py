@@ -0,0 +1,226 @@
+import os
+import sqlite3
+
+from pathlib import Path
+
+import pytest
+
+OTHER_FPS_TRIGGER_SQL = '''
+    CREATE TRIGGER OtherFrameRateLock
+    AFTER UPDATE OF value ON LocalStorage
+    WHEN NEW.key = 'CustomFrameRate'
+    BEGIN
+        UPDATE LocalStorage SET value = 30 WHERE key = 'CustomFrameRate';
+    END
+'''
+
+UNRELATED_TRIGGER_SQL = '''
+    CREATE TRIGGER OtherVolumeLock
+    AFTER UPDATE OF value ON LocalStorage
+    WHEN NEW.key = 'MasterVolume'
+    BEGIN
+        UPDATE LocalStorage SET value = 100 WHERE key = 'MasterVolume';
+    END
+'''
+
+
+@pytest.fixture()
+def game_path(app_paths, tmp_path) -> Path:
+    (tmp_path / 'Client' / 'Saved' / 'LocalStorage').mkdir(parents=True)
+    return tmp_path
+
+
+def get_db_path(game_path: Path) -> Path:
+    return game_path / 'Client' / 'Saved' / 'LocalStorage' / 'LocalStorage.db'
+
+
+def create_db(db_path: Path, values: dict, triggers_sql: list):
+    with sqlite3.connect(db_path) as connection:
+        connection.execute('CREATE TABLE LocalStorage(key text primary key not null, value text not null)')
+        connection.executemany('INSERT INTO LocalStorage(key, value) VALUES (?, ?)', values.items())
+        for sql in triggers_sql:
+            connection.execute(sql)
+    connection.close()
+
+
+def read_db(db_path: Path):
+    """
+    Returns values and sorted trigger names stored in db
+    """
+    with sqlite3.connect(db_path) as connection:
+        values = dict(connection.execute('SELECT key, value FROM LocalStorage'))
+        triggers = sorted(name for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'"))
+    connection.close()
+    return values, triggers
+
+
+def update_db_value(db_path: Path, key: str, value: str):
+    with sqlite3.connect(db_path) as connection:
+        connection.execute('UPDATE LocalStorage SET value = ? WHERE key = ?', (value, key))
+    connection.close()
+
+
+def configure(game_path: Path, fps: int = 120):
+    from core.packages.model_importers.wwmi_package import SettingsManager
+    with SettingsManager(game_path) as settings_manager:
+        if fps:
+            settings_manager.set_fps_setting(fps)
+        else:
+            settings_manager.reset_fps_setting()
+        settings_manager.set_setting('RayTracing', '0')
+        settings_manager.set_setting('SkinDamageMode', '0')
+
+
+def test_new_db(game_path):
+    from core.packages.model_importers.wwmi_package import LocalStorage
+    db_path = get_db_path(game_path)
+
+    configure(game_path)
+
+    values, triggers = read_db(db_path)
+    assert {key: values[key] for key in LocalStorage.default_values} == LocalStorage.default_values
+    assert values['CustomFrameRate'] == '120'
+    assert values['RayTracing'] == '0'
+    assert 'MenuData' in values and 'PlayMenuInfo' in values
+    assert triggers == ['CustomFrameRateLock']
+
+    # Game resetting the value gets reverted by lock trigger
+    update_db_value(db_path, 'CustomFrameRate', '60')
+    assert read_db(db_path)[0]['CustomFrameRate'] == '120'
+
+
+def test_third_party_fps_triggers_removed(game_path):
+    db_path = get_db_path(game_path)
+    create_db(db_path, {'CustomFrameRate': '30', 'MasterVolume': '100'}, [OTHER_FPS_TRIGGER_SQL, UNRELATED_TRIGGER_SQL])
+
+    configure(game_path)
+
+    values, triggers = read_db(db_path)
+    assert triggers == ['CustomFrameRateLock', 'OtherVolumeLock']
+    assert values['CustomFrameRate'] == '120'
+    update_db_value(db_path, 'CustomFrameRate', '60')
+    assert read_db(db_path)[0]['CustomFrameRate'] == '120'
+
+
+def test_unchanged_db_not_written(game_path):
+    db_path = get_db_path(game_path)
+    configure(game_path)
+    db_state = read_db(db_path)
+    # Move mtime to the past, so any write would change it regardless of file system timestamp resolution
+    os.utime(db_path, ns=(1_000_000_000, 1_000_000_000))
+
+    configure(game_path)
+
+    assert db_path.stat().st_mtime_ns == 1_000_000_000
+    assert read_db(db_path) == db_state
+
+    # Any actual change is still written
+    update_db_value(db_path, 'SkinDamageMode', '1')
+    os.utime(db_path, ns=(1_000_000_000, 1_000_000_000))
+
+    configure(game_path)
+
+    assert db_path.stat().st_mtime_ns != 1_000_000_000
+    assert read_db(db_path)[0]['SkinDamageMode'] == '0'
+
+
+def test_reset_fps_setting(game_path):
+    db_path = get_db_path(game_path)
+    configure(game_path)
+    with sqlite3.connect(db_path) as connection:
+        connection.execute(OTHER_FPS_TRIGGER_SQL)
+        connection.execute(UNRELATED_TRIGGER_SQL)
+    connection.close()
+
+    configure(game_path, fps=0)
+
+    values, triggers = read_db(db_path)
+    assert triggers == ['OtherVolumeLock']
+    assert values['CustomFrameRate'] == '120'
+    update_db_value(db_path, 'CustomFrameRate', '60')
+    assert read_db(db_path)[0]['CustomFrameRate'] == '60'
+
+
+def test_most_recent_db_used(game_path):
+    storage_path = get_db_path(game_path).parent
+    old_db_path, recent_db_path = storage_path / 'LocalStorage.db', storage_path / 'LocalStorage2.db'
+    create_db(old_db_path, {'SkinDamageMode': '1'}, [])
+    create_db(recent_db_path, {'SkinDamageMode': '1', 'ImageDetail': '3'}, [])
+    os.utime(old_db_path, ns=(1_000_000_000, 1_000_000_000))
+
+    configure(game_path)
+
+    assert sorted(path.name for path in storage_path.iterdir()) == ['LocalStorage.db']
+    values, _ = read_db(old_db_path)
+    assert values['ImageDetail'] == '3'
+    assert values['SkinDamageMode'] == '0'
+
+
+@pytest.fixture()
+def wwmi_package(app_paths):
+    from core.packages.model_importers.wwmi_package import WWMIPackage
+    return WWMIPackage()
+
+
+def make_game_folder(path: Path) -> Path:
+    path.mkdir(parents=True)
+    (path / 'Wuthering Waves.exe').touch()
+    (path / 'Client' / 'Binaries' / 'Win64').mkdir(parents=True)
+    return path
+
+
+def test_find_game_folder_default_steam_layout(wwmi_package, tmp_path):
+    steam_path = tmp_path / 'Program Files (x86)' / 'Steam'
+    (steam_path / 'steamapps' / 'downloading' / '3513350').mkdir(parents=True)
+    game_path = make_game_folder(steam_path / 'steamapps' / 'common' / 'Wuthering Waves' / 'Wuthering Waves Game')
+
+    assert wwmi_package.find_game_folder(tmp_path) == game_path
+
+
+def test_find_game_folder_depth_limit(wwmi_package, tmp_path):
+    make_game_folder(tmp_path / 'Games' / 'Launchers' / 'Kuro' / 'Library' / 'Wuthering Waves' / 'Wuthering Waves Game')
+
+    assert wwmi_package.find_game_folder(tmp_path) is None
+    assert wwmi_package.find_game_folder(tmp_path / 'Games') is not None
+
+
+class FailingConnection:
+    """
+    Connection wrapper failing statements starting with given prefix, like locked db fails them
+    """
+    def __init__(self, connection: sqlite3.Connection, prefix: str):
+        self.connection = connection
+        self.prefix = prefix
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def execute(self, sql, *args):
+        self.check(sql)
+        return self.connection.execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        self.check(sql)
+        return self.connection.executemany(sql, *args)
+
+    def check(self, sql):
+        if sql.strip().startswith(self.prefix):
+            raise sqlite3.OperationalError('database is locked')
+
+
+@pytest.mark.parametrize('prefix', ['BEGIN', 'INSERT', 'COMMIT'])
+def test_save_error_not_masked(game_path, prefix):
+    from core.packages.model_importers.wwmi_package import LocalStorage
+    db_path = get_db_path(game_path)
+    create_db(db_path, {'SkinDamageMode': '1'}, [])
+    local_storage = LocalStorage(db_path)
+    local_storage.connect()
+    local_storage.set_value('SkinDamageMode', '0')
+    local_storage.set_value('RayTracing', '0')
+    local_storage.connection = FailingConnection(local_storage.connection, prefix)
+
+    with pytest.raises(sqlite3.OperationalError, match='database is locked'):
+        local_storage.save()
+
+    assert local_storage.connection is None
+    assert read_db(db_path)[0] == {'SkinDamageMode': '1'}